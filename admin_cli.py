@@ -0,0 +1,160 @@
+"""Offline admin tool that works alongside the running bot.
+
+Changes go through PointAssignmentSystem as journaled transactions, exactly
+like bot commands, so they can be listed and undone from Discord too. The
+CLI only holds the journal's advisory lock while it commits a transaction or
+saves (the bot writes under the same lock), and the bot picks the new
+transactions up from the journal within a few seconds, without reloading
+the data file.
+
+Usage:
+  python admin_cli.py report [--215] [--top 20]
+  python admin_cli.py show anarch
+  python admin_cli.py transactions [--count 20]
+  python admin_cli.py assign 215 "anarch, batman"
+  python admin_cli.py add-points anarch 50
+  python admin_cli.py set-points anarch 1000
+  python admin_cli.py set-lifetime anarch 5000
+  python admin_cli.py add-215 anarch 2
+  python admin_cli.py set-215 anarch 30
+  python admin_cli.py bulk raid_2025-07-20.txt    (one "item user1, user2" per line)
+  python admin_cli.py undo t42
+  python admin_cli.py migrate [--to point_data.dkp]
+"""
+import argparse
+import getpass
+import os
+from contextlib import contextmanager
+
+from journal import Journal
+from locking import LockTimeout
+from point_system import PointAssignmentSystem
+
+# Recorded as the transaction actor
+ACTOR = f"cli:{getpass.getuser()}"
+
+
+@contextmanager
+def open_system(args, save):
+    """Load the state, saving it afterwards when `save` is set"""
+    journal = Journal(args.journal, lock_timeout=args.wait)
+    journal.lock.on_wait = lambda: print("⏳ Waiting for the bot to release the lock...")
+    point_system = PointAssignmentSystem(journal=journal)
+    point_system.load_data(args.data)
+    point_system.load_journal()
+    yield point_system
+    if save:
+        point_system.save_data(args.data)
+
+
+def committed(point_system):
+    """The id of the transaction the command committed"""
+    tx = point_system.last_transaction
+    return tx.txid if tx else "nothing changed"
+
+
+def run_bulk(point_system, filename):
+    """Apply a file of quick-assign lines as one transaction, returns the result lines"""
+    results = []
+    with point_system.transaction(f"bulk {os.path.basename(filename)}", actor=ACTOR):
+        with open(filename, 'r') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                parts = line.split(' ', 1)
+                if len(parts) != 2:
+                    results.append(f"❌ Line {line_number}: expected 'item user1, user2'")
+                    continue
+                item, usernames = parts
+                for username in usernames.split(','):
+                    if username.strip():
+                        results.append(point_system.assign_to_individual(username.strip(), item))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline DKP administration")
+    parser.add_argument('--data', default=os.getenv("DKP_DATA_FILE", "point_data.json"), help="point data file")
+    parser.add_argument('--journal', default="point_journal.jsonl", help="journal file")
+    parser.add_argument('--wait', type=float, default=30, help="seconds to wait for the lock")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    report_parser = subparsers.add_parser('report', help="print a leaderboard")
+    report_parser.add_argument('--215', dest='attendance', action='store_true', help="215 attendance instead of points")
+    report_parser.add_argument('--top', type=int, help="only the first N lines")
+    show_parser = subparsers.add_parser('show', help="print one user's totals")
+    show_parser.add_argument('username')
+    transactions_parser = subparsers.add_parser('transactions', help="list recent transactions")
+    transactions_parser.add_argument('--count', type=int, default=20)
+
+    assign_parser = subparsers.add_parser('assign', help="assign an item to registered users")
+    assign_parser.add_argument('item')
+    assign_parser.add_argument('usernames', help="comma-separated")
+    for name, help_text in (('add-points', "add points"), ('subtract-points', "subtract points"),
+                            ('set-points', "set total points"), ('set-lifetime', "set lifetime points"),
+                            ('add-215', "add 215 attends"), ('set-215', "set 215 attendance")):
+        change_parser = subparsers.add_parser(name, help=help_text)
+        change_parser.add_argument('username')
+        change_parser.add_argument('value', type=int)
+    bulk_parser = subparsers.add_parser('bulk', help="apply a file of quick-assign lines as one transaction")
+    bulk_parser.add_argument('file')
+    undo_parser = subparsers.add_parser('undo', help="undo a transaction")
+    undo_parser.add_argument('txid')
+    migrate_parser = subparsers.add_parser('migrate', help="rewrite the data file in the current schema")
+    migrate_parser.add_argument('--to', help="write to this file instead (.dkp for the packed format)")
+    args = parser.parse_args()
+
+    save = args.command not in ('report', 'show', 'transactions', 'migrate')
+    try:
+        with open_system(args, save) as point_system:
+            if args.command == 'report':
+                board = point_system.get_215_leaderboard() if args.attendance else point_system.get_all_scores()
+                lines = board.splitlines()
+                print('\n'.join(lines[:args.top + 1] if args.top else lines).replace('**', ''))
+            elif args.command == 'show':
+                print(point_system.get_individual_summary(args.username).replace('**', ''))
+            elif args.command == 'transactions':
+                for tx in point_system.journal.recent(args.count):
+                    status = " (undone)" if tx.undone else ""
+                    actor = f" by {tx.actor}" if tx.actor else ""
+                    print(f"{tx.txid} {tx.timestamp[:19]} {tx.description}{actor}{status}")
+            elif args.command == 'assign':
+                with point_system.transaction(f"{args.item} {args.usernames}", actor=ACTOR):
+                    for username in args.usernames.split(','):
+                        if username.strip():
+                            print(point_system.assign_to_individual(username.strip(), args.item))
+            elif args.command == 'bulk':
+                results = run_bulk(point_system, args.file)
+                print('\n'.join(results))
+                print(f"✅ {len(results)} results, committed {committed(point_system)}")
+            elif args.command == 'undo':
+                undo_tx = point_system.undo_transaction(args.txid, actor=ACTOR)
+                print(f"❌ {undo_tx}" if isinstance(undo_tx, str) else f"↩️ {undo_tx.description} ({undo_tx.txid})")
+            elif args.command == 'migrate':
+                target = args.to or args.data
+                point_system.save_data(target)
+                print(f"✅ Wrote {target} ({os.path.getsize(target)} bytes)")
+            else:
+                with point_system.transaction(actor=ACTOR):
+                    if args.command == 'add-points':
+                        point_system.add_points(args.username, args.value)
+                    elif args.command == 'subtract-points':
+                        point_system.subtract_points(args.username, args.value)
+                    elif args.command == 'set-points':
+                        point_system.set_points(args.username, args.value)
+                    elif args.command == 'set-lifetime':
+                        point_system.set_lifetime(args.username, args.value)
+                    elif args.command == 'add-215':
+                        point_system.add_215_attends(args.username, args.value)
+                    else:
+                        point_system.set_215_attends(args.username, args.value)
+                # Read back after the commit, once the read snapshot has been published
+                print(point_system.get_individual_summary(args.username).replace('**', ''))
+                print(f"✅ Committed {committed(point_system)}")
+    except LockTimeout as e:
+        print(f"❌ {e}; is another admin command still saving?")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,376 @@
+"""Content-addressed incremental backups.
+
+A backup is a small manifest that points at content-addressed objects in
+backups/objects/ (zlib-compressed canonical JSON, named by SHA-256):
+
+  • one 'base' object with everything except point history
+  • per user, point history split into fixed-size chunks; history is
+    append-only, so every full chunk is shared with the previous backup
+  • the journal segment (transactions since the previous backup)
+
+Only new objects are written, so a backup costs roughly the delta since the
+last one. Restoring to any timestamp loads the latest backup at or before it
+and replays journaled transactions up to that moment.
+
+Usage:
+  python backup.py backup
+  python backup.py list
+  python backup.py restore "2025-07-20 03:47" [--out point_data.restored.json]
+  python backup.py prune
+  python backup.py import point_backup_20250720_034734.json
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import zlib
+from datetime import datetime, timedelta
+
+from storage import read_data_file, write_data_file
+
+BACKUP_DIR = "backups"
+# History entries per chunk; only the last chunk of a user changes between backups
+CHUNK_ENTRIES = 64
+
+# Retention: everything from the last day, then one per day for a month, then one per week
+KEEP_ALL_HOURS = 24
+KEEP_DAILY_DAYS = 30
+KEEP_WEEKLY_WEEKS = 12
+
+
+def _encode(value):
+    return json.dumps(value, sort_keys=True, separators=(',', ':')).encode()
+
+
+def _parse_time(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value.replace('_', 'T'))
+
+
+def read_journal_records(filename, after_seq=0):
+    """Every journal record with a sequence number above `after_seq`, oldest first"""
+    records = []
+    if not filename or not os.path.exists(filename):
+        return records
+    with open(filename, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('seq', 0) > after_seq:
+                records.append(record)
+    return records
+
+
+class BackupStore:
+    def __init__(self, directory=BACKUP_DIR):
+        self.directory = directory
+        self.objects_dir = os.path.join(directory, 'objects')
+        self.manifests_dir = os.path.join(directory, 'manifests')
+
+    # --- Objects ------------------------------------------------------------
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def put(self, value):
+        """Store a JSON value, returns (digest, bytes written); existing objects are not rewritten"""
+        raw = _encode(value)
+        digest = hashlib.sha256(raw).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return digest, 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = zlib.compress(raw)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        return digest, len(data)
+
+    def get(self, digest):
+        with open(self._object_path(digest), 'rb') as f:
+            return json.loads(zlib.decompress(f.read()))
+
+    # --- Manifests ----------------------------------------------------------
+
+    def manifests(self):
+        """Manifest names, oldest first"""
+        if not os.path.isdir(self.manifests_dir):
+            return []
+        return sorted(name for name in os.listdir(self.manifests_dir) if name.endswith('.json'))
+
+    def read_manifest(self, name):
+        with open(os.path.join(self.manifests_dir, name), 'r') as f:
+            return json.load(f)
+
+    def _write_manifest(self, name, manifest):
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        path = os.path.join(self.manifests_dir, name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def latest(self):
+        names = self.manifests()
+        return self.read_manifest(names[-1]) if names else None
+
+    def previous(self, name):
+        """The manifest immediately before a manifest name (i.e. timestamp), or None"""
+        earlier = [other for other in self.manifests() if other < name]
+        return self.read_manifest(earlier[-1]) if earlier else None
+
+    @staticmethod
+    def manifest_name(timestamp):
+        return timestamp.strftime('%Y%m%dT%H%M%S_%f') + '.json'
+
+    # --- Backup and restore -------------------------------------------------
+
+    def backup(self, data, journal_file=None, timestamp=None):
+        """Write a backup of a state dict (as produced by to_dict), returns the manifest"""
+        timestamp = _parse_time(timestamp) if timestamp else datetime.now()
+        written = 0
+
+        users = {}
+        for username, history in data.get('individual_scores', {}).items():
+            chunks = []
+            for i in range(0, len(history), CHUNK_ENTRIES):
+                digest, size = self.put(history[i:i + CHUNK_ENTRIES])
+                chunks.append(digest)
+                written += size
+            users[username] = chunks
+
+        base = {key: value for key, value in data.items() if key != 'individual_scores'}
+        # JSON object keys are strings; keep registrations consistent with the data file
+        base['user_registrations'] = {str(k): v for k, v in base.get('user_registrations', {}).items()}
+        base_digest, size = self.put(base)
+        written += size
+
+        # Journal segment: transactions since the previous backup, for point-in-time restore
+        name = self.manifest_name(timestamp)
+        previous = self.previous(name)
+        previous_seq = (previous or {}).get('journal_seq') or 0
+        # A legacy dump imported without a journal has seen no journaled transactions
+        journal_seq = data.get('journal_seq') or (previous_seq if journal_file else 0)
+        segments = []
+        records = [r for r in read_journal_records(journal_file, previous_seq) if r['seq'] <= journal_seq]
+        if records:
+            digest, size = self.put(records)
+            segments.append(digest)
+            written += size
+
+        manifest = {
+            'timestamp': timestamp.isoformat(),
+            'journal_seq': journal_seq,
+            'base': base_digest,
+            'users': users,
+            'journal': segments,
+            'bytes_written': written
+        }
+        self._write_manifest(name, manifest)
+        return manifest
+
+    def load(self, manifest):
+        """Rebuild the state dict stored by a manifest"""
+        data = self.get(manifest['base'])
+        data['individual_scores'] = {
+            username: [entry for digest in chunks for entry in self.get(digest)]
+            for username, chunks in manifest['users'].items()
+        }
+        return data
+
+    def restore(self, timestamp, journal_file=None):
+        """Rebuild the state as it was at `timestamp`, returns (data, manifest, replayed transactions)"""
+        # Imported here so backups can be listed and pruned without the point system
+        from point_system import PointAssignmentSystem
+
+        target = _parse_time(timestamp)
+        names = self.manifests()
+        manifests = [self.read_manifest(name) for name in names]
+        base_index = None
+        for i, manifest in enumerate(manifests):
+            if _parse_time(manifest['timestamp']) <= target:
+                base_index = i
+        if base_index is None:
+            raise ValueError(f"No backup exists at or before {target.isoformat()}")
+
+        base = manifests[base_index]
+        # Transactions after the base backup come from the next backup's segment or the live journal
+        if base_index + 1 < len(manifests):
+            records = [r for digest in manifests[base_index + 1]['journal'] for r in self.get(digest)]
+        else:
+            records = read_journal_records(journal_file)
+        records = [r for r in records
+                   if r['seq'] > (base.get('journal_seq') or 0) and _parse_time(r['ts']) <= target]
+
+        point_system = PointAssignmentSystem()
+        point_system.from_dict(self.load(base))
+        for record in records:
+            point_system.replay(record['ops'], record['seq'])
+        return point_system.to_dict(), base, len(records)
+
+    # --- Retention ----------------------------------------------------------
+
+    def prune(self, now=None, keep_all_hours=KEEP_ALL_HOURS, keep_daily_days=KEEP_DAILY_DAYS,
+              keep_weekly_weeks=KEEP_WEEKLY_WEEKS):
+        """Apply the retention policy and delete unreferenced objects, returns (manifests, objects) removed"""
+        now = now or datetime.now()
+        names = self.manifests()
+        keep = set(names[-1:])
+        seen_days = set()
+        seen_weeks = set()
+        # Newest first, so the latest backup of each day/week is the one kept
+        for name in reversed(names):
+            taken = _parse_time(self.read_manifest(name)['timestamp'])
+            age = now - taken
+            if age <= timedelta(hours=keep_all_hours):
+                keep.add(name)
+            elif age <= timedelta(days=keep_daily_days):
+                if taken.date() not in seen_days:
+                    seen_days.add(taken.date())
+                    keep.add(name)
+            elif age <= timedelta(weeks=keep_weekly_weeks):
+                week = taken.isocalendar()[:2]
+                if week not in seen_weeks:
+                    seen_weeks.add(week)
+                    keep.add(name)
+
+        removed = 0
+        carried_segments = []
+        for name in names:
+            if name not in keep:
+                # Hand the journal segment on to the next kept backup so restores stay continuous
+                carried_segments.extend(self.read_manifest(name)['journal'])
+                os.remove(os.path.join(self.manifests_dir, name))
+                removed += 1
+            elif carried_segments:
+                manifest = self.read_manifest(name)
+                manifest['journal'] = carried_segments + manifest['journal']
+                self._write_manifest(name, manifest)
+                carried_segments = []
+
+        return removed, self.collect_garbage()
+
+    def collect_garbage(self):
+        """Delete objects no manifest refers to, returns how many were removed"""
+        referenced = set()
+        for name in self.manifests():
+            manifest = self.read_manifest(name)
+            referenced.add(manifest['base'])
+            referenced.update(manifest['journal'])
+            for chunks in manifest['users'].values():
+                referenced.update(chunks)
+
+        removed = 0
+        if not os.path.isdir(self.objects_dir):
+            return removed
+        for prefix in os.listdir(self.objects_dir):
+            prefix_dir = os.path.join(self.objects_dir, prefix)
+            for digest in os.listdir(prefix_dir):
+                if digest not in referenced:
+                    os.remove(os.path.join(prefix_dir, digest))
+                    removed += 1
+        return removed
+
+    def format_list(self, limit=15):
+        names = self.manifests()
+        if not names:
+            return "No backups yet"
+        result = f"**💾 Backups ({len(names)}):**\n"
+        for name in reversed(names[-limit:]):
+            manifest = self.read_manifest(name)
+            result += (f"• {manifest['timestamp'][:19]} - journal #{manifest.get('journal_seq') or 0}, "
+                       f"{len(manifest['users'])} users, {manifest.get('bytes_written', 0)} bytes new\n")
+        return result
+
+
+class BackupScheduler:
+    """Backs the live state up every `interval` seconds when it has changed, then prunes"""
+
+    def __init__(self, point_system, store=None, journal_file="point_journal.jsonl", interval=900):
+        self.point_system = point_system
+        self.store = store or BackupStore()
+        self.journal_file = journal_file
+        self.interval = interval
+        self.last_seq = None
+        self.task = None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def backup_now(self):
+        """Take a backup off the event loop, returns the manifest"""
+        # Copy on the loop so commands can keep changing the live state during the write
+        data = copy.deepcopy(self.point_system.to_dict())
+        manifest = await asyncio.to_thread(self.store.backup, data, self.journal_file)
+        self.last_seq = data.get('journal_seq')
+        return manifest
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            if self.point_system.snapshot_seq == self.last_seq:
+                continue
+            try:
+                manifest = await self.backup_now()
+                removed, _ = await asyncio.to_thread(self.store.prune)
+                print(f"💾 Backup taken ({manifest['bytes_written']} bytes new, {removed} old backups pruned)")
+            except Exception as e:
+                print(f"❌ Backup failed: {e}")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Incremental DKP backups")
+    parser.add_argument('--dir', default=BACKUP_DIR, help="backup directory")
+    parser.add_argument('--data', default="point_data.json", help="point data file")
+    parser.add_argument('--journal', default="point_journal.jsonl", help="journal file")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('backup', help="back up the data file now")
+    subparsers.add_parser('list', help="list backups")
+    restore_parser = subparsers.add_parser('restore', help="restore the state at a timestamp")
+    restore_parser.add_argument('timestamp', help="e.g. '2025-07-20 03:47' or 2025-07-20T03:47:34")
+    restore_parser.add_argument('--out', default="point_data.restored.json", help="file to write")
+    subparsers.add_parser('prune', help="apply the retention policy")
+    import_parser = subparsers.add_parser('import', help="import full-file point_backup dumps")
+    import_parser.add_argument('files', nargs='+')
+    args = parser.parse_args()
+
+    store = BackupStore(args.dir)
+    if args.command == 'backup':
+        data = read_data_file(args.data)
+        if data is None:
+            print(f"❌ {args.data} not found")
+            return
+        manifest = store.backup(data, args.journal)
+        print(f"💾 Backup {manifest['timestamp']} written ({manifest['bytes_written']} bytes new)")
+    elif args.command == 'list':
+        print(store.format_list(limit=1000))
+    elif args.command == 'restore':
+        data, manifest, replayed = store.restore(args.timestamp, args.journal)
+        write_data_file(data, args.out)
+        print(f"♻️ Restored backup {manifest['timestamp']} + {replayed} journaled transactions to {args.out}")
+    elif args.command == 'prune':
+        removed, objects = store.prune()
+        print(f"🧹 Pruned {removed} backups and {objects} unreferenced objects")
+    elif args.command == 'import':
+        for filename in args.files:
+            data = read_data_file(filename)
+            if data is None:
+                print(f"❌ {filename} not found")
+                continue
+            timestamp = data.get('last_updated') or datetime.fromtimestamp(os.path.getmtime(filename))
+            manifest = store.backup(data, timestamp=timestamp)
+            print(f"📥 Imported {filename} as backup {manifest['timestamp']} ({manifest['bytes_written']} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""discord.py adapters for the command engine's context interface."""
+import io
+import time
+
+import discord
+
+from engine import UserUnavailable
+
+# Minimum seconds between progress edits of a deferred slash response
+PROGRESS_INTERVAL = 2.0
+
+
+def to_discord_embed(embed):
+    """Turn an engine Embed into a discord.Embed"""
+    discord_embed = discord.Embed(
+        title=embed.title,
+        color=getattr(discord.Color, embed.color)() if embed.color else None,
+        description=embed.description
+    )
+    for name, value, inline in embed.fields:
+        discord_embed.add_field(name=name, value=value, inline=inline)
+    return discord_embed
+
+
+def to_discord_file(file):
+    """Turn an engine Attachment into a discord.File"""
+    return discord.File(io.BytesIO(file.data), filename=file.filename)
+
+
+async def lookup_user(bot, discord_id):
+    # First try to get user from bot cache, then from the Discord API
+    user = bot.get_user(discord_id)
+    if user:
+        return user
+    try:
+        return await bot.fetch_user(discord_id)
+    except discord.NotFound:
+        return None
+    except discord.HTTPException:
+        raise UserUnavailable(discord_id)
+
+
+class DiscordContext:
+    """Adapts a discord.py author/channel pair to the engine's context interface
+
+    Replies go through the outbound dispatcher, so send() returns as soon as
+    the reply is queued.
+    """
+
+    def __init__(self, bot, author, channel, outbound):
+        self.bot = bot
+        self.author = author
+        self.channel = channel
+        self.outbound = outbound
+
+    @property
+    def author_id(self):
+        return self.author.id
+
+    @property
+    def is_admin(self):
+        permissions = getattr(self.author, 'guild_permissions', None)
+        return bool(permissions and permissions.administrator)
+
+    async def send(self, content=None, embed=None, file=None):
+        if file is not None:
+            return self.outbound.send(self.channel, content, file=to_discord_file(file))
+        if embed is not None:
+            return self.outbound.send(self.channel, content, embed=to_discord_embed(embed))
+        return self.outbound.send(self.channel, content)
+
+    async def lookup_user(self, discord_id):
+        return await lookup_user(self.bot, discord_id)
+
+
+class SlashContext:
+    """Adapts a slash command interaction to the engine's context interface
+
+    Replies are interaction responses (the first) and followups (the rest).
+    Once deferred, progress() edits the "thinking" placeholder in place.
+    """
+
+    def __init__(self, bot, interaction):
+        self.bot = bot
+        self.interaction = interaction
+        self.deferred = False
+        self.replied = False
+        self.last_progress = 0.0
+
+    @property
+    def author_id(self):
+        return self.interaction.user.id
+
+    @property
+    def is_admin(self):
+        permissions = getattr(self.interaction.user, 'guild_permissions', None)
+        return bool(permissions and permissions.administrator)
+
+    async def defer(self):
+        await self.interaction.response.defer(thinking=True)
+        self.deferred = True
+
+    async def send(self, content=None, embed=None, file=None):
+        kwargs = {}
+        if embed is not None:
+            kwargs['embed'] = to_discord_embed(embed)
+        if file is not None:
+            kwargs['file'] = to_discord_file(file)
+        if self.deferred and not self.replied:
+            # The first reply replaces the progress placeholder
+            self.replied = True
+            discord_file = kwargs.pop('file', None)
+            attachments = [discord_file] if discord_file else []
+            await self.interaction.edit_original_response(content=content, attachments=attachments, **kwargs)
+        elif not self.interaction.response.is_done():
+            self.replied = True
+            await self.interaction.response.send_message(content, **kwargs)
+        else:
+            await self.interaction.followup.send(content, **kwargs)
+
+    async def progress(self, text):
+        if not self.deferred or self.replied:
+            return
+        now = time.monotonic()
+        if now - self.last_progress < PROGRESS_INTERVAL:
+            return
+        self.last_progress = now
+        await self.interaction.edit_original_response(content=text)
+
+    async def lookup_user(self, discord_id):
+        return await lookup_user(self.bot, discord_id)
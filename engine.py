@@ -0,0 +1,942 @@
+"""Transport-agnostic command engine for the DKP bot.
+
+Every command handler lives here and talks to a small context object
+instead of discord.py, so the same logic runs behind the real bot
+(main.py) and the offline fake gateway (fake_gateway.py).
+
+A context provides:
+  • ctx.author_id - the Discord user id of the sender
+  • ctx.is_admin - whether the sender has administrator permissions
+  • await ctx.send(content=None, embed=None, file=None) - reply in the channel,
+    optionally with an Attachment
+  • await ctx.lookup_user(discord_id) - an object with .mention and .name,
+    None when the user does not exist, raises UserUnavailable on API errors
+  • await ctx.progress(text) - optional, shows progress of a long command
+
+Members passed to handlers only need .id, .mention and .display_name.
+"""
+import asyncio
+import copy
+import re
+from contextlib import asynccontextmanager
+
+from history import PAGE_SIZE, parse_cursor
+from idempotency import IdempotencyCache, message_key
+from locking import LockTimeout
+
+
+class UserUnavailable(Exception):
+    """Raised by a context when a user lookup fails for a reason other than not found"""
+
+
+class Embed:
+    """Plain embed description, turned into a discord.Embed by the transport"""
+
+    def __init__(self, title, description, color=None):
+        self.title = title
+        self.description = description
+        self.color = color
+        self.fields = []
+
+    def add_field(self, name, value, inline=True):
+        self.fields.append((name, value, inline))
+
+
+class Attachment:
+    """Plain file attachment, turned into a discord.File by the transport"""
+
+    def __init__(self, filename, data):
+        self.filename = filename
+        self.data = data
+
+
+# A raw member mention, as passed to commands that take a member or a username
+MENTION_PATTERN = re.compile(r'^<@!?(\d+)>$')
+
+# Reply when a command fails with LockTimeout (admin_cli.py is writing the journal)
+LOCK_BUSY = "⏳ Another admin tool is changing the DKP data right now. Try again in a moment."
+
+# Handlers the transports run without holding the journal lock: the read-only
+# ones, plus the quick-assign path and verify, which take it themselves only
+# around their changes (so verify's slow replay doesn't hold up admin_cli.py)
+UNLOCKED_HANDLERS = {
+    'whoami', 'show_points', 'show_leaderboard', 'show_215_leaderboard', 'show_stats', 'show_history',
+    'show_values', 'list_registered_users', 'transactions', 'outbound_stats', 'backup_now', 'list_backups',
+    'help_dkp', 'handle_message', 'assign', 'verify',
+}
+
+# Command table shared by the transports: name -> (handler, parameters)
+# Parameter kinds: 'member' (a mention), 'int', 'str'; optional ones end with '?'
+COMMANDS = {
+    'register': ('register_user', ('str',)),
+    'whoami': ('whoami', ()),
+    'points': ('show_points', ('member?',)),
+    'leaderboard': ('show_leaderboard', ('str?',)),
+    '215leaderboard': ('show_215_leaderboard', ('str?',)),
+    'stats': ('show_stats', ('str?', 'str?')),
+    'history': ('show_history', ('str?', 'str?', 'str?')),
+    'values': ('show_values', ('str?',)),
+    'admin_register': ('admin_register_user', ('member', 'str')),
+    'force_assign': ('force_assign', ('str', 'str')),
+    'registered_users': ('list_registered_users', ()),
+    'unregister_user': ('unregister_user', ('member',)),
+    'delete_username': ('delete_username', ('str',)),
+    'add_points': ('add_points', ('member', 'int')),
+    'subtract_points': ('subtract_points', ('member', 'int')),
+    'set_points': ('set_points', ('member', 'int')),
+    'add_points_to': ('add_points_to', ('str', 'int')),
+    'subtract_points_from': ('subtract_points_from', ('str', 'int')),
+    'set_points_for': ('set_points_for', ('str', 'int')),
+    'set_lifetime': ('set_lifetime', ('member', 'int')),
+    'set_lifetime_for': ('set_lifetime_for', ('str', 'int')),
+    'add_215_attend': ('add_215_attend', ('member', 'int')),
+    'subtract_215_attend': ('subtract_215_attend', ('member', 'int')),
+    'set_215_attend': ('set_215_attend', ('member', 'int')),
+    'add_215_attend_to': ('add_215_attend_to', ('str', 'int')),
+    'subtract_215_attend_from': ('subtract_215_attend_from', ('str', 'int')),
+    'set_215_attend_for': ('set_215_attend_for', ('str', 'int')),
+    'verify': ('verify', ('str?',)),
+    'undo': ('undo', ('str?',)),
+    'transactions': ('transactions', ('int?',)),
+    'autocorrect': ('autocorrect', ('str?',)),
+    'add_item': ('add_item', ('str', 'int')),
+    'revalue_item': ('revalue_item', ('str', 'int')),
+    'retire_item': ('retire_item', ('str',)),
+    'outbound_stats': ('outbound_stats', ()),
+    'backup_now': ('backup_now', ()),
+    'backups': ('list_backups', ()),
+    'help_dkp': ('help_dkp', ()),
+}
+
+HELP_TEXT = """
+**DKP Bot v14 Commands:**
+
+**Quick Assignment:**
+• `215 anarch` - Assigns 215 (50 pts) to anarch + 1 attend
+• `215 anarch, batman` - Assigns to multiple users + 1 attend each
+• `210 anarch` - Other bosses work the same way
+
+**User Commands:**
+• `!register anarch` - Register yourself as "anarch"
+• `!whoami` - Check your registered username
+• `!points` - Show your points + 215 attendance
+• `!points @member` - Show another member's stats
+
+**Leaderboards:**
+• `!leaderboard` - Show points leaderboard
+• `!215leaderboard` - Show 215 attendance leaderboard
+• `!leaderboard png` / `!215leaderboard csv` - Get the full leaderboard as one image or CSV file
+• `!stats distribution` - Median, percentiles and total outstanding points (and your rank)
+• `!stats distribution username` - Same, with another user's percentile
+• `!history [@member|username] [item] [page]` - Point history, newest first (e.g. `!history anarch 215 2`)
+
+**Other Commands:**
+• `!values` - Show all available items and point values (`!values csv` for a file)
+• Every command is also a slash command (`/points`, `/assign 215 anarch, batman`, ...);
+  slow ones run in the background - see `/jobs` and `/cancel`
+
+**Admin Commands - User Management:**
+• `!admin_register @member username` - Register another user
+• `!registered_users` - List all registered users
+• `!unregister_user @member` - Unregister a user
+• `!delete_username username` - Delete username completely
+
+**Admin Commands - Points (Discord Members):**
+• `!add_points @member 50` - Add points to Discord member
+• `!subtract_points @member 30` - Subtract points from Discord member
+• `!set_points @member 100` - Set Discord member's total points
+
+**Admin Commands - Points (Any Username):**
+• `!add_points_to username 50` - Add points to any username
+• `!subtract_points_from username 30` - Subtract points from any username
+• `!set_points_for username 100` - Set total points for any username
+
+**Admin Commands - Lifetime Points:**
+• `!set_lifetime @member 500` - Set Discord member's lifetime points
+• `!set_lifetime_for username 500` - Set lifetime points for any username
+
+**Admin Commands - 215 Attendance (Discord Members):**
+• `!add_215_attend @member 5` - Add 215 attends to Discord member
+• `!subtract_215_attend @member 2` - Subtract 215 attends from Discord member
+• `!set_215_attend @member 10` - Set Discord member's 215 attendance
+
+**Admin Commands - 215 Attendance (Any Username):**
+• `!add_215_attend_to username 5` - Add 215 attends to any username
+• `!subtract_215_attend_from username 2` - Subtract 215 attends from any username
+• `!set_215_attend_for username 10` - Set 215 attendance for any username
+
+**Other Admin Commands:**
+• `!force_assign username item` - Assign points to any username
+• `!undo` / `!undo 3` - Undo the last (or last 3) changes
+• `!undo t42` - Undo a specific transaction
+• `!transactions` - List recent transactions and their ids
+• `!autocorrect on|off` - Auto-correct near-miss usernames in quick assigns
+• `!verify` - Check lifetime points and 215 attendance against point history
+• `!verify repair` - Reset mismatched counters to what the history says
+• `!verify adopt` - Keep current counters and checkpoint them into the history
+• `!outbound_stats` - Show reply queue wait times
+• `!backup_now` - Take an incremental backup now
+• `!backups` - List backups (restore with `python backup.py restore <time>`)
+
+**Admin Commands - Point Values:**
+• `!add_item name 100` - Add a new item worth 100 points
+• `!revalue_item name 150` - Change an item's point value
+• `!retire_item name` - Stop accepting an item (history is kept)
+
+**Point Values (v{version}):**
+{point_values}
+**v14 Feature: Every 215 kill is tracked for attendance!**
+        """
+
+
+def split_message(text, limit=1900):
+    """Split text into chunks of at most `limit` characters, breaking at line ends where possible"""
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind('\n', 0, limit)
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:].lstrip('\n')
+    if text:
+        chunks.append(text)
+    return chunks
+
+
+class CommandEngine:
+    def __init__(self, point_system, data_file="point_data.json", outbound=None, backups=None, lock_timeout=None):
+        self.point_system = point_system
+        # Seconds a command waits for another process to release the journal lock (None waits forever)
+        self.lock_timeout = lock_timeout
+        # None disables persistence (useful for load tests)
+        self.data_file = data_file
+        # OutboundDispatcher used by the transport, if any (for !outbound_stats)
+        self.outbound = outbound
+        # BackupScheduler run by the transport, if any (for !backup_now and !backups)
+        self.backups = backups
+        # (value table, rendered help) so help is only rebuilt after a value change
+        self._help_render = None
+        # PNG/CSV leaderboard attachments, rendered off the event loop and cached (see `renderer`)
+        self._renderer = None
+        # Quick-assign messages already applied, so redeliveries are not applied twice
+        self.idempotency = IdempotencyCache()
+
+    async def acquire_lock(self, handler=None):
+        """Wait for the journal lock before running `handler`, returns whether it was taken
+
+        Waits without blocking the event loop; raises LockTimeout after `lock_timeout`.
+        """
+        lock = self.point_system.journal.lock
+        if lock is None or handler in UNLOCKED_HANDLERS:
+            return False
+        await lock.acquire_async(self.lock_timeout)
+        return True
+
+    def release_lock(self):
+        self.point_system.journal.lock.release()
+
+    @asynccontextmanager
+    async def locked(self, handler=None):
+        """Hold the journal lock while a command changes the state (see acquire_lock)"""
+        taken = await self.acquire_lock(handler)
+        try:
+            yield
+        finally:
+            if taken:
+                self.release_lock()
+
+    @property
+    def renderer(self):
+        # Rendering pulls in csv and multiprocessing; only import it when a file is first asked for
+        if self._renderer is None:
+            from render import LeaderboardRenderer
+            self._renderer = LeaderboardRenderer()
+        return self._renderer
+
+    def save(self):
+        """Persist the current state"""
+        if self.data_file:
+            try:
+                self.point_system.save_data(self.data_file)
+            except LockTimeout as e:
+                # The change is already journaled; the next save includes it
+                print(f"⚠️ Skipped saving {self.data_file}: {e}")
+
+    async def send_long(self, ctx, result):
+        """Send a reply, split into chunks if it is over Discord's message limit"""
+        if len(result) > 2000:
+            for chunk in split_message(result):
+                await ctx.send(chunk)
+        else:
+            await ctx.send(result)
+
+    async def progress(self, ctx, text):
+        """Report progress on a long command, for transports that can show it"""
+        report = getattr(ctx, 'progress', None)
+        if report is not None:
+            await report(text)
+
+    async def send_board(self, ctx, board, fmt):
+        """Send a whole board as one PNG or CSV attachment"""
+        from render import BOARDS, FORMATS
+        if fmt not in FORMATS:
+            await ctx.send(f"❌ Unknown format '{fmt}'. Use " + " or ".join(f"`{f}`" for f in FORMATS))
+            return
+
+        await self.progress(ctx, f"🖼️ Rendering {BOARDS[board][1]}...")
+        filename, data, used = await self.renderer.render(self.point_system.snapshot, board, fmt)
+        note = f" (PNG needs Pillow, sent as {used.upper()})" if used != fmt else ""
+        await ctx.send(f"📎 **{BOARDS[board][1]}**{note}", file=Attachment(filename, data))
+
+    async def require_admin(self, ctx):
+        """Reply with an error and return False unless the sender is an administrator"""
+        if not ctx.is_admin:
+            await ctx.send("❌ You need administrator permissions to use this command.")
+            return False
+        return True
+
+    async def require_registered(self, ctx, member):
+        """Get a member's registered username, replying with an error if there is none"""
+        username = self.point_system.get_username_for_discord_user(member.id)
+        if not username:
+            await ctx.send(f"❌ {member.mention} is not registered. Use `!admin_register` first.")
+        return username
+
+    async def handle_message(self, ctx, content, message_id=None):
+        """Handle the quick-assign format "215 username1, username2", returns True when handled
+
+        With a message id, a message that was already applied (e.g. redelivered
+        after a gateway resume) is ignored.
+        """
+        # *** KEY FEATURE: Parse "215 username1, username2" format ***
+        parts = content.strip().split(' ', 1)
+        if len(parts) == 2:
+            item, usernames_string = parts
+            if item in self.point_system.point_values:
+                usernames = [username.strip() for username in usernames_string.split(',')]
+
+                key = message_key(message_id, content) if message_id is not None else None
+                async with self.locked():
+                    if key is not None:
+                        txid = self.idempotency.get(key)
+                        if txid is not None:
+                            print(f"🔁 Ignoring duplicate of message {message_id} (already applied as {txid})")
+                            return True
+
+                    # The whole batch is one transaction, so `!undo` reverts all of it
+                    results = []
+                    with self.point_system.transaction(content.strip(), actor=ctx.author_id) as tx:
+                        tx.key = key
+                        for username in usernames:
+                            if username:
+                                result = self.point_system.assign_to_individual(username, item)
+                                results.append(result)
+                    if key is not None and tx.ops:
+                        self.idempotency.add(key, tx.txid)
+                    if results:
+                        self.save()
+
+                if results:
+                    await ctx.send('\n'.join(results))
+                    return True
+        return False
+
+    async def assign(self, ctx, item, usernames):
+        """Quick-assign as a command (/assign), with separate errors for the item and the usernames"""
+        if item not in self.point_system.point_values:
+            await ctx.send(f"❌ '{item}' has no point value assigned.")
+            return
+        if not any(username.strip() for username in usernames.split(',')):
+            await ctx.send("❌ Give at least one username, e.g. `anarch, batman`.")
+            return
+        await self.handle_message(ctx, f"{item} {usernames}")
+
+    async def register_user(self, ctx, username):
+        """Register yourself with a DKP username. Usage: !register anarch"""
+        with self.point_system.transaction(actor=ctx.author_id):
+            result = self.point_system.register_user(ctx.author_id, username)
+        await ctx.send(result)
+        self.save()
+
+    async def whoami(self, ctx):
+        """Check what username you're registered as"""
+        username = self.point_system.get_username_for_discord_user(ctx.author_id)
+        if username:
+            await ctx.send(f"You are registered as: **{username}**")
+        else:
+            await ctx.send("You are not registered. Use `!register <username>` to register.")
+
+    async def show_points(self, ctx, member=None):
+        """Show points for a member or yourself - INCLUDES 215 ATTENDANCE"""
+        # Read commands use the last committed snapshot, never a half-applied batch
+        snapshot = self.point_system.snapshot
+        if member is None:
+            username = snapshot.registrations.get(ctx.author_id)
+            if username:
+                result = snapshot.get_individual_summary(username)
+                await ctx.send(result)
+            else:
+                await ctx.send("You are not registered. Use `!register <username>` to register first.")
+        else:
+            username = snapshot.registrations.get(member.id)
+            if username:
+                result = snapshot.get_individual_summary(username)
+                await ctx.send(result)
+            else:
+                await ctx.send(f"{member.display_name} is not registered.")
+
+    async def show_leaderboard(self, ctx, fmt=None):
+        """Show current points leaderboard. Usage: !leaderboard [png|csv]"""
+        if fmt:
+            await self.send_board(ctx, 'points', fmt)
+            return
+        # Rendered in a worker thread against a pinned snapshot, so writes keep going
+        result = await asyncio.to_thread(self.point_system.snapshot.get_all_scores)
+        await ctx.send(result)
+
+    async def show_215_leaderboard(self, ctx, fmt=None):
+        """Show 215 attendance leaderboard - NEW FEATURE. Usage: !215leaderboard [png|csv]"""
+        if fmt:
+            await self.send_board(ctx, '215', fmt)
+            return
+        result = await asyncio.to_thread(self.point_system.snapshot.get_215_leaderboard)
+        await self.send_long(ctx, result)
+
+    async def show_stats(self, ctx, what=None, username=None):
+        """Show the score distribution. Usage: !stats distribution [username]"""
+        if what not in (None, 'distribution'):
+            await ctx.send("❌ Usage: `!stats distribution` or `!stats distribution username`")
+            return
+
+        snapshot = self.point_system.snapshot
+        if username is None:
+            username = snapshot.registrations.get(ctx.author_id)
+        score = None
+        if username is not None:
+            view = snapshot.users.get(username.lower())
+            if view is not None:
+                username, score = view.name, view.total
+        await self.send_long(ctx, snapshot.distribution.format(username, score))
+
+    async def show_history(self, ctx, *words):
+        """Show a user's point history, newest first. Usage: !history [@member|username] [item] [page]"""
+        words = list(words)
+        snapshot = self.point_system.snapshot
+        table = self.point_system.value_table
+        username = None
+        if words:
+            match = MENTION_PATTERN.match(words[0])
+            if match:
+                username = snapshot.registrations.get(int(match.group(1)))
+                if username is None:
+                    await ctx.send("❌ That member is not registered.")
+                    return
+                words.pop(0)
+            elif words[0].lower() in snapshot.users:
+                username = snapshot.users[words.pop(0).lower()].name
+        if username is None:
+            username = snapshot.registrations.get(ctx.author_id)
+            if username is None:
+                await ctx.send("You are not registered. Use `!register <username>` or give a username.")
+                return
+
+        item, page, cursor = None, 1, None
+        for word in words:
+            if cursor is None and parse_cursor(word):
+                cursor = parse_cursor(word)
+            elif item is None and (word in table.values or word in table.retired):
+                item = word
+            elif word.isdigit() and int(word) > 0:
+                page = int(word)
+            else:
+                await ctx.send(f"❌ '{word}' is not an item, page number or cursor. "
+                               "Usage: `!history [@member|username] [item] [page]`")
+                return
+
+        try:
+            result = self.point_system.get_history_page(username, item, page, cursor)
+        except ValueError as e:
+            await ctx.send(f"❌ The {e}; start again from `!history {username}`")
+            return
+        if result is None:
+            await ctx.send(f"{username} has no point history")
+            return
+
+        filter_text = f" - {item}" if item else ""
+        if result.page is not None:
+            pages = max(1, -(-result.total // PAGE_SIZE))
+            if result.page > pages:
+                await ctx.send(f"❌ {username}{filter_text} only has {pages} page{'s' if pages != 1 else ''} of history")
+                return
+            header = f"**📜 {username}{filter_text}** ({result.total} entries, page {result.page} of {pages})\n"
+        else:
+            header = f"**📜 {username}{filter_text}** ({result.total} entries, continued)\n"
+        if not result.entries:
+            await ctx.send(header + "No entries on this page")
+            return
+        lines = [f"`#{position + 1}` {entry.get('item')}: {entry.get('points', 0):+} pts"
+                 for position, entry in result.entries]
+        footer = ""
+        if result.next_cursor:
+            footer = f"\nOlder: `!history {username}{' ' + item if item else ''} {result.next_cursor}`"
+        await self.send_long(ctx, header + '\n'.join(lines) + footer)
+
+    async def show_values(self, ctx, fmt=None):
+        """Show all available point values. Usage: !values [png|csv]"""
+        if fmt:
+            await self.send_board(ctx, 'values', fmt)
+            return
+        await self.send_long(ctx, self.point_system.get_point_values())
+
+    async def admin_register_user(self, ctx, member, username):
+        """Admin command to register another user. Usage: !admin_register @member username"""
+        if not await self.require_admin(ctx):
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            result = self.point_system.register_user(member.id, username)
+        await ctx.send(f"Admin registration: {result}")
+        self.save()
+
+    async def force_assign(self, ctx, username, item):
+        """Admin command to assign points to any username. Usage: !force_assign username item"""
+        if not await self.require_admin(ctx):
+            return
+
+        if item not in self.point_system.point_values:
+            await ctx.send(f"❌ '{item}' has no point value assigned.")
+            return
+
+        # Force assign without registration check
+        with self.point_system.transaction(actor=ctx.author_id):
+            points = self.point_system.force_assign(username, item)
+        self.save()
+        await ctx.send(f"✅ Force assigned '{item}' ({points} points) to {username}")
+
+    async def list_registered_users(self, ctx):
+        """List all registered users (Admin only)"""
+        if not await self.require_admin(ctx):
+            return
+
+        # Pinned so registrations changing during the user lookups can't skew the list
+        registrations = self.point_system.snapshot.registrations
+        if not registrations:
+            await ctx.send("No users are registered")
+            return
+
+        result = "**Registered Users:**\n"
+        for i, (discord_id, username) in enumerate(registrations.items()):
+            if i % 10 == 0:
+                await self.progress(ctx, f"🔎 Looking up users... {i}/{len(registrations)}")
+            try:
+                user = await ctx.lookup_user(discord_id)
+                if user:
+                    result += f"• {user.mention} (`{user.name}`) → **{username}**\n"
+                else:
+                    result += f"• ❌ User Not Found (ID: `{discord_id}`) → **{username}**\n"
+            except UserUnavailable:
+                result += f"• ⚠️ User Unavailable (ID: `{discord_id}`) → **{username}**\n"
+            except Exception as e:
+                result += f"• ❓ Error fetching user (ID: `{discord_id}`) → **{username}**\n"
+
+        # Add summary
+        total_registered = len(registrations)
+        result += f"\n**Total registered users: {total_registered}**"
+
+        await self.send_long(ctx, result)
+
+    async def unregister_user(self, ctx, member):
+        """Admin command to unregister a user. Usage: !unregister_user @member"""
+        if not await self.require_admin(ctx):
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            old_username = self.point_system.unregister_user(member.id)
+        if old_username:
+            self.save()
+            await ctx.send(f"✅ Unregistered {member.mention} (was registered as '{old_username}')")
+        else:
+            await ctx.send(f"❌ {member.mention} is not registered")
+
+    async def delete_username(self, ctx, username):
+        """Admin command to delete a registered username completely. Usage: !delete_username anarch"""
+        if not await self.require_admin(ctx):
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            actual_username = self.point_system.delete_username(username)
+        if not actual_username:
+            await ctx.send(f"❌ No registered user found with username '{username}'")
+            return
+
+        self.save()
+
+        embed = Embed(
+            title="🗑️ Username Deleted",
+            color='red',
+            description=f"Successfully deleted username **'{actual_username}'**"
+        )
+        embed.add_field(name="What was removed:",
+                        value="• User registration\n• All point history\n• All lifetime points\n• All 215 attendance",
+                        inline=False)
+        embed.add_field(name="Deleted by:", value=f"<@{ctx.author_id}>", inline=True)
+
+        await ctx.send(embed=embed)
+
+    async def add_points(self, ctx, member, points):
+        """Admin command to add points to a registered user. Usage: !add_points @member 50"""
+        if not await self.require_admin(ctx):
+            return
+
+        username = await self.require_registered(ctx, member)
+        if not username:
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            total = self.point_system.add_points(username, points)
+        self.save()
+        await ctx.send(f"✅ Added {points} points to {member.mention} ({username}). New total: **{total}**")
+
+    async def subtract_points(self, ctx, member, points):
+        """Admin command to subtract points from a registered user. Usage: !subtract_points @member 30"""
+        if not await self.require_admin(ctx):
+            return
+
+        username = await self.require_registered(ctx, member)
+        if not username:
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            total = self.point_system.subtract_points(username, points)
+        self.save()
+        await ctx.send(f"✅ Subtracted {points} points from {member.mention} ({username}). New total: **{total}**")
+
+    async def set_points(self, ctx, member, total_points):
+        """Admin command to set a user's total points. Usage: !set_points @member 100"""
+        if not await self.require_admin(ctx):
+            return
+
+        username = await self.require_registered(ctx, member)
+        if not username:
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            self.point_system.set_points(username, total_points)
+        self.save()
+        await ctx.send(f"✅ Set {member.mention} ({username})'s total points to **{total_points}**")
+
+    async def add_points_to(self, ctx, username, points):
+        """Admin command to add points to any username. Usage: !add_points_to anarch 50"""
+        if not await self.require_admin(ctx):
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            total = self.point_system.add_points(username, points)
+        self.save()
+        await ctx.send(f"✅ Added {points} points to **{username}**. New total: **{total}**")
+
+    async def subtract_points_from(self, ctx, username, points):
+        """Admin command to subtract points from any username. Usage: !subtract_points_from anarch 30"""
+        if not await self.require_admin(ctx):
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            total = self.point_system.subtract_points(username, points)
+        self.save()
+        await ctx.send(f"✅ Subtracted {points} points from **{username}**. New total: **{total}**")
+
+    async def set_points_for(self, ctx, username, total_points):
+        """Admin command to set total points for any username. Usage: !set_points_for anarch 100"""
+        if not await self.require_admin(ctx):
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            self.point_system.set_points(username, total_points)
+        self.save()
+        await ctx.send(f"✅ Set **{username}**'s total points to **{total_points}**")
+
+    async def set_lifetime(self, ctx, member, lifetime_points):
+        """Admin command to set a user's lifetime points. Usage: !set_lifetime @member 500"""
+        if not await self.require_admin(ctx):
+            return
+
+        username = await self.require_registered(ctx, member)
+        if not username:
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            self.point_system.set_lifetime(username, lifetime_points)
+        self.save()
+        await ctx.send(f"✅ Set {member.mention} ({username})'s lifetime points to **{lifetime_points}**")
+
+    async def set_lifetime_for(self, ctx, username, lifetime_points):
+        """Admin command to set lifetime points for any username. Usage: !set_lifetime_for anarch 500"""
+        if not await self.require_admin(ctx):
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            self.point_system.set_lifetime(username, lifetime_points)
+        self.save()
+        await ctx.send(f"✅ Set **{username}**'s lifetime points to **{lifetime_points}**")
+
+    async def add_215_attend(self, ctx, member, attends):
+        """Admin command to add 215 attendance to a user. Usage: !add_215_attend @member 5"""
+        if not await self.require_admin(ctx):
+            return
+
+        username = await self.require_registered(ctx, member)
+        if not username:
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            total_attends = self.point_system.add_215_attends(username, attends)
+        self.save()
+        await ctx.send(
+            f"✅ Added {attends} 215 attends to {member.mention} ({username}). New total: **{total_attends}**")
+
+    async def subtract_215_attend(self, ctx, member, attends):
+        """Admin command to subtract 215 attendance from a user. Usage: !subtract_215_attend @member 2"""
+        if not await self.require_admin(ctx):
+            return
+
+        username = await self.require_registered(ctx, member)
+        if not username:
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            total_attends = self.point_system.subtract_215_attends(username, attends)
+        self.save()
+        await ctx.send(
+            f"✅ Subtracted {attends} 215 attends from {member.mention} ({username}). New total: **{total_attends}**")
+
+    async def set_215_attend(self, ctx, member, attends):
+        """Admin command to set 215 attendance for a user. Usage: !set_215_attend @member 10"""
+        if not await self.require_admin(ctx):
+            return
+
+        username = await self.require_registered(ctx, member)
+        if not username:
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            self.point_system.set_215_attends(username, attends)
+        self.save()
+        await ctx.send(f"✅ Set {member.mention} ({username})'s 215 attendance to **{attends}**")
+
+    async def add_215_attend_to(self, ctx, username, attends):
+        """Admin command to add 215 attendance to any username. Usage: !add_215_attend_to anarch 5"""
+        if not await self.require_admin(ctx):
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            total_attends = self.point_system.add_215_attends(username, attends)
+        self.save()
+        await ctx.send(f"✅ Added {attends} 215 attends to **{username}**. New total: **{total_attends}**")
+
+    async def subtract_215_attend_from(self, ctx, username, attends):
+        """Admin command to subtract 215 attendance from any username. Usage: !subtract_215_attend_from anarch 2"""
+        if not await self.require_admin(ctx):
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            total_attends = self.point_system.subtract_215_attends(username, attends)
+        self.save()
+        await ctx.send(f"✅ Subtracted {attends} 215 attends from **{username}**. New total: **{total_attends}**")
+
+    async def set_215_attend_for(self, ctx, username, attends):
+        """Admin command to set 215 attendance for any username. Usage: !set_215_attend_for anarch 10"""
+        if not await self.require_admin(ctx):
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            self.point_system.set_215_attends(username, attends)
+        self.save()
+        await ctx.send(f"✅ Set **{username}**'s 215 attendance to **{attends}**")
+
+    async def verify(self, ctx, mode=None):
+        """Admin command to check lifetime/215 counters against history. Usage: !verify [repair|adopt]"""
+        if not await self.require_admin(ctx):
+            return
+
+        if mode not in (None, 'repair', 'adopt'):
+            await ctx.send("❌ Usage: `!verify`, `!verify repair` or `!verify adopt`")
+            return
+
+        from verify import verify_state, repair_state, format_report
+
+        # Replay a copy in a worker thread so the event loop keeps serving quick-assigns
+        data = copy.deepcopy(self.point_system.to_dict())
+        version = self.point_system.snapshot.version
+        await self.progress(ctx, f"🔍 Replaying point history for {len(data['individual_scores'])} users...")
+        report = await asyncio.get_running_loop().run_in_executor(None, verify_state, data)
+
+        repaired = False
+        if mode and (report['discrepancies'] or report['orphans']):
+            repair_mode = 'recompute' if mode == 'repair' else 'adopt'
+            async with self.locked():
+                with self.point_system.transaction(f"!verify {mode}", actor=ctx.author_id):
+                    if self.point_system.snapshot.version != version:
+                        # Changed during the replay (here or in another process): check the current state
+                        data = self.point_system.to_dict()
+                        report = verify_state(data)
+                    if report['discrepancies'] or report['orphans']:
+                        self.point_system.apply_repair(repair_state(data, report, repair_mode))
+                        repaired = True
+                self.save()
+
+        result = format_report(report)
+        if repaired:
+            result += f"\n🔧 Repaired ({repair_mode})"
+
+        await self.send_long(ctx, result)
+
+    async def undo(self, ctx, target=None):
+        """Admin command to undo recent changes. Usage: !undo, !undo 3 or !undo t42"""
+        if not await self.require_admin(ctx):
+            return
+
+        target = target or '1'
+        if target.isdigit():
+            txids = [tx.txid for tx in self.point_system.journal.undoable(int(target))]
+            if not txids:
+                await ctx.send("❌ Nothing to undo")
+                return
+        else:
+            txids = [target]
+
+        results = []
+        for txid in txids:
+            undo_tx = self.point_system.undo_transaction(txid, actor=ctx.author_id)
+            if isinstance(undo_tx, str):
+                results.append(f"❌ {undo_tx}")
+            else:
+                results.append(f"↩️ {undo_tx.description} ({undo_tx.txid})")
+        self.save()
+        await self.send_long(ctx, '\n'.join(results))
+
+    async def transactions(self, ctx, count=10):
+        """Admin command to list recent transactions. Usage: !transactions [count]"""
+        if not await self.require_admin(ctx):
+            return
+
+        recent = self.point_system.journal.recent(count)
+        if not recent:
+            await ctx.send("No transactions recorded yet")
+            return
+
+        result = "**Recent Transactions:**\n"
+        for tx in recent:
+            status = " (undone)" if tx.undone else ""
+            if isinstance(tx.actor, int):
+                actor = f" by <@{tx.actor}>"
+            else:
+                # Transactions from admin_cli.py carry a "cli:<user>" actor
+                actor = f" by {tx.actor}" if tx.actor else ""
+            result += f"• `{tx.txid}` {tx.description}{actor}{status}\n"
+        await self.send_long(ctx, result)
+
+    async def autocorrect(self, ctx, mode=None):
+        """Admin command to toggle quick-assign username auto-correct. Usage: !autocorrect on|off"""
+        if not await self.require_admin(ctx):
+            return
+
+        if mode is None:
+            state = "on" if self.point_system.autocorrect else "off"
+            await ctx.send(f"Quick-assign auto-correct is **{state}**")
+            return
+        if mode not in ('on', 'off'):
+            await ctx.send("❌ Usage: `!autocorrect on` or `!autocorrect off`")
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            self.point_system.set_autocorrect(mode == 'on')
+        self.save()
+        await ctx.send(f"✅ Quick-assign auto-correct is now **{mode}**")
+
+    async def add_item(self, ctx, item, points):
+        """Admin command to add a new item with a point value. Usage: !add_item name 100"""
+        if not await self.require_admin(ctx):
+            return
+
+        if item in self.point_system.point_values:
+            await ctx.send(f"❌ '{item}' already has a value. Use `!revalue_item` to change it.")
+            return
+        if item.startswith('!') or ',' in item:
+            await ctx.send(f"❌ '{item}' can't be used as an item name.")
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            table = self.point_system.set_item_value(item, points)
+        self.save()
+        await ctx.send(f"✅ Added '{item}' ({points} points) - value table is now v{table.version}")
+
+    async def revalue_item(self, ctx, item, points):
+        """Admin command to change an item's point value. Usage: !revalue_item name 150"""
+        if not await self.require_admin(ctx):
+            return
+
+        if item not in self.point_system.point_values:
+            await ctx.send(f"❌ '{item}' has no point value assigned.")
+            return
+
+        old_points = self.point_system.point_values[item]
+        with self.point_system.transaction(actor=ctx.author_id):
+            table = self.point_system.set_item_value(item, points)
+        self.save()
+        await ctx.send(f"✅ '{item}' is now worth {points} points (was {old_points}) - "
+                       f"value table is now v{table.version}")
+
+    async def retire_item(self, ctx, item):
+        """Admin command to retire an item. Usage: !retire_item name"""
+        if not await self.require_admin(ctx):
+            return
+
+        if item not in self.point_system.point_values:
+            await ctx.send(f"❌ '{item}' has no point value assigned.")
+            return
+
+        with self.point_system.transaction(actor=ctx.author_id):
+            table = self.point_system.retire_item(item)
+        self.save()
+        await ctx.send(f"✅ Retired '{item}' - existing history keeps its points, value table is now v{table.version}")
+
+    async def outbound_stats(self, ctx):
+        """Admin command to show reply queue wait times. Usage: !outbound_stats"""
+        if not await self.require_admin(ctx):
+            return
+
+        if self.outbound is None:
+            await ctx.send("Outbound queue is not enabled")
+            return
+        await ctx.send(self.outbound.format_stats())
+
+    async def backup_now(self, ctx):
+        """Admin command to take an incremental backup immediately. Usage: !backup_now"""
+        if not await self.require_admin(ctx):
+            return
+
+        if self.backups is None:
+            await ctx.send("Backups are not enabled")
+            return
+        manifest = await self.backups.backup_now()
+        await ctx.send(f"💾 Backup {manifest['timestamp'][:19]} taken "
+                       f"(journal #{manifest['journal_seq'] or 0}, {manifest['bytes_written']} bytes new)")
+
+    async def list_backups(self, ctx):
+        """Admin command to list backups. Usage: !backups"""
+        if not await self.require_admin(ctx):
+            return
+
+        if self.backups is None:
+            await ctx.send("Backups are not enabled")
+            return
+        result = await asyncio.to_thread(self.backups.store.format_list)
+        await self.send_long(ctx, result)
+
+    async def help_dkp(self, ctx):
+        """Show help for DKP commands"""
+        table = self.point_system.value_table
+        if not self._help_render or self._help_render[0] is not table:
+            help_text = HELP_TEXT.format(version=table.version, point_values=table.format_by_points())
+            self._help_render = (table, help_text)
+        await self.send_long(ctx, self._help_render[1])
@@ -0,0 +1,287 @@
+"""In-process fake Discord gateway for load testing the command engine.
+
+Replays recorded or synthetic message streams through CommandEngine at a
+configurable rate and reports end-to-end throughput and tail latency.
+Every message is dispatched as its own task, the way discord.py dispatches
+gateway events, so slow handlers delay each other just like in production.
+
+Message files are JSONL, one message per line:
+  {"author_id": 123, "content": "215 anarch, batman", "admin": false, "channel_id": 1}
+Record a real stream by starting the bot with DKP_RECORD_FILE=messages.jsonl.
+
+Usage:
+  python fake_gateway.py --file messages.jsonl --rate 50
+  python fake_gateway.py --count 5000 --users 200 --rate 0
+  python fake_gateway.py --rate 20 --send-delay 0.05 --outbound
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from engine import CommandEngine, COMMANDS, MENTION_PATTERN
+from outbound import OutboundDispatcher
+from point_system import PointAssignmentSystem
+
+
+def record_message(filename, author_id, content, is_admin=False, channel_id=None):
+    """Append one incoming message to a JSONL recording"""
+    with open(filename, 'a') as f:
+        f.write(json.dumps({
+            'author_id': author_id,
+            'content': content,
+            'admin': is_admin,
+            'channel_id': channel_id
+        }) + '\n')
+
+
+def load_messages(filename):
+    """Load a JSONL message recording"""
+    messages = []
+    with open(filename, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                messages.append(json.loads(line))
+    return messages
+
+
+def synthetic_messages(count, users=50, seed=0):
+    """Generate a raid-like stream: registrations, then quick-assigns mixed with reads"""
+    rng = random.Random(seed)
+    admin_id = 1
+    user_ids = [1000 + i for i in range(users)]
+    items = ['170', '180', '195', '200', '205', '210', '215', 'rb', 'mord', 'prot']
+
+    messages = [{'author_id': user_id, 'content': f'!register user{i}', 'admin': False, 'channel_id': 1}
+                for i, user_id in enumerate(user_ids)]
+    while len(messages) < count:
+        roll = rng.random()
+        if roll < 0.7:
+            names = ', '.join(f'user{i}' for i in rng.sample(range(users), min(users, rng.randint(1, 8))))
+            messages.append({'author_id': admin_id, 'content': f'{rng.choice(items)} {names}',
+                             'admin': True, 'channel_id': 1})
+        elif roll < 0.85:
+            messages.append({'author_id': rng.choice(user_ids), 'content': '!points',
+                             'admin': False, 'channel_id': 2})
+        elif roll < 0.95:
+            messages.append({'author_id': rng.choice(user_ids), 'content': '!215leaderboard',
+                             'admin': False, 'channel_id': 2})
+        else:
+            messages.append({'author_id': admin_id,
+                             'content': f'!add_points_to user{rng.randrange(users)} {rng.randint(1, 100)}',
+                             'admin': True, 'channel_id': 3})
+    return messages[:count]
+
+
+class FakeMember:
+    def __init__(self, member_id, name=None):
+        self.id = member_id
+        self.name = name or f'member{member_id}'
+        self.display_name = self.name
+        self.mention = f'<@{member_id}>'
+
+
+class FakeChannel:
+    """Channel that records messages, each send taking the gateway's simulated round trip"""
+
+    def __init__(self, gateway, channel_id):
+        self.gateway = gateway
+        self.id = channel_id
+        self.messages = []
+
+    async def send(self, content=None, embed=None, file=None):
+        if self.gateway.send_delay:
+            await asyncio.sleep(self.gateway.send_delay)
+        self.messages.append(file or embed or content)
+
+
+class FakeContext:
+    """Engine context that records replies instead of sending them"""
+
+    def __init__(self, gateway, author_id, is_admin, channel_id):
+        self.gateway = gateway
+        self.author_id = author_id
+        self.is_admin = is_admin
+        self.channel = gateway.channel(channel_id)
+        self.sent = []
+        # Delivery futures from the outbound dispatcher, awaited for end-to-end latency
+        self.pending = []
+
+    async def send(self, content=None, embed=None, file=None):
+        self.sent.append(file or embed or content)
+        if self.gateway.outbound:
+            self.pending.append(self.gateway.outbound.send(self.channel, content, embed=embed, file=file))
+        else:
+            await self.channel.send(content, embed=embed, file=file)
+
+    async def lookup_user(self, discord_id):
+        return self.gateway.member(discord_id)
+
+
+class FakeGateway:
+    def __init__(self, engine, send_delay=0.0, outbound=None):
+        self.engine = engine
+        # Simulated round trip for each outgoing message, in seconds
+        self.send_delay = send_delay
+        self.outbound = outbound
+        self.members = {}
+        self.channels = {}
+        self.latencies = []
+        self.errors = 0
+
+    def member(self, member_id):
+        if member_id not in self.members:
+            self.members[member_id] = FakeMember(member_id)
+        return self.members[member_id]
+
+    def channel(self, channel_id):
+        if channel_id not in self.channels:
+            self.channels[channel_id] = FakeChannel(self, channel_id)
+        return self.channels[channel_id]
+
+    def parse_args(self, parameters, words):
+        """Convert command words using the engine's parameter kinds, raises ValueError on bad input"""
+        args = []
+        for i, kind in enumerate(parameters):
+            optional = kind.endswith('?')
+            kind = kind.rstrip('?')
+            if i >= len(words):
+                if optional:
+                    break
+                raise ValueError("Missing required argument")
+            word = words[i]
+            if kind == 'member':
+                match = MENTION_PATTERN.match(word)
+                if not match:
+                    raise ValueError("Member not found")
+                args.append(self.member(int(match.group(1))))
+            elif kind == 'int':
+                args.append(int(word))
+            else:
+                args.append(word)
+        return args
+
+    async def dispatch(self, message):
+        """Deliver one message to the engine, the way on_message does in main.py"""
+        ctx = FakeContext(self, message['author_id'], message.get('admin', False), message.get('channel_id'))
+        content = message['content']
+        if await self.engine.handle_message(ctx, content):
+            return ctx
+
+        if content.startswith('!'):
+            words = content[1:].split()
+            if words and words[0] in COMMANDS:
+                handler_name, parameters = COMMANDS[words[0]]
+                try:
+                    args = self.parse_args(parameters, words[1:])
+                except ValueError as e:
+                    await ctx.send(str(e))
+                    return ctx
+                await getattr(self.engine, handler_name)(ctx, *args)
+        return ctx
+
+    async def _timed_dispatch(self, message, arrival):
+        try:
+            ctx = await self.dispatch(message)
+            if ctx.pending:
+                await asyncio.gather(*ctx.pending)
+        except Exception as e:
+            self.errors += 1
+            print(f"Error: {e}")
+        self.latencies.append(time.perf_counter() - arrival)
+
+    async def replay(self, messages, rate=None):
+        """Replay messages at `rate` messages per second (None or 0 = as fast as possible)"""
+        self.latencies = []
+        self.errors = 0
+        tasks = []
+        start = time.perf_counter()
+        for i, message in enumerate(messages):
+            arrival = start + i / rate if rate else time.perf_counter()
+            delay = arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(self._timed_dispatch(message, arrival)))
+            if not rate:
+                # Let handlers run between arrivals instead of queueing the whole stream
+                await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+        return self.report(len(messages), elapsed)
+
+    def report(self, count, elapsed):
+        """Summarise the last replay: throughput and latency percentiles in milliseconds"""
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] * 1000
+
+        report = {
+            'messages': count,
+            'errors': self.errors,
+            'elapsed_s': elapsed,
+            'throughput_per_s': count / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(50),
+            'p95_ms': percentile(95),
+            'p99_ms': percentile(99),
+            'max_ms': latencies[-1] * 1000 if latencies else 0.0,
+        }
+        if self.outbound:
+            report['outbound'] = self.outbound.stats()
+        return report
+
+
+def format_report(report):
+    result = (f"📨 {report['messages']} messages in {report['elapsed_s']:.2f}s "
+              f"({report['throughput_per_s']:.1f} msg/s, {report['errors']} errors)\n"
+              f"⏱️ latency p50 {report['p50_ms']:.2f}ms | p95 {report['p95_ms']:.2f}ms | "
+              f"p99 {report['p99_ms']:.2f}ms | max {report['max_ms']:.2f}ms")
+    if 'outbound' in report:
+        outbound = report['outbound']
+        result += (f"\n📤 {outbound['sent']} replies in {outbound['sends']} sends, "
+                   f"queue wait p50 {outbound['wait_p50_ms']:.0f}ms | p95 {outbound['wait_p95_ms']:.0f}ms | "
+                   f"max {outbound['wait_max_ms']:.0f}ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay messages through the DKP command engine")
+    parser.add_argument('--file', help="JSONL message recording to replay")
+    parser.add_argument('--count', type=int, default=2000, help="synthetic messages to generate")
+    parser.add_argument('--users', type=int, default=50, help="synthetic roster size")
+    parser.add_argument('--rate', type=float, default=0, help="messages per second, 0 = unthrottled")
+    parser.add_argument('--send-delay', type=float, default=0.0, help="simulated send round trip (s)")
+    parser.add_argument('--data', help="point data file to start from (copied, never modified)")
+    parser.add_argument('--no-save', action='store_true', help="skip persistence after each command")
+    parser.add_argument('--outbound', action='store_true', help="send replies through the rate-limited queue")
+    args = parser.parse_args()
+
+    messages = load_messages(args.file) if args.file else synthetic_messages(args.count, args.users)
+
+    workdir = tempfile.mkdtemp(prefix='dkp_load_')
+    data_file = os.path.join(workdir, 'point_data.json')
+    if args.data:
+        shutil.copy(args.data, data_file)
+
+    point_system = PointAssignmentSystem()
+    point_system.load_data(data_file)
+    outbound = OutboundDispatcher() if args.outbound else None
+    engine = CommandEngine(point_system, data_file=None if args.no_save else data_file, outbound=outbound)
+    gateway = FakeGateway(engine, send_delay=args.send_delay, outbound=outbound)
+
+    try:
+        report = asyncio.run(gateway.replay(messages, rate=args.rate or None))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Trigram index over registered usernames for "did you mean" suggestions.
+
+Each name is split into padded character trigrams ("  b", " bo", "bob",
+"ob ") and stored in an inverted index. A lookup only visits names that
+share at least one trigram with the query, ranks them by trigram overlap
+and confirms the best few with an edit distance check, so it stays
+sublinear in the roster size.
+"""
+
+
+def trigrams(name):
+    padded = f"  {name.lower()} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit=None):
+    """Edit distance counting a swap of adjacent letters as one typo (optimal string alignment)
+
+    Stops early and returns limit + 1 once every path exceeds `limit`.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if limit is not None and len(a) - len(b) > limit:
+        return limit + 1
+    before_previous = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            cost = min(previous[j] + 1,
+                       current[j - 1] + 1,
+                       previous[j - 1] + (char_a != char_b))
+            if i > 1 and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                cost = min(cost, before_previous[j - 2] + 1)
+            current.append(cost)
+        if limit is not None and min(current) > limit:
+            return limit + 1
+        before_previous, previous = previous, current
+    return previous[-1]
+
+
+class UsernameIndex:
+    def __init__(self):
+        # lowercase name -> registered spelling
+        self.names = {}
+        # trigram -> set of lowercase names
+        self.postings = {}
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name):
+        name_lower = name.lower()
+        self.names[name_lower] = name
+        for gram in trigrams(name_lower):
+            self.postings.setdefault(gram, set()).add(name_lower)
+
+    def remove(self, name):
+        name_lower = name.lower()
+        if self.names.pop(name_lower, None) is None:
+            return
+        for gram in trigrams(name_lower):
+            postings = self.postings.get(gram)
+            if postings:
+                postings.discard(name_lower)
+                if not postings:
+                    del self.postings[gram]
+
+    def rebuild(self, names):
+        self.names = {}
+        self.postings = {}
+        for name in names:
+            self.add(name)
+
+    def get(self, name):
+        """The registered spelling of a name (case-insensitive), or None"""
+        return self.names.get(name.lower())
+
+    def suggest(self, query, limit=3, max_distance=2):
+        """Registered names closest to `query`, as (name, distance) pairs, best first"""
+        query_lower = query.lower()
+        query_grams = trigrams(query_lower)
+
+        shared = {}
+        for gram in query_grams:
+            for name_lower in self.postings.get(gram, ()):
+                shared[name_lower] = shared.get(name_lower, 0) + 1
+
+        # Dice coefficient on trigram sets, then confirm the top candidates by edit distance
+        def dice(name_lower):
+            return 2 * shared[name_lower] / (len(query_grams) + len(name_lower) + 1)
+
+        candidates = sorted(shared, key=dice, reverse=True)[:limit * 4]
+        matches = []
+        for name_lower in candidates:
+            distance = edit_distance(query_lower, name_lower, max_distance)
+            if distance <= max_distance:
+                matches.append((self.names[name_lower], distance))
+        matches.sort(key=lambda match: match[1])
+        return matches[:limit]
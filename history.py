@@ -0,0 +1,62 @@
+"""Paging through a user's point history.
+
+Pages run newest first. Each page ends with a cursor token (`c<position>.<generation>`)
+that continues from the oldest entry shown, so it still points at the same
+place after new entries are appended. A cursor from before an undo or a
+replaced history (a different record generation) is rejected rather than
+silently skipping or repeating entries.
+
+With an item filter the record's per-item position index is used, so both
+plain and filtered pages cost O(page size) plus a binary search.
+"""
+import re
+from bisect import bisect_left
+
+PAGE_SIZE = 15
+CURSOR_PATTERN = re.compile(r'^c(\d+)\.(\d+)$')
+
+
+def format_cursor(position, generation):
+    return f"c{position}.{generation}"
+
+
+def parse_cursor(word):
+    """(position, generation) for a cursor token, or None"""
+    match = CURSOR_PATTERN.match(word)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+class HistoryPage:
+    def __init__(self, entries, total, page, next_cursor):
+        # (position, entry) pairs, newest first
+        self.entries = entries
+        # Number of entries matching the filter
+        self.total = total
+        # Page number when the page was asked for by number, else None
+        self.page = page
+        self.next_cursor = next_cursor
+
+
+def history_page(record, item=None, page=1, cursor=None, size=PAGE_SIZE):
+    """One page of a record's history, newest first; raises ValueError for a stale cursor"""
+    history = record.history or []
+    positions = record.positions(item) if item is not None else None
+    count = len(positions) if positions is not None else len(history)
+
+    if cursor is not None:
+        before, generation = cursor
+        if generation != record.generation:
+            raise ValueError("history changed since that cursor was made")
+        end = bisect_left(positions, before) if positions is not None else min(before, count)
+        page = None
+    else:
+        end = count - (page - 1) * size
+    start = max(0, end - size)
+
+    if positions is not None:
+        selected = positions[start:max(start, end)]
+    else:
+        selected = range(start, max(start, end))
+    entries = [(position, history[position]) for position in reversed(selected)]
+    next_cursor = format_cursor(selected[0], record.generation) if start > 0 and entries else None
+    return HistoryPage(entries, count, page, next_cursor)
@@ -0,0 +1,69 @@
+"""Duplicate detection for message-driven quick-assigns.
+
+A gateway resume can deliver the same `215 a, b` message again, and it
+would be applied twice. Each applied message is remembered by message id
+and content hash, so a redelivery is recognised with one dict lookup.
+
+The cache is bounded both ways: at most `max_entries` keys (least recently
+used evicted first) and each key expires `ttl` seconds after the message was
+applied. The key is also stored on the journaled transaction, so the cache
+is rebuilt on startup from the journal's window of keyed transactions, which
+is as large as the cache.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+MAX_ENTRIES = 10000
+# Discord only redelivers recent messages; a day is plenty
+TTL = 24 * 60 * 60
+
+
+def message_key(message_id, content):
+    """Idempotency key for a message: its id plus a hash of the content it was applied with"""
+    digest = hashlib.blake2b(content.strip().encode('utf-8'), digest_size=8).hexdigest()
+    return f"{message_id}:{digest}"
+
+
+class IdempotencyCache:
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # key -> (expiry time, txid), least recently used first
+        self.entries = OrderedDict()
+        self.duplicates = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key, now=None):
+        """The transaction a key was applied in, or None if it is new (or expired)"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires, txid = entry
+        if expires <= (now or time.time()):
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        self.duplicates += 1
+        return txid
+
+    def add(self, key, txid, applied_at=None):
+        self.entries[key] = ((applied_at or time.time()) + self.ttl, txid)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def rebuild(self, transactions):
+        """Refill from journaled transactions (oldest first), skipping expired ones"""
+        self.entries.clear()
+        now = time.time()
+        for tx in transactions:
+            if not tx.key:
+                continue
+            applied_at = datetime.fromisoformat(tx.timestamp).timestamp()
+            if applied_at + self.ttl > now:
+                self.add(tx.key, tx.txid, applied_at)
+        return len(self.entries)
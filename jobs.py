@@ -0,0 +1,78 @@
+"""Background jobs for long-running commands.
+
+Slash commands that can take a while (user lookups, verify, exports) reply
+with a deferred "thinking" response and run as a job on the event loop.
+Each guild may only run a limited number of jobs at once, so repeated
+requests are turned away instead of piling up, and any job can be cancelled.
+"""
+import asyncio
+import itertools
+import time
+
+# Heavy jobs allowed to run at the same time in one guild
+JOBS_PER_GUILD = 1
+
+
+class Job:
+    __slots__ = ('job_id', 'guild_id', 'name', 'actor', 'started_at', 'task')
+
+    def __init__(self, job_id, guild_id, name, actor):
+        self.job_id = job_id
+        self.guild_id = guild_id
+        self.name = name
+        self.actor = actor
+        self.started_at = time.monotonic()
+        self.task = None
+
+    def elapsed(self):
+        return time.monotonic() - self.started_at
+
+
+class JobManager:
+    def __init__(self, per_guild=JOBS_PER_GUILD):
+        self.per_guild = per_guild
+        self.jobs = {}
+        self._ids = itertools.count(1)
+
+    def running(self, guild_id):
+        """Jobs currently running in a guild, oldest first"""
+        return [job for job in self.jobs.values() if job.guild_id == guild_id]
+
+    def start(self, guild_id, name, actor, coro_factory, on_cancel=None):
+        """Run `coro_factory()` as a job, returns the Job or None when the guild is at its limit"""
+        if len(self.running(guild_id)) >= self.per_guild:
+            return None
+
+        job = Job(f"j{next(self._ids)}", guild_id, name, actor)
+        self.jobs[job.job_id] = job
+        job.task = asyncio.get_running_loop().create_task(self._run(job, coro_factory, on_cancel))
+        return job
+
+    async def _run(self, job, coro_factory, on_cancel):
+        try:
+            await coro_factory()
+        except asyncio.CancelledError:
+            if on_cancel:
+                await on_cancel()
+        except Exception as e:
+            print(f"❌ Job {job.job_id} ({job.name}) failed: {e}")
+        finally:
+            self.jobs.pop(job.job_id, None)
+
+    def cancel(self, guild_id, job_id=None):
+        """Cancel one job (or every job) in a guild, returns the cancelled jobs"""
+        cancelled = []
+        for job in self.running(guild_id):
+            if job_id is None or job.job_id == job_id:
+                job.task.cancel()
+                cancelled.append(job)
+        return cancelled
+
+    def format_jobs(self, guild_id):
+        jobs = self.running(guild_id)
+        if not jobs:
+            return "No jobs running"
+        result = "**⏳ Running Jobs:**\n"
+        for job in jobs:
+            result += f"• `{job.job_id}` {job.name} by <@{job.actor}> ({job.elapsed():.0f}s)\n"
+        return result
@@ -0,0 +1,321 @@
+"""Append-only transaction journal.
+
+Every command that changes state runs as one transaction: a list of
+primitive operations recorded by PointAssignmentSystem. Each committed
+transaction is appended to point_journal.jsonl as one JSON line and kept in
+memory (up to `max_undo` of them) so `!undo` can revert it by applying the
+inverse operations, without reloading or rescanning state.
+
+Operation format (lists, so they round-trip through JSON):
+  ['append', key, entry, created]   history entry appended (created = new history)
+  ['unappend', key, entry, created] history entry removed (recorded by undo)
+  ['history', key, old, new]        whole history replaced (None = absent)
+  ['lifetime_add', key, delta]      lifetime points changed by delta
+  ['lifetime', key, old, new]       lifetime points set (None = absent)
+  ['attend_add', key, delta]        215 attendance changed by delta
+  ['attend', key, old, new]         215 attendance set (None = absent)
+  ['reg', discord_id, old, new]     registration changed (None = unregistered)
+  ['values', None, old, new]        value table replaced ({'values': ..., 'retired': [...]})
+  ['setting', name, old, new]       setting changed (e.g. 'autocorrect')
+
+Several processes (the bot and admin_cli.py) can share one journal. Each
+record carries the origin id of the process that wrote it. A transaction
+holds the advisory file lock from before its first operation until it is
+appended, and catches up with the records other processes added first
+(see PointAssignmentSystem.transaction), so every process applies the
+transactions in journal order and sequence numbers stay unique and
+increasing. Other processes' transactions are picked up incrementally with
+read_new().
+
+Transactions carrying an idempotency key are also kept in a separate, larger
+window (`max_keyed`, the idempotency cache size), so duplicate detection
+survives restarts after more than `max_undo` transactions. Compaction drops
+their records from the journal, so their keys are saved to
+`<journal>.keys` alongside it and read back first on load.
+"""
+import asyncio
+import json
+import os
+import uuid
+from collections import OrderedDict
+from contextlib import nullcontext
+from datetime import datetime
+
+from idempotency import MAX_ENTRIES
+from locking import FileLock
+
+# Journals bigger than this are trimmed to the undo window on startup
+MAX_JOURNAL_BYTES = 5 * 1024 * 1024
+# Seconds between checks for transactions written by other processes
+WATCH_INTERVAL = 2
+
+
+class Transaction:
+    def __init__(self, seq, description, actor=None, undo_of=None, origin=None):
+        self.seq = seq
+        self.txid = f't{seq}'
+        self.description = description
+        self.actor = actor
+        self.undo_of = undo_of
+        # Id of the process that wrote the transaction
+        self.origin = origin
+        # Idempotency key of the message that caused it (see idempotency.py)
+        self.key = None
+        self.timestamp = datetime.now().isoformat()
+        self.ops = []
+        self.undone = False
+        # Byte offset of this transaction's record in the journal file
+        self.offset = None
+
+    def to_dict(self):
+        record = {
+            'seq': self.seq,
+            'ts': self.timestamp,
+            'desc': self.description,
+            'actor': self.actor,
+            'ops': self.ops
+        }
+        if self.undo_of:
+            record['undo_of'] = self.undo_of
+        if self.origin:
+            record['origin'] = self.origin
+        if self.key:
+            record['key'] = self.key
+        return record
+
+    @classmethod
+    def from_dict(cls, record):
+        tx = cls(record['seq'], record.get('desc', ''), record.get('actor'), record.get('undo_of'),
+                 record.get('origin'))
+        tx.timestamp = record.get('ts', tx.timestamp)
+        tx.ops = record.get('ops', [])
+        tx.key = record.get('key')
+        return tx
+
+
+class Journal:
+    def __init__(self, filename="point_journal.jsonl", max_undo=500, origin=None, max_keyed=MAX_ENTRIES,
+                 lock_timeout=None):
+        # None keeps the journal in memory only
+        self.filename = filename
+        self.max_undo = max_undo
+        self.max_keyed = max_keyed
+        self.origin = origin or f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.next_seq = 1
+        self.transactions = OrderedDict()
+        # Idempotency key -> transaction, oldest first, for the last `max_keyed` keyed transactions
+        self.keyed = OrderedDict()
+        # Seconds to wait for another process to finish writing (None waits forever)
+        self.lock = FileLock(f"{filename}.lock", timeout=lock_timeout) if filename else None
+        # Highest sequence number seen, and how far into which file it was read
+        self.last_seq = 0
+        self.read_offset = 0
+        self.file_id = None
+
+    @property
+    def offset(self):
+        """Current end of the journal file"""
+        if self.filename and os.path.exists(self.filename):
+            return os.path.getsize(self.filename)
+        return 0
+
+    def locked(self):
+        """Hold the journal's file lock (a no-op for in-memory journals)"""
+        return self.lock if self.lock else nullcontext()
+
+    def _file_id(self):
+        stat = os.stat(self.filename)
+        return stat.st_dev, stat.st_ino
+
+    def new_transaction(self, description, actor=None, undo_of=None):
+        tx = Transaction(self.next_seq, description, actor, undo_of, self.origin)
+        self.next_seq += 1
+        return tx
+
+    def append(self, tx):
+        """Write a committed transaction and keep it for undo
+
+        The caller holds the lock and has applied everything read_new()
+        returned before making the transaction's changes.
+        """
+        with self.locked():
+            if self.filename:
+                tx.offset = self.offset
+                with open(self.filename, 'a') as f:
+                    f.write(json.dumps(tx.to_dict()) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                self.read_offset = self.offset
+                self.file_id = self._file_id()
+            self._seen(tx)
+
+    def _seen(self, tx):
+        self._remember(tx)
+        self.last_seq = max(self.last_seq, tx.seq)
+        self.next_seq = max(self.next_seq, self.last_seq + 1)
+
+    def read_new(self):
+        """Read transactions other processes appended since the last read, oldest first"""
+        if not self.filename or not os.path.exists(self.filename):
+            return []
+        if self._file_id() != self.file_id:
+            # Compacted (rewritten) by another process: rescan, skipping what was already seen
+            self.read_offset = 0
+            self.file_id = self._file_id()
+        if os.path.getsize(self.filename) == self.read_offset:
+            return []
+
+        external = []
+        with open(self.filename, 'rb') as f:
+            f.seek(self.read_offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # Still being written; read it next time
+                    break
+                record_offset = self.read_offset
+                self.read_offset += len(line)
+                try:
+                    tx = Transaction.from_dict(json.loads(line))
+                except (ValueError, KeyError):
+                    print(f"⚠️ Skipping unreadable journal record at offset {record_offset}")
+                    continue
+                if tx.seq <= self.last_seq or tx.origin == self.origin:
+                    continue
+                tx.offset = record_offset
+                self._seen(tx)
+                external.append(tx)
+        return external
+
+    def _remember(self, tx):
+        self.transactions[tx.txid] = tx
+        if tx.undo_of and tx.undo_of in self.transactions:
+            self.transactions[tx.undo_of].undone = True
+        while len(self.transactions) > self.max_undo:
+            self.transactions.popitem(last=False)
+        if tx.key:
+            self._remember_key(tx)
+
+    def _remember_key(self, tx):
+        self.keyed[tx.key] = tx
+        self.keyed.move_to_end(tx.key)
+        while len(self.keyed) > self.max_keyed:
+            self.keyed.popitem(last=False)
+
+    @property
+    def keys_filename(self):
+        return f"{self.filename}.keys"
+
+    def _load_keys(self):
+        """Read the keys saved by the last compaction (only what duplicate detection needs)"""
+        if not os.path.exists(self.keys_filename):
+            return
+        try:
+            with open(self.keys_filename) as f:
+                records = json.load(f)
+        except ValueError:
+            print(f"⚠️ Ignoring unreadable {self.keys_filename}")
+            return
+        for record in records:
+            tx = Transaction(record['seq'], '')
+            tx.key = record['key']
+            tx.timestamp = record['ts']
+            self._remember_key(tx)
+
+    def _save_keys(self):
+        tmp_filename = f"{self.keys_filename}.tmp"
+        with open(tmp_filename, 'w') as f:
+            json.dump([{'key': tx.key, 'seq': tx.seq, 'ts': tx.timestamp} for tx in self.keyed.values()], f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, self.keys_filename)
+
+    def get(self, txid):
+        return self.transactions.get(txid)
+
+    def recent(self, count=10):
+        """The most recent transactions, newest first"""
+        return list(reversed(self.transactions.values()))[:count]
+
+    def undoable(self, count=1):
+        """The last `count` transactions that are not undos and have not been undone, newest first"""
+        result = []
+        for tx in reversed(self.transactions.values()):
+            if len(result) >= count:
+                break
+            if not tx.undone and not tx.undo_of:
+                result.append(tx)
+        return result
+
+    def load(self):
+        """Reload the undo window from the journal file, returns the number of transactions read"""
+        if not self.filename or not os.path.exists(self.filename):
+            return 0
+
+        # Locked so nothing is appended between reading and compacting
+        with self.locked():
+            self._load_keys()
+            count = 0
+            offset = 0
+            self.file_id = self._file_id()
+            with open(self.filename, 'rb') as f:
+                for line in f:
+                    record_offset = offset
+                    offset += len(line)
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        tx = Transaction.from_dict(json.loads(line))
+                    except (ValueError, KeyError):
+                        # A torn final line from a crash mid-write
+                        print(f"⚠️ Skipping unreadable journal record at offset {record_offset}")
+                        continue
+                    tx.offset = record_offset
+                    self._seen(tx)
+                    count += 1
+            self.read_offset = offset
+
+            if offset > MAX_JOURNAL_BYTES:
+                self.compact()
+        return count
+
+    def compact(self):
+        """Rewrite the journal keeping only the transactions in the undo window"""
+        if not self.filename:
+            return
+        with self.locked():
+            # Saved first: keyed transactions outside the undo window are about to be dropped
+            self._save_keys()
+            tmp_filename = f"{self.filename}.tmp"
+            with open(tmp_filename, 'w') as f:
+                for tx in self.transactions.values():
+                    tx.offset = f.tell()
+                    f.write(json.dumps(tx.to_dict()) + '\n')
+                self.read_offset = f.tell()
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_filename, self.filename)
+            self.file_id = self._file_id()
+
+
+class JournalWatcher:
+    """Applies transactions other processes (e.g. admin_cli.py) append to the journal"""
+
+    def __init__(self, point_system, interval=WATCH_INTERVAL):
+        self.point_system = point_system
+        self.interval = interval
+        self.task = None
+
+    def start(self):
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                applied = self.point_system.sync_journal()
+                if applied:
+                    print(f"🔄 Applied {applied} transactions from another process")
+            except Exception as e:
+                print(f"❌ Journal sync failed: {e}")
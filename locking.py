@@ -0,0 +1,117 @@
+"""Advisory file lock shared by the bot and the admin CLI.
+
+Whoever writes the journal or the data file holds the lock, so the two
+processes never interleave appends or overwrite each other's saves. Readers
+don't need it: the data file is replaced atomically and journal readers stop
+at the last complete line.
+
+Uses flock() on POSIX and msvcrt.locking() on Windows. The lock is reentrant
+within a process, so a save that syncs the journal first can take it twice.
+Each holder keeps it only for one transaction or save. The bot waits for it
+with acquire_async() around each command that changes state, polling with
+asyncio.sleep so the event loop keeps running, and fails the command with
+LockTimeout if another process holds it too long.
+"""
+import asyncio
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Seconds between attempts while someone else holds the lock
+POLL_INTERVAL = 0.05
+
+
+class LockTimeout(Exception):
+    pass
+
+
+class FileLock:
+    def __init__(self, filename, timeout=None, on_wait=None):
+        self.filename = filename
+        # Used when the lock is taken with `with`
+        self.timeout = timeout
+        self.on_wait = on_wait
+        self.fd = None
+        self.depth = 0
+
+    def _try_lock(self):
+        try:
+            if fcntl:
+                fcntl.flock(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(self.fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self, timeout=None, on_wait=None):
+        """Take the lock, waiting up to `timeout` seconds (forever with None)
+
+        `on_wait` is called once if the lock is busy, e.g. to tell the user why nothing happens.
+        """
+        if self.depth:
+            self.depth += 1
+            return
+        self.fd = os.open(self.filename, os.O_RDWR | os.O_CREAT)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        waited = False
+        while not self._try_lock():
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(self.fd)
+                self.fd = None
+                raise LockTimeout(f"{self.filename} is held by another process")
+            if not waited and on_wait:
+                on_wait()
+            waited = True
+            time.sleep(POLL_INTERVAL)
+        self.depth = 1
+
+    async def acquire_async(self, timeout=None):
+        """acquire() for coroutines: waits with asyncio.sleep instead of blocking the event loop"""
+        if self.depth:
+            self.depth += 1
+            return
+        fd = os.open(self.filename, os.O_RDWR | os.O_CREAT)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while True:
+                if self.depth:
+                    # Another task of this process took it while we slept; join it
+                    self.depth += 1
+                    return
+                self.fd = fd
+                if self._try_lock():
+                    self.depth = 1
+                    fd = None
+                    return
+                self.fd = None
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise LockTimeout(f"{self.filename} is held by another process")
+                await asyncio.sleep(POLL_INTERVAL)
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def release(self):
+        self.depth -= 1
+        if self.depth:
+            return
+        if fcntl:
+            fcntl.flock(self.fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self.fd, 0, os.SEEK_SET)
+            msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+        os.close(self.fd)
+        self.fd = None
+
+    def __enter__(self):
+        self.acquire(self.timeout, self.on_wait)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
@@ -0,0 +1,191 @@
+"""Outbound message dispatcher.
+
+Replies are queued per channel instead of being sent directly. Each channel
+has one worker that merges adjacent short text replies into a single
+message (up to Discord's 2000 character limit) and only sends when both the
+channel bucket and the global bucket have room, so a burst of quick-assigns
+during a raid turns into a few messages instead of a pile of throttled ones.
+
+Embeds and attachments are never merged. Queue wait time (enqueue -> sent)
+is tracked per message for the !outbound_stats command.
+"""
+import asyncio
+import time
+from collections import deque
+
+# Discord allows 5 messages per 5 seconds per channel and 50 requests per second globally
+CHANNEL_RATE = 5
+CHANNEL_PERIOD = 5.0
+GLOBAL_RATE = 50
+GLOBAL_PERIOD = 1.0
+MAX_MESSAGE_LENGTH = 2000
+# Number of recent wait times kept for percentiles
+WAIT_SAMPLES = 1000
+
+
+class RateBucket:
+    """Sliding-window limiter: at most `rate` acquisitions per `period` seconds"""
+
+    def __init__(self, rate, period):
+        self.rate = rate
+        self.period = period
+        self.sent_at = deque()
+
+    def delay(self, now):
+        """Seconds until the next acquisition is allowed"""
+        while self.sent_at and now - self.sent_at[0] >= self.period:
+            self.sent_at.popleft()
+        if len(self.sent_at) < self.rate:
+            return 0.0
+        return self.sent_at[0] + self.period - now
+
+    def acquire(self, now):
+        self.sent_at.append(now)
+
+
+class OutboundMessage:
+    __slots__ = ('content', 'embed', 'file', 'enqueued_at', 'future')
+
+    def __init__(self, content, embed, file, future):
+        self.content = content
+        self.embed = embed
+        self.file = file
+        self.enqueued_at = time.monotonic()
+        self.future = future
+
+
+class OutboundDispatcher:
+    def __init__(self, channel_rate=CHANNEL_RATE, channel_period=CHANNEL_PERIOD,
+                 global_rate=GLOBAL_RATE, global_period=GLOBAL_PERIOD, max_length=MAX_MESSAGE_LENGTH):
+        self.channel_rate = channel_rate
+        self.channel_period = channel_period
+        self.max_length = max_length
+        self.global_bucket = RateBucket(global_rate, global_period)
+        self.buckets = {}
+        self.queues = {}
+        self.workers = {}
+        # Metrics
+        self.messages_queued = 0
+        self.messages_sent = 0
+        self.sends = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.recent_waits = deque(maxlen=WAIT_SAMPLES)
+
+    def send(self, channel, content=None, embed=None, file=None):
+        """Queue a message for a channel, returns a future resolved once it is sent
+
+        The channel only needs an async send(content, embed=None, file=None)
+        method and an id. Callers that don't care about delivery can ignore
+        the future.
+        """
+        loop = asyncio.get_running_loop()
+        message = OutboundMessage(content, embed, file, loop.create_future())
+        key = getattr(channel, 'id', id(channel))
+        if key not in self.queues:
+            self.queues[key] = deque()
+        if key not in self.buckets:
+            self.buckets[key] = RateBucket(self.channel_rate, self.channel_period)
+        self.queues[key].append(message)
+        self.messages_queued += 1
+
+        if key not in self.workers:
+            self.workers[key] = loop.create_task(self._drain(key, channel))
+        return message.future
+
+    def _coalesce(self, queue):
+        """Pop the next batch: one embed/file message, or as many adjacent text replies as fit in one"""
+        first = queue.popleft()
+        batch = [first]
+        if not self._mergeable(first):
+            return batch, first.content, first
+
+        content = first.content
+        while queue and self._mergeable(queue[0]):
+            merged_length = len(content) + 1 + len(queue[0].content)
+            if merged_length > self.max_length:
+                break
+            message = queue.popleft()
+            content += '\n' + message.content
+            batch.append(message)
+        return batch, content, None
+
+    def _mergeable(self, message):
+        return message.embed is None and message.file is None and message.content is not None
+
+    async def _drain(self, key, channel):
+        queue = self.queues[key]
+        bucket = self.buckets[key]
+        try:
+            while queue:
+                # Wait for room in both the channel and the global bucket
+                while True:
+                    now = time.monotonic()
+                    delay = max(bucket.delay(now), self.global_bucket.delay(now))
+                    if delay <= 0:
+                        break
+                    await asyncio.sleep(delay)
+                bucket.acquire(now)
+                self.global_bucket.acquire(now)
+
+                batch, content, single = self._coalesce(queue)
+                sent_at = time.monotonic()
+                for message in batch:
+                    wait = sent_at - message.enqueued_at
+                    self.wait_total += wait
+                    self.wait_max = max(self.wait_max, wait)
+                    self.recent_waits.append(wait)
+                self.messages_sent += len(batch)
+                self.sends += 1
+
+                result = None
+                try:
+                    if single is not None:
+                        result = await channel.send(content, embed=single.embed, file=single.file)
+                    else:
+                        result = await channel.send(content)
+                except Exception as e:
+                    print(f"Error sending message: {e}")
+                for message in batch:
+                    if not message.future.done():
+                        message.future.set_result(result)
+        finally:
+            del self.workers[key]
+            if not queue:
+                del self.queues[key]
+                # Keep the bucket while its window is still open so a new burst is still limited
+                if not bucket.sent_at or time.monotonic() - bucket.sent_at[-1] >= bucket.period:
+                    del self.buckets[key]
+
+    async def flush(self):
+        """Wait until every queued message has been sent"""
+        while self.workers:
+            await asyncio.gather(*list(self.workers.values()))
+
+    def stats(self):
+        """Queue wait time and coalescing metrics"""
+        waits = sorted(self.recent_waits)
+
+        def percentile(p):
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(p / 100 * len(waits)))]
+
+        return {
+            'queued': self.messages_queued,
+            'sent': self.messages_sent,
+            'sends': self.sends,
+            'pending': sum(len(queue) for queue in self.queues.values()),
+            'wait_avg_ms': self.wait_total / self.messages_sent * 1000 if self.messages_sent else 0.0,
+            'wait_p50_ms': percentile(50) * 1000,
+            'wait_p95_ms': percentile(95) * 1000,
+            'wait_max_ms': self.wait_max * 1000,
+        }
+
+    def format_stats(self):
+        stats = self.stats()
+        return (f"**📤 Outbound Queue:**\n"
+                f"• Replies queued: {stats['queued']} ({stats['pending']} pending)\n"
+                f"• Messages sent: {stats['sends']} (merged {stats['sent']} replies)\n"
+                f"• Queue wait: avg {stats['wait_avg_ms']:.0f}ms | p50 {stats['wait_p50_ms']:.0f}ms | "
+                f"p95 {stats['wait_p95_ms']:.0f}ms | max {stats['wait_max_ms']:.0f}ms")
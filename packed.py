@@ -0,0 +1,386 @@
+"""Compact binary data file format.
+
+The same data as point_data.json, without the whitespace and the repeated
+"item"/"points" keys:
+
+  header   b'DKPB', format version (u16), reserved (u16)
+  sections tag (4 bytes), payload length (u32), payload; unknown tags are skipped
+
+  STRS  interned string table: count, then length-prefixed UTF-8 strings
+  HIST  point history, per user: name, entry count and packed columns
+        (item string ids, points, flag bytes, then the optional fields)
+  LIFE  lifetime points: (name, value) pairs
+  ATTN  215 attendance: (name, value) pairs
+  REGS  registrations: (Discord id, name) pairs
+  META  everything else (value tables, settings, ...) as compact JSON
+
+All integers are little-endian. Strings are referenced by their index in the
+string table. Files written by an older format version are decoded with that
+version's layout and brought up to date by MIGRATIONS, one version at a time.
+Version 0 is the JSON data file, including dumps from before 215 attendance,
+value tables and the journal; encode() migrates it like any older version.
+
+Usage:
+  python packed.py convert point_data.json point_data.dkp
+  python packed.py export point_data.dkp [point_data.export.json]
+  python packed.py bench [point_data.json] [--users 2000]
+"""
+import json
+import os
+import struct
+import time
+from array import array
+
+MAGIC = b'DKPB'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHH')
+SECTION = struct.Struct('<4sI')
+U32 = struct.Struct('<I')
+PAIR_STRING_I64 = struct.Struct('<Iq')
+PAIR_ID_STRING = struct.Struct('<QI')
+HISTORY_COUNTS = struct.Struct('<IIIIII')
+
+# History entry flags: which optional fields follow
+HAS_VERSION = 1
+HAS_LIFETIME = 2
+HAS_ATTENDS = 4
+HAS_EXTRA = 8
+# The whole entry is stored as JSON (it didn't fit the packed columns)
+RAW_ENTRY = 16
+
+def _migrate_v0(data):
+    """JSON data (any age) -> v1: every section present, registrations keyed by string ids"""
+    data = dict(data)
+    for key in ('individual_scores', 'lifetime_points', 'attendance_215'):
+        data[key] = data.get(key) or {}
+    data['user_registrations'] = {str(discord_id): username
+                                  for discord_id, username in (data.get('user_registrations') or {}).items()}
+    return data
+
+
+# Format version -> function upgrading data decoded with that version's layout to the next
+MIGRATIONS = {0: _migrate_v0}
+
+
+def upgrade(data, version):
+    """Bring data in format `version` up to FORMAT_VERSION"""
+    while version < FORMAT_VERSION:
+        data = MIGRATIONS[version](data)
+        version += 1
+    return data
+
+
+def is_packed(prefix):
+    """True when the first bytes of a file are a packed data file header"""
+    return bytes(prefix[:4]) == MAGIC
+
+
+class StringTable:
+    def __init__(self):
+        self.strings = []
+        self.index = {}
+
+    def intern(self, value):
+        position = self.index.get(value)
+        if position is None:
+            position = len(self.strings)
+            self.strings.append(value)
+            self.index[value] = position
+        return position
+
+    def encode(self):
+        parts = [U32.pack(len(self.strings))]
+        for value in self.strings:
+            raw = value.encode('utf-8')
+            parts.append(U32.pack(len(raw)))
+            parts.append(raw)
+        return b''.join(parts)
+
+
+def _is_int(value):
+    return type(value) is int
+
+
+def _encode_history(strings, history):
+    items = array('I')
+    points = array('q')
+    flags = array('B')
+    versions = array('I')
+    lifetimes = array('q')
+    attends = array('q')
+    extras = array('I')
+    for entry in history:
+        if not (isinstance(entry.get('item'), str) and _is_int(entry.get('points'))
+                and _is_int(entry.get('v', 0)) and entry.get('v', 0) >= 0
+                and _is_int(entry.get('lifetime', 0)) and _is_int(entry.get('attends_215', 0))):
+            items.append(0)
+            points.append(0)
+            flags.append(RAW_ENTRY)
+            extras.append(strings.intern(json.dumps(entry, separators=(',', ':'))))
+            continue
+
+        flag = 0
+        items.append(strings.intern(entry['item']))
+        points.append(entry['points'])
+        if 'v' in entry:
+            flag |= HAS_VERSION
+            versions.append(entry['v'])
+        if 'lifetime' in entry:
+            flag |= HAS_LIFETIME
+            lifetimes.append(entry['lifetime'])
+        if 'attends_215' in entry:
+            flag |= HAS_ATTENDS
+            attends.append(entry['attends_215'])
+        extra = {key: value for key, value in entry.items()
+                 if key not in ('item', 'points', 'v', 'lifetime', 'attends_215')}
+        if extra:
+            flag |= HAS_EXTRA
+            extras.append(strings.intern(json.dumps(extra, separators=(',', ':'))))
+        flags.append(flag)
+
+    counts = HISTORY_COUNTS.pack(len(history), len(versions), len(lifetimes), len(attends), len(extras), 0)
+    return b''.join([counts, items.tobytes(), points.tobytes(), flags.tobytes(),
+                     versions.tobytes(), lifetimes.tobytes(), attends.tobytes(), extras.tobytes()])
+
+
+def encode(data):
+    """Encode a data dict (as produced by PointAssignmentSystem.to_dict, or read from JSON) to bytes"""
+    data = upgrade(data, 0)
+    strings = StringTable()
+
+    history_parts = [U32.pack(len(data.get('individual_scores', {})))]
+    for username, history in data.get('individual_scores', {}).items():
+        history_parts.append(U32.pack(strings.intern(username)))
+        history_parts.append(_encode_history(strings, history))
+
+    def pairs(mapping):
+        parts = [U32.pack(len(mapping))]
+        for username, value in mapping.items():
+            parts.append(PAIR_STRING_I64.pack(strings.intern(username), value))
+        return b''.join(parts)
+
+    lifetime = pairs(data.get('lifetime_points', {}))
+    attendance = pairs(data.get('attendance_215', {}))
+    registration_parts = [U32.pack(len(data.get('user_registrations', {})))]
+    for discord_id, username in data.get('user_registrations', {}).items():
+        registration_parts.append(PAIR_ID_STRING.pack(int(discord_id), strings.intern(username)))
+
+    meta = {key: value for key, value in data.items()
+            if key not in ('individual_scores', 'lifetime_points', 'attendance_215', 'user_registrations')}
+
+    sections = [
+        (b'STRS', strings.encode()),
+        (b'HIST', b''.join(history_parts)),
+        (b'LIFE', lifetime),
+        (b'ATTN', attendance),
+        (b'REGS', b''.join(registration_parts)),
+        (b'META', json.dumps(meta, separators=(',', ':')).encode('utf-8')),
+    ]
+    parts = [HEADER.pack(MAGIC, FORMAT_VERSION, 0)]
+    for tag, payload in sections:
+        parts.append(SECTION.pack(tag, len(payload)))
+        parts.append(payload)
+    return b''.join(parts)
+
+
+def _read_array(typecode, buffer, offset, count):
+    values = array(typecode)
+    end = offset + count * values.itemsize
+    values.frombytes(buffer[offset:end])
+    return values, end
+
+
+def _decode_strings(buffer, offset):
+    (count,) = U32.unpack_from(buffer, offset)
+    offset += U32.size
+    strings = []
+    for _ in range(count):
+        (length,) = U32.unpack_from(buffer, offset)
+        offset += U32.size
+        strings.append(bytes(buffer[offset:offset + length]).decode('utf-8'))
+        offset += length
+    return strings
+
+
+def _decode_history(buffer, offset, strings):
+    count, n_versions, n_lifetimes, n_attends, n_extras, _ = HISTORY_COUNTS.unpack_from(buffer, offset)
+    offset += HISTORY_COUNTS.size
+    items, offset = _read_array('I', buffer, offset, count)
+    points, offset = _read_array('q', buffer, offset, count)
+    flags, offset = _read_array('B', buffer, offset, count)
+    versions, offset = _read_array('I', buffer, offset, n_versions)
+    lifetimes, offset = _read_array('q', buffer, offset, n_lifetimes)
+    attends, offset = _read_array('q', buffer, offset, n_attends)
+    extras, offset = _read_array('I', buffer, offset, n_extras)
+
+    # Fast paths for histories where every entry has the same plain shape
+    if n_versions == count and not (n_lifetimes or n_attends or n_extras):
+        return [{'item': strings[item], 'points': entry_points, 'v': version}
+                for item, entry_points, version in zip(items, points, versions)], offset
+    if not (n_versions or n_lifetimes or n_attends or n_extras):
+        return [{'item': strings[item], 'points': entry_points}
+                for item, entry_points in zip(items, points)], offset
+
+    versions, lifetimes, attends, extras = iter(versions), iter(lifetimes), iter(attends), iter(extras)
+    history = []
+    for item, entry_points, flag in zip(items, points, flags):
+        if flag & RAW_ENTRY:
+            history.append(json.loads(strings[next(extras)]))
+            continue
+        entry = {'item': strings[item], 'points': entry_points}
+        if flag & HAS_VERSION:
+            entry['v'] = next(versions)
+        if flag & HAS_LIFETIME:
+            entry['lifetime'] = next(lifetimes)
+        if flag & HAS_ATTENDS:
+            entry['attends_215'] = next(attends)
+        if flag & HAS_EXTRA:
+            entry.update(json.loads(strings[next(extras)]))
+        history.append(entry)
+    return history, offset
+
+
+def _decode_v1(sections):
+    strings = _decode_strings(sections[b'STRS'], 0)
+    data = json.loads(bytes(sections[b'META']).decode('utf-8'))
+
+    buffer = sections[b'HIST']
+    (count,) = U32.unpack_from(buffer, 0)
+    offset = U32.size
+    individual_scores = {}
+    for _ in range(count):
+        (name,) = U32.unpack_from(buffer, offset)
+        history, offset = _decode_history(buffer, offset + U32.size, strings)
+        individual_scores[strings[name]] = history
+
+    def pairs(buffer):
+        (count,) = U32.unpack_from(buffer, 0)
+        return {strings[name]: value for name, value in PAIR_STRING_I64.iter_unpack(
+            buffer[U32.size:U32.size + count * PAIR_STRING_I64.size])}
+
+    buffer = sections[b'REGS']
+    (count,) = U32.unpack_from(buffer, 0)
+    registrations = {str(discord_id): strings[name] for discord_id, name in PAIR_ID_STRING.iter_unpack(
+        buffer[U32.size:U32.size + count * PAIR_ID_STRING.size])}
+
+    data['individual_scores'] = individual_scores
+    data['user_registrations'] = registrations
+    data['lifetime_points'] = pairs(sections[b'LIFE'])
+    data['attendance_215'] = pairs(sections[b'ATTN'])
+    return data
+
+
+# Format version -> decoder for that version's section layout
+DECODERS = {1: _decode_v1}
+
+
+def decode(buffer):
+    """Decode a packed data file (bytes, memoryview or mmap) to a data dict"""
+    buffer = memoryview(buffer)
+    magic, version, _ = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a packed DKP data file")
+    if version not in DECODERS:
+        raise ValueError(f"Unsupported packed format version {version} (newest known: {FORMAT_VERSION})")
+
+    sections = {}
+    offset = HEADER.size
+    while offset < len(buffer):
+        tag, length = SECTION.unpack_from(buffer, offset)
+        offset += SECTION.size
+        sections[bytes(tag)] = buffer[offset:offset + length]
+        offset += length
+
+    try:
+        data = DECODERS[version](sections)
+    finally:
+        # Release views into the buffer so an mmap can be closed
+        for section in sections.values():
+            section.release()
+        buffer.release()
+
+    return upgrade(data, version)
+
+
+def benchmark(source, users=None, runs=5):
+    """Compare file size and load time of the JSON and packed formats, returns a report string"""
+    import shutil
+    import tempfile
+    from point_system import PointAssignmentSystem
+    from storage import read_data_file, write_data_file
+
+    data = read_data_file(source)
+    if users:
+        # Grow the roster with copies of the existing users
+        templates = list(data['individual_scores'].items())
+        for i in range(len(templates), users):
+            name, history = templates[i % len(templates)]
+            data['individual_scores'][f"{name}_{i}"] = list(history)
+            data['lifetime_points'][f"{name}_{i}"] = data['lifetime_points'].get(name, 0)
+            data['attendance_215'][f"{name}_{i}"] = data['attendance_215'].get(name, 0)
+            data['user_registrations'][str(10 ** 17 + i)] = f"{name}_{i}"
+
+    workdir = tempfile.mkdtemp(prefix='dkp_bench_')
+    try:
+        results = []
+        for filename in ('point_data.json', 'point_data.dkp'):
+            path = os.path.join(workdir, filename)
+            write_data_file(data, path)
+            read_times = []
+            load_times = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                read_data_file(path)
+                read_times.append(time.perf_counter() - start)
+                point_system = PointAssignmentSystem()
+                start = time.perf_counter()
+                point_system.load_data(path)
+                load_times.append(time.perf_counter() - start)
+            results.append((filename, os.path.getsize(path), sorted(read_times)[runs // 2],
+                            sorted(load_times)[runs // 2]))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    entries = sum(len(history) for history in data['individual_scores'].values())
+    report = f"📦 {len(data['individual_scores'])} users, {entries} history entries (median of {runs} runs)\n"
+    for filename, size, read_time, load_time in results:
+        report += (f"• {filename}: {size / 1024:.1f} KB, read {read_time * 1000:.2f}ms, "
+                   f"load_data {load_time * 1000:.2f}ms\n")
+    return report
+
+
+def main():
+    import argparse
+    from storage import read_data_file, write_data_file
+
+    parser = argparse.ArgumentParser(description="Packed DKP data files")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    convert_parser = subparsers.add_parser('convert', help="convert a data file (format picked by extension)")
+    convert_parser.add_argument('source')
+    convert_parser.add_argument('target')
+    export_parser = subparsers.add_parser('export', help="export a packed file as readable JSON")
+    export_parser.add_argument('source')
+    export_parser.add_argument('target', nargs='?')
+    bench_parser = subparsers.add_parser('bench', help="compare JSON and packed size and load time")
+    bench_parser.add_argument('source', nargs='?', default="point_data.json")
+    bench_parser.add_argument('--users', type=int, help="grow the roster to this many users")
+    bench_parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == 'bench':
+        print(benchmark(args.source, args.users, args.runs))
+        return
+
+    data = read_data_file(args.source)
+    if data is None:
+        print(f"❌ {args.source} not found")
+        return
+    target = args.target
+    if args.command == 'export':
+        target = target or os.path.splitext(args.source)[0] + '.export.json'
+    write_data_file(data, target)
+    print(f"✅ Wrote {target} ({os.path.getsize(target)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
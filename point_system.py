@@ -0,0 +1,736 @@
+from contextlib import contextmanager
+from datetime import datetime
+from fuzzy import UsernameIndex
+from history import history_page
+from journal import Journal
+from records import UserRecord
+from snapshot import ReadSnapshot
+from stats import ScoreHistogram
+from storage import read_data_file, write_data_file
+from values import ValueTable
+
+
+# Point Assignment System with 215 Attendance Tracking
+class PointAssignmentSystem:
+    def __init__(self, journal=None):
+        # Published, immutable point value table and every version seen so far
+        self.value_table = None
+        self.value_tables = {}
+        self._values_render = None
+        # One record per username (history, counters, registration), by lowercase name and Discord id
+        self.users = {}
+        self.users_by_id = {}
+        # Histogram of current totals (users with point history), updated as totals change
+        self.score_histogram = ScoreHistogram()
+        # Journal of committed transactions, used for undo (in memory unless a file is given)
+        self.journal = journal or Journal(filename=None)
+        self._tx = None
+        self.last_transaction = None
+        # Journal sequence number already reflected in the loaded snapshot (None = unknown)
+        self.snapshot_seq = None
+        # Trigram index over registered usernames, kept in step with user_registrations
+        self.username_index = UsernameIndex()
+        # Quick-assign fixes near-miss usernames instead of rejecting them
+        self.autocorrect = False
+        self._set_predefined_values()
+        # Immutable view of the last committed state for read commands, and the keys changed since
+        self.snapshot = None
+        self._dirty = self._clean_keys()
+        self._publish_snapshot(full=True)
+
+    def _set_predefined_values(self):
+        """Set the predefined point values for specific numbers (value table version 1)"""
+        point_values = {}
+
+        # Numbers worth 10 points
+        ten_point_numbers = [170, 180, 195, 200, 205]
+        for number in ten_point_numbers:
+            point_values[str(number)] = 10
+
+        # Numbers worth specific points
+        point_values['210'] = 20
+        point_values['215'] = 50
+
+        # Special items worth 50 points
+        point_values['rb'] = 50
+
+        # Items worth 100 points
+        hundred_point_items = ['mord', 'hrung', 'necro', 'aprot']
+        for item in hundred_point_items:
+            point_values[item] = 100
+
+        # Higher value items
+        point_values['prot'] = 400
+        point_values['gele'] = 600
+        point_values['bt'] = 800
+
+        # Items worth 1000 points
+        thousand_point_items = ['dhio', 'voa']
+        for item in thousand_point_items:
+            point_values[item] = 1000
+
+        self._publish_values(ValueTable(1, point_values))
+        print("✅ Predefined point values loaded")
+
+    @property
+    def point_values(self):
+        """Current item -> points mapping, a read-only view of the published value table"""
+        return self.value_table.values
+
+    def _publish_values(self, table):
+        """Swap in a new value table; readers holding the old one keep a consistent view"""
+        self.value_tables[table.version] = table
+        self.value_table = table
+
+
+    def assign_to_individual(self, individual_name, name_or_number):
+        """Assign a name/number to an individual - KEY FUNCTION FOR 215 TRACKING"""
+        if name_or_number not in self.point_values:
+            return f"Error: '{name_or_number}' has no point value assigned"
+
+        # Check if this username belongs to a registered user
+        actual_username = self.username_index.get(individual_name)
+        corrected = False
+        if not actual_username:
+            suggestions = self.username_index.suggest(individual_name)
+            correction = self._autocorrection(individual_name, suggestions)
+            if not correction:
+                error = f"Error: '{individual_name}' is not a registered user. They must use !register first"
+                if suggestions:
+                    error += " - did you mean " + " or ".join(f"**{name}**" for name, _ in suggestions) + "?"
+                return error
+            actual_username = correction
+            corrected = True
+
+        # Find existing score entry or create new one
+        score_key = self._score_key(actual_username)
+        with self.transaction(f"{name_or_number} {score_key}"):
+            points = self._record_assignment(score_key, name_or_number)
+        result = f"'{name_or_number}' ({points} points) assigned to {score_key}"
+        if corrected:
+            result += f" (auto-corrected from '{individual_name}')"
+        return result
+
+    def _autocorrection(self, individual_name, suggestions):
+        """The name to auto-correct to, only when autocorrect is on and one match is clearly best"""
+        if not self.autocorrect or not suggestions:
+            return None
+        best_name, best_distance = suggestions[0]
+        # Allow one typo, two for longer names
+        allowed = 2 if len(individual_name) >= 6 else 1
+        if best_distance > allowed:
+            return None
+        if len(suggestions) > 1 and suggestions[1][1] == best_distance:
+            return None
+        return best_name
+
+    def force_assign(self, individual_name, name_or_number):
+        """Assign a name/number to any username without the registration check"""
+        score_key = self._score_key(individual_name)
+        with self.transaction(f"!force_assign {individual_name} {name_or_number}"):
+            return self._record_assignment(score_key, name_or_number)
+
+    def _record_assignment(self, score_key, name_or_number):
+        """Append an item to a score key and update the derived counters, returns the points"""
+        table = self.value_table
+        points = table.values[name_or_number]
+        self._append_entry(score_key, {
+            'item': name_or_number,
+            'points': points,
+            'v': table.version
+        })
+
+        # Update lifetime points
+        if points > 0:
+            self._apply(['lifetime_add', score_key, points])
+
+        # *** CRITICAL: 215 ATTENDANCE TRACKING ***
+        # This is the main feature for v14
+        if str(name_or_number) == '215':
+            # Increment attendance count
+            self._apply(['attend_add', score_key, 1])
+            print(f"✅ 215 ATTENDANCE: {score_key} now has {self.get_215_attendance(score_key)} total 215 attends")
+
+        return points
+
+    # --- Records ------------------------------------------------------------
+
+    def _record(self, name, create=False):
+        """The record for a username (case-insensitive), created on demand when `create` is set"""
+        record = self.users.get(name.lower())
+        if record is None and create:
+            record = UserRecord(name)
+            self.users[name.lower()] = record
+        return record
+
+    def _discard_if_empty(self, record):
+        if record.is_empty():
+            self.users.pop(record.name.lower(), None)
+
+    def _score_key(self, individual_name):
+        """The canonical spelling of a known username, or the name itself for a new one"""
+        record = self._record(individual_name)
+        return record.name if record else individual_name
+
+    @property
+    def individual_scores(self):
+        """username -> point history, built from the records"""
+        return {r.name: r.history for r in self.users.values() if r.history is not None}
+
+    @property
+    def user_registrations(self):
+        """Discord id -> username, built from the records"""
+        return {discord_id: record.name for discord_id, record in self.users_by_id.items()}
+
+    @property
+    def lifetime_points(self):
+        """username -> lifetime points, built from the records"""
+        return {r.name: r.lifetime for r in self.users.values() if r.lifetime is not None}
+
+    @property
+    def attendance_215(self):
+        """username -> 215 attendance, built from the records"""
+        return {r.name: r.attends_215 for r in self.users.values() if r.attends_215 is not None}
+
+    # --- Transactions -------------------------------------------------------
+    # Every change to the state goes through _apply() as a primitive operation
+    # (see journal.py). Operations are grouped into transactions that are
+    # journaled on commit and can be reverted with undo_transaction().
+    # A transaction holds the journal lock throughout and first applies what
+    # other processes journaled, so its changes land on top of theirs.
+
+    @contextmanager
+    def transaction(self, description=None, actor=None):
+        """Group changes into one journaled, undoable transaction (nested calls join the outer one)"""
+        if self._tx is not None:
+            # An outer transaction opened without a description takes the first inner one
+            if self._tx.description is None:
+                self._tx.description = description
+            yield self._tx
+            return
+
+        # Raises LockTimeout before anything changed if another process holds the lock too long
+        with self.journal.locked():
+            self.sync_journal()
+            self._tx = self.journal.new_transaction(description, actor)
+            try:
+                yield self._tx
+            finally:
+                tx, self._tx = self._tx, None
+                # Partial transactions are journaled too, so they can still be undone
+                if tx.ops:
+                    self._commit(tx)
+
+    def _commit(self, tx):
+        self.journal.append(tx)
+        self.last_transaction = tx
+        self.snapshot_seq = self.journal.last_seq
+        self._publish_snapshot()
+
+    def _apply(self, op, reverse=False):
+        """Apply a primitive operation (or its inverse) and record it in the open transaction"""
+        kind, key = op[0], op[1]
+        if kind == 'values':
+            state = op[2] if reverse else op[3]
+            self._publish_values(ValueTable(self.value_table.version + 1, state['values'], state['retired']))
+        elif kind == 'reg':
+            self._apply_registration(key, op[2] if reverse else op[3])
+        elif kind == 'setting':
+            setattr(self, self.SETTINGS[key], op[2] if reverse else op[3])
+        else:
+            record = self._record(key, create=True)
+            self._dirty['users'].add(record.name.lower())
+            old_score = record.score()
+            if kind in ('append', 'unappend'):
+                entry, created = op[2], op[3]
+                if (kind == 'append') != reverse:
+                    record.append(entry)
+                else:
+                    record.remove(entry, created)
+            elif kind in ('lifetime_add', 'attend_add'):
+                field = 'lifetime' if kind == 'lifetime_add' else 'attends_215'
+                delta = -op[2] if reverse else op[2]
+                value = (getattr(record, field) or 0) + delta
+                # Undoing the first increment removes the counter again
+                setattr(record, field, None if reverse and value == 0 else value)
+            else:
+                value = op[2] if reverse else op[3]
+                if kind == 'history':
+                    # Copy so the recorded operation never aliases the live history
+                    record.set_history(None if value is None else list(value))
+                else:
+                    setattr(record, self.COUNTER_FIELDS[kind], value)
+            if record.score() != old_score:
+                self.score_histogram.move(old_score, record.score())
+            self._discard_if_empty(record)
+
+        if self._tx is not None:
+            self._tx.ops.append(self._inverse(op) if reverse else op)
+
+    # Set operation kind -> UserRecord counter field
+    COUNTER_FIELDS = {'lifetime': 'lifetime', 'attend': 'attends_215'}
+    # Setting name (as saved under 'settings') -> attribute
+    SETTINGS = {'autocorrect': 'autocorrect'}
+
+    def _apply_registration(self, discord_id, username):
+        """Move a Discord id's registration to another username (None = unregister)"""
+        self._dirty['reg'].add(discord_id)
+        old_record = self.users_by_id.pop(discord_id, None)
+        if old_record is not None:
+            self.username_index.remove(old_record.name)
+            old_record.discord_id = None
+            self._dirty['users'].add(old_record.name.lower())
+            self._discard_if_empty(old_record)
+        if username is not None:
+            record = self._record(username, create=True)
+            record.discord_id = discord_id
+            self.users_by_id[discord_id] = record
+            self.username_index.add(record.name)
+            self._dirty['users'].add(record.name.lower())
+
+    def _current(self, kind, key):
+        """The value a set operation of `kind` would replace"""
+        if kind == 'values':
+            return self.value_table.state()
+        if kind == 'reg':
+            record = self.users_by_id.get(key)
+            return record.name if record else None
+        if kind == 'setting':
+            return getattr(self, self.SETTINGS[key])
+        record = self._record(key)
+        if record is None:
+            return None
+        if kind == 'history':
+            return record.history
+        return getattr(record, self.COUNTER_FIELDS[kind])
+
+    def _inverse(self, op):
+        """The operation that undoes `op`, as recorded in an undo transaction"""
+        kind = op[0]
+        if kind in ('append', 'unappend'):
+            return ['unappend' if kind == 'append' else 'append', op[1], op[2], op[3]]
+        if kind in ('lifetime_add', 'attend_add'):
+            return [kind, op[1], -op[2]]
+        return [kind, op[1], op[3], op[2]]
+
+    # Set operation kind -> what it changes, for undo conflict messages
+    SET_DESCRIPTIONS = {'history': "point history", 'lifetime': "lifetime points",
+                        'attend': "215 attendance"}
+
+    def _undo_conflict(self, op):
+        """Why `op` can't be reverted in the current state, or None when it can
+
+        Set operations are only reverted while the value is still what they
+        set it to, so an undo never throws away later changes.
+        """
+        kind, key = op[0], op[1]
+        if kind == 'append':
+            record = self._record(key)
+            if record is None or record.find(op[2]) is None:
+                return f"the '{op[2].get('item')}' entry of {key} is no longer in their history"
+        elif kind == 'unappend':
+            return None
+        elif kind in ('lifetime_add', 'attend_add'):
+            # A counter set lower after the increment would go negative
+            field = 'lifetime' if kind == 'lifetime_add' else 'attend'
+            if (self._current(field, key) or 0) - op[2] < 0:
+                return f"the {self.SET_DESCRIPTIONS[field]} of {key} changed after it"
+        elif self._current(kind, key) != op[3]:
+            if kind == 'values':
+                return "the point values changed after it"
+            if kind == 'reg':
+                return f"the registration of <@{key}> changed after it"
+            if kind == 'setting':
+                return f"the {key} setting changed after it"
+            return f"the {self.SET_DESCRIPTIONS[kind]} of {key} changed after it"
+        elif kind == 'reg' and op[2] is not None:
+            record = self._record(op[2])
+            if record is not None and record.discord_id not in (None, key):
+                return f"'{op[2]}' is now registered to another user"
+        return None
+
+    def _append_entry(self, score_key, entry):
+        record = self._record(score_key)
+        self._apply(['append', score_key, entry, record is None or record.history is None])
+
+    def _set(self, kind, key, value):
+        """Set (or with None, remove) a value through a journaled operation"""
+        old = self._current(kind, key)
+        if old != value:
+            self._apply([kind, key, old, value])
+
+    # --- Read snapshots -----------------------------------------------------
+
+    def _clean_keys(self):
+        """Changed lowercase usernames and Discord ids since the last snapshot"""
+        return {'users': set(), 'reg': set()}
+
+    def _publish_snapshot(self, full=False):
+        """Publish a new read snapshot of the committed state (full rebuilds after a load)"""
+        version = self.snapshot.version + 1 if self.snapshot else 1
+        if full or self.snapshot is None:
+            self.snapshot = ReadSnapshot.build(self, version)
+        else:
+            self.snapshot = self.snapshot.evolve(self, version, self._dirty)
+        self._dirty = self._clean_keys()
+
+    def undo_transaction(self, txid, actor=None):
+        """Revert a journaled transaction, returns the undo transaction or an error string"""
+        # Like transaction(): conflicts are checked against what other processes committed too
+        with self.journal.locked():
+            self.sync_journal()
+            return self._undo(txid, actor)
+
+    def _undo(self, txid, actor):
+        tx = self.journal.get(txid)
+        if tx is None:
+            return f"Error: transaction '{txid}' is not in the undo history"
+        if tx.undo_of:
+            return f"Error: {txid} is itself an undo"
+        if tx.undone:
+            return f"Error: {txid} has already been undone"
+
+        undo_tx = self.journal.new_transaction(f"Undo {txid}: {tx.description}", actor, undo_of=txid)
+        self._tx = undo_tx
+        conflict = None
+        try:
+            for op in reversed(tx.ops):
+                conflict = self._undo_conflict(op)
+                if conflict:
+                    break
+                self._apply(op, reverse=True)
+        finally:
+            self._tx = None
+            if conflict:
+                # Put back what was already reverted; nothing is journaled
+                for op in reversed(undo_tx.ops):
+                    self._apply(op, reverse=True)
+                undo_tx.ops = []
+            if undo_tx.ops:
+                self._commit(undo_tx)
+            else:
+                self._publish_snapshot()
+        if conflict:
+            return f"Error: can't undo {txid}: {conflict}"
+        return undo_tx
+
+    def replay(self, ops, seq=None):
+        """Apply an already journaled transaction's operations (e.g. from another process or a backup)
+
+        Nothing is journaled; callers publish a snapshot once they've replayed a batch.
+        """
+        for op in ops:
+            self._apply(op)
+        if seq is not None:
+            self.snapshot_seq = seq
+
+    def sync_journal(self):
+        """Apply transactions other processes appended to the journal, returns how many"""
+        if self._tx is not None:
+            return 0
+        external = self.journal.read_new()
+        if external:
+            # Already in the undo window; only the state needs catching up
+            for tx in external:
+                self.replay(tx.ops)
+            self.snapshot_seq = self.journal.last_seq
+            self._publish_snapshot()
+        return len(external)
+
+    def load_journal(self):
+        """Load the undo window and replay transactions the snapshot missed, returns (loaded, replayed)"""
+        loaded = self.journal.load()
+        if self.snapshot_seq is not None:
+            self.journal.next_seq = max(self.journal.next_seq, self.snapshot_seq + 1)
+        replayed = 0
+        if self.snapshot_seq is not None:
+            # Transactions journaled after the last save (e.g. a crash before save_data finished)
+            for tx in list(self.journal.transactions.values()):
+                if tx.seq > self.snapshot_seq:
+                    self.replay(tx.ops)
+                    replayed += 1
+        if self.journal.transactions:
+            self.snapshot_seq = max(tx.seq for tx in self.journal.transactions.values())
+        if replayed:
+            self._publish_snapshot()
+        return loaded, replayed
+
+    def register_user(self, discord_user_id, username):
+        """Register a Discord user to a DKP username"""
+        username_lower = username.lower()
+
+        # Check if username is already taken
+        current_username = self.get_username_for_discord_user(discord_user_id)
+        if self.username_index.get(username) and (current_username or '').lower() != username_lower:
+            return f"Error: Username '{username}' is already taken by another user"
+
+        with self.transaction(f"!register {discord_user_id} {username}"):
+            self._set('reg', discord_user_id, username)
+        return f"Successfully registered as '{username}'"
+
+    def get_username_for_discord_user(self, discord_user_id):
+        """Get the registered username for a Discord user ID"""
+        record = self.users_by_id.get(discord_user_id)
+        return record.name if record else None
+
+    def get_individual_total(self, individual_name):
+        """Current points for an individual"""
+        record = self._record(individual_name)
+        return record.total if record else 0
+
+    def get_lifetime_points(self, individual_name):
+        """Get lifetime points for an individual"""
+        record = self._record(individual_name)
+        return (record.lifetime if record else None) or 0
+
+    def get_215_attendance(self, individual_name):
+        """Get 215 attendance count for an individual - KEY FUNCTION"""
+        record = self._record(individual_name)
+        return (record.attends_215 if record else None) or 0
+
+    def counter_checkpoint(self, individual_name):
+        """Current lifetime/215 counters, stored on admin edits so history replays match"""
+        return {
+            'lifetime': self.get_lifetime_points(individual_name),
+            'attends_215': self.get_215_attendance(individual_name)
+        }
+
+    def record_admin_checkpoint(self, individual_name, description):
+        """Record an admin edit of the derived counters as a zero-point history entry"""
+        score_key = self._score_key(individual_name)
+        entry = {'item': description, 'points': 0}
+        entry.update(self.counter_checkpoint(score_key))
+        self._append_entry(score_key, entry)
+
+    def add_points(self, individual_name, points):
+        """Add points as a manual adjustment, returns the new total"""
+        score_key = self._score_key(individual_name)
+        with self.transaction(f"!add_points_to {individual_name} {points}"):
+            self._append_entry(score_key, {
+                'item': f'Admin +{points}',
+                'points': points
+            })
+
+            # Update lifetime points if positive
+            if points > 0:
+                self._apply(['lifetime_add', score_key, points])
+
+        return self.get_individual_total(individual_name)
+
+    def subtract_points(self, individual_name, points):
+        """Subtract points as a manual adjustment, returns the new total"""
+        score_key = self._score_key(individual_name)
+        with self.transaction(f"!subtract_points_from {individual_name} {points}"):
+            self._append_entry(score_key, {
+                'item': f'Admin -{points}',
+                'points': -points
+            })
+        return self.get_individual_total(individual_name)
+
+    def set_points(self, individual_name, total_points):
+        """Clear a user's point history and set a new total, keeping the counter baselines"""
+        score_key = self._score_key(individual_name)
+        entry = {
+            'item': f'Admin set to {total_points}',
+            'points': total_points
+        }
+        entry.update(self.counter_checkpoint(score_key))
+        with self.transaction(f"!set_points_for {individual_name} {total_points}"):
+            self._apply(['history', score_key, self._current('history', score_key), [entry]])
+
+    def set_lifetime(self, individual_name, lifetime_points):
+        """Set a user's lifetime points"""
+        score_key = self._score_key(individual_name)
+        with self.transaction(f"!set_lifetime_for {individual_name} {lifetime_points}"):
+            self._set('lifetime', score_key, lifetime_points)
+            self.record_admin_checkpoint(individual_name, f'Admin lifetime set to {lifetime_points}')
+
+    def add_215_attends(self, individual_name, attends):
+        """Add 215 attendance to a user, returns the new attendance"""
+        score_key = self._score_key(individual_name)
+        with self.transaction(f"!add_215_attend_to {individual_name} {attends}"):
+            self._apply(['attend_add', score_key, attends])
+            self.record_admin_checkpoint(individual_name, f'Admin +{attends} 215 attends')
+        return self.get_215_attendance(score_key)
+
+    def subtract_215_attends(self, individual_name, attends):
+        """Subtract 215 attendance from a user (never below zero), returns the new attendance"""
+        score_key = self._score_key(individual_name)
+        new_attends = max(0, self.get_215_attendance(score_key) - attends)
+        with self.transaction(f"!subtract_215_attend_from {individual_name} {attends}"):
+            self._set('attend', score_key, new_attends)
+            self.record_admin_checkpoint(individual_name, f'Admin -{attends} 215 attends')
+        return new_attends
+
+    def set_215_attends(self, individual_name, attends):
+        """Set 215 attendance for a user"""
+        score_key = self._score_key(individual_name)
+        with self.transaction(f"!set_215_attend_for {individual_name} {attends}"):
+            self._set('attend', score_key, attends)
+            self.record_admin_checkpoint(individual_name, f'Admin 215 attends set to {attends}')
+
+    def unregister_user(self, discord_user_id):
+        """Remove a Discord user's registration, returns the old username or None"""
+        old_username = self.get_username_for_discord_user(discord_user_id)
+        if old_username:
+            with self.transaction(f"!unregister_user {discord_user_id}"):
+                self._set('reg', discord_user_id, None)
+        return old_username
+
+    def delete_username(self, username):
+        """Delete a registered username and all of its data, returns the actual username or None"""
+        record = self._record(username)
+        if record is None or record.discord_id is None:
+            return None
+
+        # Remove the registration, point history, lifetime points and 215 attendance
+        actual_username = record.name
+        with self.transaction(f"!delete_username {actual_username}"):
+            self._set('reg', record.discord_id, None)
+            for kind in ('history', 'lifetime', 'attend'):
+                self._set(kind, actual_username, None)
+
+        return actual_username
+
+    def set_item_value(self, item, points):
+        """Add or revalue an item by publishing a new value table version"""
+        new_table = self.value_table.with_value(item, points)
+        with self.transaction(f"!set_item_value {item} {points}"):
+            self._apply(['values', None, self.value_table.state(), new_table.state()])
+        return self.value_table
+
+    def retire_item(self, item):
+        """Retire an item by publishing a new value table version without it"""
+        new_table = self.value_table.without_item(item)
+        with self.transaction(f"!retire_item {item}"):
+            self._apply(['values', None, self.value_table.state(), new_table.state()])
+        return self.value_table
+
+    def set_autocorrect(self, enabled):
+        """Turn quick-assign username auto-correct on or off"""
+        with self.transaction(f"!autocorrect {'on' if enabled else 'off'}"):
+            self._set('setting', 'autocorrect', enabled)
+
+    def apply_repair(self, repaired):
+        """Apply a verify repair (see verify.repair_state) as one undoable transaction"""
+        with self.transaction("!verify repair"):
+            for key, history in repaired.get('individual_scores', {}).items():
+                current = self._current('history', key) or []
+                # Repairs only ever append checkpoint entries
+                for entry in history[len(current):]:
+                    self._append_entry(key, entry)
+            for kind, mapping, new_mapping in (
+                    ('lifetime', self.lifetime_points, repaired.get('lifetime_points', {})),
+                    ('attend', self.attendance_215, repaired.get('attendance_215', {}))):
+                for key in mapping:
+                    if key not in new_mapping:
+                        self._set(kind, key, None)
+                for key, value in new_mapping.items():
+                    self._set(kind, key, value)
+
+    def get_individual_summary(self, individual_name):
+        """Get detailed summary for an individual - INCLUDES 215 ATTENDANCE"""
+        return self.snapshot.get_individual_summary(individual_name)
+
+    def get_history_page(self, individual_name, item=None, page=1, cursor=None):
+        """A page of a user's point history (see history.py), None when they have no history"""
+        # Reads the live record: commands run between transactions, so it is never half-applied
+        record = self._record(individual_name)
+        if record is None or record.history is None:
+            return None
+        return history_page(record, item, page, cursor)
+
+    def get_all_scores(self):
+        """Get scores for all individuals"""
+        return self.snapshot.get_all_scores()
+
+    def get_215_leaderboard(self):
+        """Get 215 attendance leaderboard - NEW FEATURE"""
+        return self.snapshot.get_215_leaderboard()
+
+    def get_point_values(self):
+        """Get all available point values (rendered once per value table version)"""
+        table = self.value_table
+        if self._values_render and self._values_render[0] is table:
+            return self._values_render[1]
+
+        if not table.values:
+            result = "No point values have been set"
+        else:
+            result = f"**Available Point Values (v{table.version}):**\n" + table.format_by_points()
+
+        self._values_render = (table, result)
+        return result
+
+    def to_dict(self):
+        """Build the on-disk representation of the current state"""
+        return {
+            'point_values': dict(self.point_values),
+            'value_table': {
+                'version': self.value_table.version,
+                'retired': sorted(self.value_table.retired),
+                'history': {str(version): dict(table.values) for version, table in self.value_tables.items()}
+            },
+            'individual_scores': self.individual_scores,
+            'user_registrations': self.user_registrations,
+            'lifetime_points': self.lifetime_points,
+            'attendance_215': self.attendance_215,  # This saves the 215 attendance
+            'journal_seq': self.snapshot_seq,
+            'settings': {'autocorrect': self.autocorrect},
+            'last_updated': datetime.now().isoformat()
+        }
+
+    def from_dict(self, data):
+        """Replace the current state with a loaded on-disk representation"""
+        # Saved values are merged over the predefined table, minus anything retired since
+        saved_table = data.get('value_table', {})
+        values = dict(self.value_tables[1].values)
+        values.update(data.get('point_values', {}))
+        retired = saved_table.get('retired', [])
+        for item in retired:
+            values.pop(item, None)
+        self.value_tables = {int(version): ValueTable(int(version), history_values)
+                             for version, history_values in saved_table.get('history', {}).items()}
+        self.value_tables.setdefault(1, ValueTable(1, values))
+        self._publish_values(ValueTable(saved_table.get('version', 1), values, retired))
+        # Records are created history first, so the first spelling seen becomes the canonical one
+        self.users = {}
+        self.users_by_id = {}
+        for username, history in data.get('individual_scores', {}).items():
+            record = self._record(username, create=True)
+            record.set_history((record.history or []) + history)
+        for username, lifetime in data.get('lifetime_points', {}).items():
+            record = self._record(username, create=True)
+            record.lifetime = (record.lifetime or 0) + lifetime
+        for username, attends in data.get('attendance_215', {}).items():  # Load 215 attendance
+            record = self._record(username, create=True)
+            record.attends_215 = (record.attends_215 or 0) + attends
+        for discord_id, username in data.get('user_registrations', {}).items():
+            record = self._record(username, create=True)
+            record.discord_id = int(discord_id)
+            self.users_by_id[int(discord_id)] = record
+        self.snapshot_seq = data.get('journal_seq')
+        self.autocorrect = data.get('settings', {}).get('autocorrect', False)
+        self.username_index.rebuild(record.name for record in self.users_by_id.values())
+        self.score_histogram.rebuild(record.total for record in self.users.values() if record.history is not None)
+        self._publish_snapshot(full=True)
+
+    def save_data(self, filename="point_data.json"):
+        """Save current data to file - INCLUDES 215 ATTENDANCE"""
+        # Catch up with other processes first, so the file never drops their changes
+        with self.journal.locked():
+            self.sync_journal()
+            write_data_file(self.to_dict(), filename)
+
+    def load_data(self, filename="point_data.json"):
+        """Load data from file - INCLUDES 215 ATTENDANCE"""
+        try:
+            data = read_data_file(filename)
+            if data is None:
+                return False
+            self.from_dict(data)
+            return True
+        except Exception as e:
+            print(f"Error loading data: {e}")
+            return False
+
@@ -0,0 +1,97 @@
+"""Per-user state.
+
+Everything known about one username lives in a single UserRecord. Point
+history, counters and the Discord registration were previously kept in four
+dicts keyed by possibly differently cased names. PointAssignmentSystem keeps
+each record in two maps: by lowercase name and by Discord id.
+
+None means "absent" for history and the counters, so a saved file still
+round-trips to exactly the same individual_scores, lifetime_points and
+attendance_215 keys.
+
+Each record can also index its history by item (built on first use, then
+kept up to date on append) for paging through long histories. Appends never
+move existing entries; anything that does (an undo, a replaced history)
+gives the record a new generation number, which invalidates old cursors.
+"""
+import itertools
+import time
+
+# Shared by all records, so a deleted and recreated user never repeats a generation.
+# Seeded from the clock (in microseconds) so a restarted bot doesn't hand out
+# the generations of the previous process, and old cursors stay rejected.
+_generations = itertools.count(time.time_ns() // 1000)
+
+
+class UserRecord:
+    __slots__ = ('name', 'discord_id', 'history', 'total', 'lifetime', 'attends_215',
+                 'item_index', 'generation')
+
+    def __init__(self, name):
+        # Canonical spelling, used as the key in saved data and journal operations
+        self.name = name
+        self.discord_id = None
+        self.history = None
+        # Sum of history points, kept up to date on every change
+        self.total = 0
+        self.lifetime = None
+        self.attends_215 = None
+        # item -> history positions, oldest first (None until first needed)
+        self.item_index = None
+        self.generation = next(_generations)
+
+    def is_empty(self):
+        """True when nothing is left worth keeping"""
+        return (self.history is None and self.lifetime is None
+                and self.attends_215 is None and self.discord_id is None)
+
+    def score(self):
+        """Current total, or None without point history (not ranked)"""
+        return self.total if self.history is not None else None
+
+    def set_history(self, history):
+        self.history = history
+        self.total = sum(item['points'] for item in history) if history else 0
+        self._positions_changed()
+
+    def append(self, entry):
+        if self.history is None:
+            self.history = []
+        if self.item_index is not None:
+            self.item_index.setdefault(entry['item'], []).append(len(self.history))
+        self.history.append(entry)
+        self.total += entry['points']
+
+    def find(self, entry):
+        """Position of the latest entry equal to `entry`, or None
+
+        Searches from the end: later appends are the only thing that can
+        shift the entry, so undoing a recent append costs O(entries since).
+        """
+        history = self.history or []
+        for i in range(len(history) - 1, -1, -1):
+            if history[i] == entry:
+                return i
+        return None
+
+    def remove(self, entry, created):
+        """Remove the latest entry equal to `entry` (dropping an emptied history if it `created` it)"""
+        position = self.find(entry)
+        if position is not None:
+            del self.history[position]
+            self.total -= entry['points']
+            self._positions_changed()
+        if created and not self.history:
+            self.history = None
+
+    def _positions_changed(self):
+        self.item_index = None
+        self.generation = next(_generations)
+
+    def positions(self, item):
+        """History positions of an item's entries, oldest first"""
+        if self.item_index is None:
+            self.item_index = {}
+            for position, entry in enumerate(self.history or []):
+                self.item_index.setdefault(entry.get('item'), []).append(position)
+        return self.item_index.get(item, [])
@@ -0,0 +1,128 @@
+"""Leaderboards rendered as a single file attachment.
+
+A long leaderboard as text takes several 1900-character messages, each one
+rate limited. Rendered as one PNG table (or CSV) it goes out in a single
+upload. PNG output needs Pillow (in requirements.txt); without it, PNG
+requests fall back to CSV.
+
+Rendering works on plain row tuples, so it can run in a worker process.
+LeaderboardRenderer caches the result per snapshot of the data each board
+is drawn from, so repeated requests between changes cost nothing.
+"""
+import asyncio
+import csv
+import io
+from concurrent.futures import ProcessPoolExecutor
+
+FORMATS = ('png', 'csv')
+# board -> (file name, title, column headers)
+BOARDS = {
+    'points': ('leaderboard', "Leaderboard (Current Points)", ('Rank', 'Name', 'Points')),
+    '215': ('215_leaderboard', "215 Attendance Leaderboard", ('Rank', 'Name', '215 Attends')),
+    'values': ('values', "Point Values", ('Item', 'Points')),
+}
+
+# PNG layout, in pixels
+ROW_HEIGHT = 18
+CELL_PADDING = 8
+CHAR_WIDTH = 7
+
+
+def board_rows(snapshot, board):
+    """Rows for a board, drawn from a read snapshot"""
+    if board == 'values':
+        return sorted(snapshot.value_table.values.items(), key=lambda item: (item[1], item[0]))
+    if board == '215':
+        scores = [(view.name, view.attends_215) for view in snapshot.users.values() if view.attends_215 is not None]
+    else:
+        scores = [(view.name, view.total) for view in snapshot.users.values() if view.total is not None]
+    scores.sort(key=lambda x: x[1], reverse=True)
+    return [(rank, name, score) for rank, (name, score) in enumerate(scores, 1)]
+
+
+def board_source(snapshot, board):
+    """The snapshot part a board is drawn from; unchanged identity means the render is still valid"""
+    return snapshot.value_table if board == 'values' else snapshot.users
+
+
+def render_csv(headers, rows):
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(headers)
+    writer.writerows(rows)
+    return output.getvalue().encode('utf-8')
+
+
+def render_png(title, headers, rows):
+    """Draw a table as a PNG, raises ImportError without Pillow"""
+    from PIL import Image, ImageDraw, ImageFont
+
+    font = ImageFont.load_default()
+    cells = [[str(value) for value in row] for row in rows]
+    widths = [max([len(header)] + [len(row[i]) for row in cells]) * CHAR_WIDTH + 2 * CELL_PADDING
+              for i, header in enumerate(headers)]
+    width = max(sum(widths), len(title) * CHAR_WIDTH + 2 * CELL_PADDING)
+    height = (len(cells) + 2) * ROW_HEIGHT
+
+    image = Image.new('RGB', (width, height), (47, 49, 54))
+    draw = ImageDraw.Draw(image)
+    draw.text((CELL_PADDING, 3), title, fill=(255, 255, 255), font=font)
+    for row_index, row in enumerate([list(headers)] + cells, 1):
+        top = row_index * ROW_HEIGHT
+        if row_index == 1:
+            draw.rectangle((0, top, width, top + ROW_HEIGHT), fill=(88, 101, 242))
+        elif row_index % 2:
+            draw.rectangle((0, top, width, top + ROW_HEIGHT), fill=(54, 57, 63))
+        left = 0
+        for column, value in enumerate(row):
+            draw.text((left + CELL_PADDING, top + 3), value, fill=(220, 221, 222), font=font)
+            left += widths[column]
+
+    output = io.BytesIO()
+    image.save(output, format='PNG')
+    return output.getvalue()
+
+
+def render_table(title, headers, rows, fmt):
+    """Render rows as (format used, bytes); PNG falls back to CSV when Pillow is missing"""
+    if fmt == 'png':
+        try:
+            return 'png', render_png(title, headers, rows)
+        except ImportError:
+            pass
+    return 'csv', render_csv(headers, rows)
+
+
+class LeaderboardRenderer:
+    def __init__(self, workers=1):
+        self.workers = workers
+        self.pool = None
+        # (board, format) -> (source, format used, data)
+        self.cache = {}
+
+    def _executor(self):
+        # Created on first use so commands that never render don't start a process
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self.pool
+
+    async def render(self, snapshot, board, fmt):
+        """Render a board from a snapshot, returns (filename, data, format used)"""
+        source = board_source(snapshot, board)
+        cached = self.cache.get((board, fmt))
+        if cached is None or cached[0] is not source:
+            _, title, headers = BOARDS[board]
+            rows = board_rows(snapshot, board)
+            loop = asyncio.get_running_loop()
+            # CSV is cheap enough for a thread; drawing a PNG is CPU-bound, so it gets a process
+            executor = self._executor() if fmt == 'png' else None
+            used, data = await loop.run_in_executor(executor, render_table, title, headers, rows, fmt)
+            cached = (source, used, data)
+            self.cache[(board, fmt)] = cached
+        _, used, data = cached
+        return f"{BOARDS[board][0]}.{used}", data, used
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False)
+            self.pool = None
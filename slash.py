@@ -0,0 +1,280 @@
+"""Slash command equivalents of the prefix commands.
+
+Quick commands answer straight away. Heavy ones (user lookups, verify,
+exports, backups) defer with a "thinking" response, run as a background job
+and edit the placeholder with progress until the result is ready. Jobs are
+limited per guild (per user in DMs) and can be listed with /jobs and
+cancelled with /cancel.
+"""
+from typing import Optional
+
+import discord
+from discord import app_commands
+
+from discord_context import SlashContext
+from engine import LOCK_BUSY
+from locking import LockTimeout
+
+
+def job_scope(interaction):
+    """Who shares a job limit: the guild, or the user in DMs (where guild_id is None)"""
+    if interaction.guild_id is not None:
+        return interaction.guild_id
+    return ('dm', interaction.user.id)
+
+
+def register_slash_commands(bot, engine, jobs):
+    """Add the slash commands to the bot's command tree (sync the tree afterwards)"""
+    tree = bot.tree
+
+    async def run(interaction, handler, *args):
+        ctx = SlashContext(bot, interaction)
+        try:
+            async with engine.locked(handler.__name__):
+                await handler(ctx, *args)
+        except LockTimeout:
+            await ctx.send(LOCK_BUSY)
+
+    async def run_job(interaction, name, handler, *args):
+        ctx = SlashContext(bot, interaction)
+
+        async def body():
+            await ctx.defer()
+            try:
+                async with engine.locked(handler.__name__):
+                    await handler(ctx, *args)
+            except LockTimeout:
+                await ctx.send(LOCK_BUSY)
+
+        async def cancelled():
+            await ctx.send(f"🛑 {name} was cancelled")
+
+        job = jobs.start(job_scope(interaction), name, interaction.user.id, body, on_cancel=cancelled)
+        if job is None:
+            running = jobs.running(job_scope(interaction))[0]
+            await interaction.response.send_message(
+                f"⏳ `{running.job_id}` {running.name} is still running here. "
+                f"Wait for it or use `/cancel`.", ephemeral=True)
+
+    # --- Quick assignment and user commands ---------------------------------
+
+    @tree.command(name='assign', description="Assign an item to users, e.g. item 215, usernames 'anarch, batman'")
+    async def assign(interaction: discord.Interaction, item: str, usernames: str):
+        await run(interaction, engine.assign, item, usernames)
+
+    @tree.command(name='register', description="Register yourself with a DKP username")
+    async def register_user(interaction: discord.Interaction, username: str):
+        await run(interaction, engine.register_user, username)
+
+    @tree.command(name='whoami', description="Check what username you're registered as")
+    async def whoami(interaction: discord.Interaction):
+        await run(interaction, engine.whoami)
+
+    @tree.command(name='points', description="Show points and 215 attendance for a member or yourself")
+    async def show_points(interaction: discord.Interaction, member: Optional[discord.Member] = None):
+        await run(interaction, engine.show_points, member)
+
+    @tree.command(name='leaderboard', description="Show the points leaderboard (png/csv for a file)")
+    async def show_leaderboard(interaction: discord.Interaction, fmt: Optional[str] = None):
+        if fmt:
+            await run_job(interaction, "Leaderboard export", engine.show_leaderboard, fmt)
+        else:
+            await run(interaction, engine.show_leaderboard)
+
+    @tree.command(name='215leaderboard', description="Show the 215 attendance leaderboard (png/csv for a file)")
+    async def show_215_leaderboard(interaction: discord.Interaction, fmt: Optional[str] = None):
+        if fmt:
+            await run_job(interaction, "215 leaderboard export", engine.show_215_leaderboard, fmt)
+        else:
+            await run(interaction, engine.show_215_leaderboard)
+
+    @tree.command(name='stats', description="Show the score distribution and a user's percentile")
+    async def show_stats(interaction: discord.Interaction, username: Optional[str] = None):
+        await run(interaction, engine.show_stats, 'distribution', username)
+
+    @tree.command(name='history', description="Show point history, newest first, optionally for one item")
+    async def show_history(interaction: discord.Interaction, member: Optional[discord.Member] = None,
+                           username: Optional[str] = None, item: Optional[str] = None,
+                           page: Optional[str] = None):
+        words = [f"<@{member.id}>" if member else username, item, page]
+        await run(interaction, engine.show_history, *[word for word in words if word])
+
+    @tree.command(name='values', description="Show all available point values (png/csv for a file)")
+    async def show_values(interaction: discord.Interaction, fmt: Optional[str] = None):
+        if fmt:
+            await run_job(interaction, "Values export", engine.show_values, fmt)
+        else:
+            await run(interaction, engine.show_values)
+
+    @tree.command(name='help_dkp', description="Show help for DKP commands")
+    async def help_dkp(interaction: discord.Interaction):
+        await run(interaction, engine.help_dkp)
+
+    # --- Admin: user management ---------------------------------------------
+
+    @tree.command(name='admin_register', description="Register another user")
+    @app_commands.default_permissions(administrator=True)
+    async def admin_register_user(interaction: discord.Interaction, member: discord.Member, username: str):
+        await run(interaction, engine.admin_register_user, member, username)
+
+    @tree.command(name='registered_users', description="List all registered users")
+    @app_commands.default_permissions(administrator=True)
+    async def list_registered_users(interaction: discord.Interaction):
+        await run_job(interaction, "Registered users", engine.list_registered_users)
+
+    @tree.command(name='unregister_user', description="Unregister a user")
+    @app_commands.default_permissions(administrator=True)
+    async def unregister_user(interaction: discord.Interaction, member: discord.Member):
+        await run(interaction, engine.unregister_user, member)
+
+    @tree.command(name='delete_username', description="Delete a username and all of its data")
+    @app_commands.default_permissions(administrator=True)
+    async def delete_username(interaction: discord.Interaction, username: str):
+        await run(interaction, engine.delete_username, username)
+
+    @tree.command(name='force_assign', description="Assign an item to any username")
+    @app_commands.default_permissions(administrator=True)
+    async def force_assign(interaction: discord.Interaction, username: str, item: str):
+        await run(interaction, engine.force_assign, username, item)
+
+    # --- Admin: points --------------------------------------------------------
+
+    @tree.command(name='add_points', description="Add points to a Discord member")
+    @app_commands.default_permissions(administrator=True)
+    async def add_points(interaction: discord.Interaction, member: discord.Member, points: int):
+        await run(interaction, engine.add_points, member, points)
+
+    @tree.command(name='subtract_points', description="Subtract points from a Discord member")
+    @app_commands.default_permissions(administrator=True)
+    async def subtract_points(interaction: discord.Interaction, member: discord.Member, points: int):
+        await run(interaction, engine.subtract_points, member, points)
+
+    @tree.command(name='set_points', description="Set a Discord member's total points")
+    @app_commands.default_permissions(administrator=True)
+    async def set_points(interaction: discord.Interaction, member: discord.Member, total_points: int):
+        await run(interaction, engine.set_points, member, total_points)
+
+    @tree.command(name='add_points_to', description="Add points to any username")
+    @app_commands.default_permissions(administrator=True)
+    async def add_points_to(interaction: discord.Interaction, username: str, points: int):
+        await run(interaction, engine.add_points_to, username, points)
+
+    @tree.command(name='subtract_points_from', description="Subtract points from any username")
+    @app_commands.default_permissions(administrator=True)
+    async def subtract_points_from(interaction: discord.Interaction, username: str, points: int):
+        await run(interaction, engine.subtract_points_from, username, points)
+
+    @tree.command(name='set_points_for', description="Set total points for any username")
+    @app_commands.default_permissions(administrator=True)
+    async def set_points_for(interaction: discord.Interaction, username: str, total_points: int):
+        await run(interaction, engine.set_points_for, username, total_points)
+
+    @tree.command(name='set_lifetime', description="Set a Discord member's lifetime points")
+    @app_commands.default_permissions(administrator=True)
+    async def set_lifetime(interaction: discord.Interaction, member: discord.Member, lifetime_points: int):
+        await run(interaction, engine.set_lifetime, member, lifetime_points)
+
+    @tree.command(name='set_lifetime_for', description="Set lifetime points for any username")
+    @app_commands.default_permissions(administrator=True)
+    async def set_lifetime_for(interaction: discord.Interaction, username: str, lifetime_points: int):
+        await run(interaction, engine.set_lifetime_for, username, lifetime_points)
+
+    # --- Admin: 215 attendance ------------------------------------------------
+
+    @tree.command(name='add_215_attend', description="Add 215 attends to a Discord member")
+    @app_commands.default_permissions(administrator=True)
+    async def add_215_attend(interaction: discord.Interaction, member: discord.Member, attends: int):
+        await run(interaction, engine.add_215_attend, member, attends)
+
+    @tree.command(name='subtract_215_attend', description="Subtract 215 attends from a Discord member")
+    @app_commands.default_permissions(administrator=True)
+    async def subtract_215_attend(interaction: discord.Interaction, member: discord.Member, attends: int):
+        await run(interaction, engine.subtract_215_attend, member, attends)
+
+    @tree.command(name='set_215_attend', description="Set a Discord member's 215 attendance")
+    @app_commands.default_permissions(administrator=True)
+    async def set_215_attend(interaction: discord.Interaction, member: discord.Member, attends: int):
+        await run(interaction, engine.set_215_attend, member, attends)
+
+    @tree.command(name='add_215_attend_to', description="Add 215 attends to any username")
+    @app_commands.default_permissions(administrator=True)
+    async def add_215_attend_to(interaction: discord.Interaction, username: str, attends: int):
+        await run(interaction, engine.add_215_attend_to, username, attends)
+
+    @tree.command(name='subtract_215_attend_from', description="Subtract 215 attends from any username")
+    @app_commands.default_permissions(administrator=True)
+    async def subtract_215_attend_from(interaction: discord.Interaction, username: str, attends: int):
+        await run(interaction, engine.subtract_215_attend_from, username, attends)
+
+    @tree.command(name='set_215_attend_for', description="Set 215 attendance for any username")
+    @app_commands.default_permissions(administrator=True)
+    async def set_215_attend_for(interaction: discord.Interaction, username: str, attends: int):
+        await run(interaction, engine.set_215_attend_for, username, attends)
+
+    # --- Admin: values, history and maintenance -------------------------------
+
+    @tree.command(name='add_item', description="Add a new item and its point value")
+    @app_commands.default_permissions(administrator=True)
+    async def add_item(interaction: discord.Interaction, item: str, points: int):
+        await run(interaction, engine.add_item, item, points)
+
+    @tree.command(name='revalue_item', description="Change an item's point value")
+    @app_commands.default_permissions(administrator=True)
+    async def revalue_item(interaction: discord.Interaction, item: str, points: int):
+        await run(interaction, engine.revalue_item, item, points)
+
+    @tree.command(name='retire_item', description="Stop accepting an item (history is kept)")
+    @app_commands.default_permissions(administrator=True)
+    async def retire_item(interaction: discord.Interaction, item: str):
+        await run(interaction, engine.retire_item, item)
+
+    @tree.command(name='undo', description="Undo the last change, the last N changes or a transaction id")
+    @app_commands.default_permissions(administrator=True)
+    async def undo(interaction: discord.Interaction, target: Optional[str] = None):
+        await run(interaction, engine.undo, target)
+
+    @tree.command(name='transactions', description="List recent transactions")
+    @app_commands.default_permissions(administrator=True)
+    async def transactions(interaction: discord.Interaction, count: int = 10):
+        await run(interaction, engine.transactions, count)
+
+    @tree.command(name='autocorrect', description="Turn auto-correction of near-miss usernames on or off")
+    @app_commands.default_permissions(administrator=True)
+    async def autocorrect(interaction: discord.Interaction, setting: Optional[str] = None):
+        await run(interaction, engine.autocorrect, setting)
+
+    @tree.command(name='verify', description="Check counters against point history (mode: repair or adopt)")
+    @app_commands.default_permissions(administrator=True)
+    async def verify(interaction: discord.Interaction, mode: Optional[str] = None):
+        await run_job(interaction, "Verify", engine.verify, mode)
+
+    @tree.command(name='backup_now', description="Take an incremental backup now")
+    @app_commands.default_permissions(administrator=True)
+    async def backup_now(interaction: discord.Interaction):
+        await run_job(interaction, "Backup", engine.backup_now)
+
+    @tree.command(name='backups', description="List backups")
+    @app_commands.default_permissions(administrator=True)
+    async def list_backups(interaction: discord.Interaction):
+        await run(interaction, engine.list_backups)
+
+    @tree.command(name='outbound_stats', description="Show reply queue wait times")
+    @app_commands.default_permissions(administrator=True)
+    async def outbound_stats(interaction: discord.Interaction):
+        await run(interaction, engine.outbound_stats)
+
+    # --- Jobs -------------------------------------------------------------------
+
+    @tree.command(name='jobs', description="List long-running commands in progress")
+    async def list_jobs(interaction: discord.Interaction):
+        await interaction.response.send_message(jobs.format_jobs(job_scope(interaction)), ephemeral=True)
+
+    @tree.command(name='cancel', description="Cancel a long-running command (all of them without a job id)")
+    @app_commands.default_permissions(administrator=True)
+    async def cancel(interaction: discord.Interaction, job_id: Optional[str] = None):
+        cancelled = jobs.cancel(job_scope(interaction), job_id)
+        if cancelled:
+            names = ", ".join(f"`{job.job_id}` {job.name}" for job in cancelled)
+            await interaction.response.send_message(f"🛑 Cancelling {names}")
+        else:
+            await interaction.response.send_message("❌ No matching job is running", ephemeral=True)
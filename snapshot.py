@@ -0,0 +1,132 @@
+"""Copy-on-write read snapshots.
+
+PointAssignmentSystem publishes a new ReadSnapshot after every committed
+transaction. A snapshot is never modified: read commands grab the current
+one and keep using it across awaits (or hand it to a worker thread) while
+quick-assigns carry on against the live state, so a reader never sees half
+of a batch.
+
+Publishing copies the previous snapshot's maps and refreezes only the users
+the transaction touched, so it costs O(users + changed users) rather than a
+walk over every history.
+"""
+from collections import namedtuple
+from types import MappingProxyType
+
+# Frozen per-user view; total is None for users without point history
+UserView = namedtuple('UserView', ['name', 'total', 'lifetime', 'attends_215'])
+
+
+def _frozen(mapping):
+    return mapping if isinstance(mapping, MappingProxyType) else MappingProxyType(mapping)
+
+
+def _view(record):
+    return UserView(record.name, record.score(), record.lifetime, record.attends_215)
+
+
+class ReadSnapshot:
+    __slots__ = ('version', 'value_table', 'users', 'registrations', 'distribution',
+                 '_leaderboard', '_leaderboard_215')
+
+    def __init__(self, version, value_table, users, registrations, distribution):
+        self.version = version
+        self.value_table = value_table
+        # lowercase username -> UserView, in the same order as the live records
+        self.users = _frozen(users)
+        # Discord id -> username
+        self.registrations = _frozen(registrations)
+        # Frozen copy of the score histogram (see stats.py)
+        self.distribution = distribution
+        # Rendered leaderboards, built on first use
+        self._leaderboard = None
+        self._leaderboard_215 = None
+
+    @classmethod
+    def build(cls, point_system, version):
+        """A snapshot of the full live state"""
+        users = {name_lower: _view(record) for name_lower, record in point_system.users.items()}
+        return cls(version, point_system.value_table, users, point_system.user_registrations,
+                   point_system.score_histogram.copy())
+
+    def evolve(self, point_system, version, dirty):
+        """The next snapshot, refreezing only the users and registrations in `dirty`"""
+        users = self.users
+        distribution = self.distribution
+        if dirty['users']:
+            users = dict(users)
+            distribution = point_system.score_histogram.copy()
+            for name_lower in dirty['users']:
+                record = point_system.users.get(name_lower)
+                if record is None:
+                    users.pop(name_lower, None)
+                else:
+                    users[name_lower] = _view(record)
+        registrations = self.registrations
+        if dirty['reg']:
+            registrations = dict(registrations)
+            for discord_id in dirty['reg']:
+                username = point_system.get_username_for_discord_user(discord_id)
+                if username is None:
+                    registrations.pop(discord_id, None)
+                else:
+                    registrations[discord_id] = username
+
+        # Maps without dirty keys are shared with the previous snapshot
+        snapshot = ReadSnapshot(version, point_system.value_table, users, registrations, distribution)
+        if users is self.users:
+            snapshot._leaderboard = self._leaderboard
+            snapshot._leaderboard_215 = self._leaderboard_215
+        return snapshot
+
+    def get_individual_total(self, name):
+        view = self.users.get(name.lower())
+        return (view.total if view else None) or 0
+
+    def get_lifetime_points(self, name):
+        view = self.users.get(name.lower())
+        return (view.lifetime if view else None) or 0
+
+    def get_215_attendance(self, name):
+        view = self.users.get(name.lower())
+        return (view.attends_215 if view else None) or 0
+
+    def get_individual_summary(self, name):
+        """Summary line for a user - INCLUDES 215 ATTENDANCE"""
+        view = self.users.get(name.lower())
+        if view is None or view.total is None:
+            return f"{name} has no assignments"
+
+        summary = f"**{view.name}:** {view.total} points (Lifetime: {view.lifetime or 0})"
+        summary += f"\n🎯 **215 Attends: {view.attends_215 or 0}**"
+        return summary
+
+    def get_all_scores(self):
+        """Points leaderboard, rendered once per snapshot"""
+        if self._leaderboard is None:
+            totals = [(view.name, view.total) for view in self.users.values() if view.total is not None]
+            if not totals:
+                self._leaderboard = "No individuals have been assigned any items"
+            else:
+                scores = "**Leaderboard (Current Points):**\n"
+                for individual, total in sorted(totals, key=lambda x: x[1], reverse=True):
+                    scores += f"• {individual}: {total} points\n"
+                self._leaderboard = scores
+        return self._leaderboard
+
+    def get_215_leaderboard(self):
+        """215 attendance leaderboard, rendered once per snapshot"""
+        if self._leaderboard_215 is None:
+            attendance = [(view.name, view.attends_215) for view in self.users.values()
+                          if view.attends_215 is not None]
+            if not attendance:
+                self._leaderboard_215 = ("**🎯 215 Attendance Leaderboard:**\n\nNo 215 attendance recorded yet.\n"
+                                         "Use `215 username` to start tracking!")
+            else:
+                leaderboard = "**🎯 215 Attendance Leaderboard:**\n\n"
+                sorted_users = sorted(attendance, key=lambda x: x[1], reverse=True)
+                for i, (username, attendance) in enumerate(sorted_users, 1):
+                    medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"**{i}.**"
+                    leaderboard += f"{medal} **{username}** - {attendance} attends\n"
+                self._leaderboard_215 = leaderboard
+        return self._leaderboard_215
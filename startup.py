@@ -0,0 +1,67 @@
+"""Startup timing.
+
+main.py imports this first and reports how long each startup phase took:
+imports, reading the data file, building the in-memory indexes (records,
+username index, histogram, snapshot, journal replay) and the gateway
+connection. State loading runs in a thread during the gateway handshake, so
+the two overlap; the report shows both and the total time to ready.
+
+Set DKP_PROFILE_STARTUP=1 to also print a cProfile summary of state loading.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+# Imported before anything heavy, so this is close to process start
+STARTED = time.perf_counter()
+
+PROFILE = bool(os.getenv("DKP_PROFILE_STARTUP"))
+
+
+class StartupTimer:
+    def __init__(self, started=STARTED):
+        self.started = started
+        # (phase, start offset, duration) in seconds, in the order phases finished
+        self.phases = []
+        # Set by main() just before connecting
+        self.login_started = None
+
+    def record(self, name, start, end=None):
+        end = time.perf_counter() if end is None else end
+        self.phases.append((name, start - self.started, end - start))
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start)
+
+    def report(self):
+        total = time.perf_counter() - self.started
+        result = f"⏱️ Ready {total:.2f}s after start:\n"
+        for name, offset, duration in sorted(self.phases, key=lambda phase: phase[1]):
+            result += f"   {name:<16} {duration * 1000:8.1f}ms  (from +{offset:.2f}s)\n"
+        return result.rstrip('\n')
+
+
+@contextmanager
+def profiled(label):
+    """Print the top functions of the block when DKP_PROFILE_STARTUP is set"""
+    if not PROFILE:
+        yield
+        return
+    import cProfile
+    import io
+    import pstats
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        output = io.StringIO()
+        pstats.Stats(profile, stream=output).sort_stats('cumulative').print_stats(15)
+        print(f"🔬 Profile of {label}:\n{output.getvalue()}")
@@ -0,0 +1,161 @@
+"""Incrementally maintained score distribution.
+
+PointAssignmentSystem moves a user between histogram buckets whenever their
+current total changes, and keeps the running sum and count alongside. Median,
+percentiles and a user's percentile rank are then answered from the bucket
+counts (interpolating linearly inside a bucket) without sorting the roster.
+The lowest and highest scores are tracked exactly (with lazily pruned heaps,
+so a change at either end costs O(log n)), and interpolation in the end
+buckets is clamped to them, so a small roster doesn't report a median or rank
+outside the scores anyone actually has.
+"""
+import heapq
+
+# Width of a histogram bucket in points
+BUCKET_WIDTH = 50
+
+
+class ScoreHistogram:
+    __slots__ = ('width', 'buckets', 'total', 'count', 'scores', 'low', 'high', '_lows', '_highs')
+
+    def __init__(self, width=BUCKET_WIDTH):
+        self.width = width
+        # bucket index (total // width) -> number of users
+        self.buckets = {}
+        self.total = 0
+        self.count = 0
+        # score -> number of users, to keep the lowest and highest score exact
+        self.scores = {}
+        self.low = None
+        self.high = None
+        # Distinct scores as a min-heap and negated as a max-heap; may hold scores nobody has any more
+        self._lows = []
+        self._highs = []
+
+    def copy(self):
+        """A read-only copy for snapshots: O(buckets), without the per-score counts"""
+        histogram = ScoreHistogram(self.width)
+        histogram.buckets = dict(self.buckets)
+        histogram.total = self.total
+        histogram.count = self.count
+        histogram.scores = None
+        histogram.low = self.low
+        histogram.high = self.high
+        return histogram
+
+    def add(self, score):
+        bucket = score // self.width
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.total += score
+        self.count += 1
+        users = self.scores.get(score, 0)
+        self.scores[score] = users + 1
+        if not users:
+            heapq.heappush(self._lows, score)
+            heapq.heappush(self._highs, -score)
+            if len(self._lows) > 2 * len(self.scores) + 16:
+                self._rebuild_heaps()
+        if self.low is None or score < self.low:
+            self.low = score
+        if self.high is None or score > self.high:
+            self.high = score
+
+    def remove(self, score):
+        bucket = score // self.width
+        self.buckets[bucket] -= 1
+        if not self.buckets[bucket]:
+            del self.buckets[bucket]
+        self.total -= score
+        self.count -= 1
+        self.scores[score] -= 1
+        if not self.scores[score]:
+            del self.scores[score]
+            # The last user at an extreme left: drop scores nobody has from the heap top
+            if score == self.low:
+                while self._lows and self._lows[0] not in self.scores:
+                    heapq.heappop(self._lows)
+                self.low = self._lows[0] if self._lows else None
+            if score == self.high:
+                while self._highs and -self._highs[0] not in self.scores:
+                    heapq.heappop(self._highs)
+                self.high = -self._highs[0] if self._highs else None
+
+    def _rebuild_heaps(self):
+        """Drop stale scores, so the heaps stay within a constant factor of the distinct scores"""
+        self._lows = list(self.scores)
+        heapq.heapify(self._lows)
+        self._highs = [-score for score in self.scores]
+        heapq.heapify(self._highs)
+
+    def move(self, old, new):
+        """Update for a score change; None means the user has no score (no point history)"""
+        # Add first, so a leader moving further ahead is never the last one at the old extreme
+        if new is not None:
+            self.add(new)
+        if old is not None:
+            self.remove(old)
+
+    def rebuild(self, scores):
+        self.buckets = {}
+        self.total = 0
+        self.count = 0
+        self.scores = {}
+        self.low = None
+        self.high = None
+        self._lows = []
+        self._highs = []
+        for score in scores:
+            self.add(score)
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def _bounds(self, bucket):
+        """Lowest and highest score a bucket can hold, clamped to the observed scores"""
+        return (max(bucket * self.width, self.low),
+                min((bucket + 1) * self.width - 1, self.high))
+
+    def percentile(self, p):
+        """Estimated score at percentile p (0-100)"""
+        if not self.count:
+            return 0
+        target = p / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            in_bucket = self.buckets[bucket]
+            if seen + in_bucket >= target:
+                lower, upper = self._bounds(bucket)
+                return lower + (target - seen) / in_bucket * (upper - lower)
+            seen += in_bucket
+        return self.high
+
+    def percentile_of(self, score):
+        """Estimated share of users (0-100) scoring below `score`"""
+        if not self.count or score <= self.low:
+            return 0
+        if score > self.high:
+            return 100
+        score_bucket = score // self.width
+        below = sum(count for bucket, count in self.buckets.items() if bucket < score_bucket)
+        if score_bucket in self.buckets:
+            lower, upper = self._bounds(score_bucket)
+            below += self.buckets[score_bucket] * (score - lower) / (upper - lower + 1)
+        return 100 * below / self.count
+
+    def format(self, name=None, score=None):
+        """Distribution summary, optionally with one user's rank"""
+        if not self.count:
+            return "No individuals have been assigned any items"
+
+        result = f"**📊 Score Distribution ({self.count} players):**\n"
+        result += f"• Total outstanding: **{self.total}** points\n"
+        result += f"• Mean: {self.mean():.0f} | Median: ~{self.percentile(50):.0f}\n"
+        result += (f"• 25th: ~{self.percentile(25):.0f} | 75th: ~{self.percentile(75):.0f} | "
+                   f"90th: ~{self.percentile(90):.0f}\n")
+        if name is not None:
+            if score is None:
+                result += f"\n{name} has no assignments"
+            else:
+                result += f"\n**{name}:** {score} points - ~{self.percentile_of(score):.0f}th percentile"
+        result += f"\n*Estimated from {self.width}-point buckets*"
+        return result
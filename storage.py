@@ -0,0 +1,37 @@
+import json
+import mmap
+import os
+
+import packed
+
+# Data files with this extension are written in the packed binary format
+PACKED_EXTENSION = '.dkp'
+
+
+def write_data_file(data, filename="point_data.json"):
+    """Write state to disk atomically so a crash never leaves a half-written file"""
+    tmp_filename = f"{filename}.tmp"
+    if filename.endswith(PACKED_EXTENSION):
+        with open(tmp_filename, 'wb') as f:
+            f.write(packed.encode(data))
+            f.flush()
+            os.fsync(f.fileno())
+    else:
+        with open(tmp_filename, 'w') as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+    os.replace(tmp_filename, filename)
+
+
+def read_data_file(filename="point_data.json"):
+    """Read state from disk (JSON or packed, by content), returns None when the file does not exist"""
+    if not os.path.exists(filename):
+        return None
+    with open(filename, 'rb') as f:
+        if packed.is_packed(f.read(4)):
+            # Packed files are decoded straight from the page cache
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return packed.decode(mapped)
+        f.seek(0)
+        return json.load(f)
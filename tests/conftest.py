@@ -0,0 +1,50 @@
+import os
+import sys
+
+import pytest
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from journal import Journal  # noqa: E402
+from point_system import PointAssignmentSystem  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def work_dir(tmp_path, monkeypatch):
+    """Run every test in its own directory, so nothing touches the real data files"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def new_system(journal_file="point_journal.jsonl", **journal_options):
+    return PointAssignmentSystem(journal=Journal(journal_file, **journal_options))
+
+
+def state(point_system):
+    """The saved state, without fields that change on every save"""
+    data = point_system.to_dict()
+    data.pop('last_updated')
+    data.pop('journal_seq')
+    return data
+
+
+@pytest.fixture
+def system():
+    """A point system with a journal file and two registered users"""
+    point_system = new_system()
+    point_system.register_user(1, "anarch")
+    point_system.register_user(2, "batman")
+    return point_system
+
+
+class Context:
+    """Minimal command context (see engine.py) that collects replies"""
+
+    def __init__(self, author_id=1, is_admin=True):
+        self.author_id = author_id
+        self.is_admin = is_admin
+        self.replies = []
+
+    async def send(self, content=None, embed=None, file=None):
+        self.replies.append(content if content is not None else embed)
@@ -0,0 +1,64 @@
+import pytest
+
+from backup import BackupStore
+
+from conftest import state
+
+
+def timed(point_system, timestamp, change, *args):
+    """Run a change as a transaction journaled at `timestamp`"""
+    with point_system.transaction() as tx:
+        tx.timestamp = timestamp
+        change(*args)
+
+
+def test_point_in_time_restore(system):
+    store = BackupStore("backups")
+    timed(system, "2026-01-01T10:00:00", system.assign_to_individual, "anarch", "215")
+    store.backup(system.to_dict(), "point_journal.jsonl", timestamp="2026-01-01T11:00:00")
+
+    timed(system, "2026-01-01T12:00:00", system.add_points, "anarch", 40)
+    at_noon = state(system)
+    timed(system, "2026-01-01T13:00:00", system.set_points, "batman", 900)
+    store.backup(system.to_dict(), "point_journal.jsonl", timestamp="2026-01-01T14:00:00")
+    timed(system, "2026-01-01T15:00:00", system.unregister_user, 1)
+
+    # Replayed from the second backup's journal segment
+    data, base, replayed = store.restore("2026-01-01T12:30:00", "point_journal.jsonl")
+    assert base['timestamp'].startswith("2026-01-01T11:00:00")
+    assert replayed == 1
+    restored = type(system)()
+    restored.from_dict(data)
+    assert state(restored) == at_noon
+
+    # Replayed from the live journal after the last backup
+    data, base, replayed = store.restore("2026-01-01T16:00:00", "point_journal.jsonl")
+    assert replayed == 1
+    restored.from_dict(data)
+    assert state(restored) == state(system)
+
+
+def test_restore_before_the_first_backup_fails():
+    store = BackupStore("backups")
+    store.backup({'individual_scores': {}}, timestamp="2026-01-01T11:00:00")
+    with pytest.raises(ValueError):
+        store.restore("2026-01-01T10:00:00")
+
+
+def test_imported_dump_takes_the_seq_of_the_preceding_backup():
+    store = BackupStore("backups")
+    store.backup({'individual_scores': {}, 'journal_seq': 5}, timestamp="2026-01-02T00:00:00")
+
+    older = store.backup({'individual_scores': {}}, timestamp="2025-07-20T03:47:34")
+    newer = store.backup({'individual_scores': {}}, timestamp="2026-02-01T00:00:00")
+
+    assert older['journal_seq'] == 0
+    assert newer['journal_seq'] == 0
+
+
+def test_import_reports_missing_files(monkeypatch, capsys):
+    import backup
+    monkeypatch.setattr('sys.argv', ['backup.py', 'import', 'missing.json'])
+    backup.main()
+    assert "missing.json not found" in capsys.readouterr().out
+    assert BackupStore().manifests() == []
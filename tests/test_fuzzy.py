@@ -0,0 +1,54 @@
+from fuzzy import UsernameIndex, edit_distance
+
+
+def test_edit_distance_counts_a_swap_as_one_typo():
+    assert edit_distance("batman", "btaman") == 1
+    assert edit_distance("batman", "batmn") == 1
+    assert edit_distance("batman", "robin", limit=2) == 3
+
+
+def test_suggestions_are_ranked_by_distance():
+    index = UsernameIndex()
+    index.rebuild(["Batman", "Batgirl", "Robin"])
+
+    assert index.suggest("batmn") == [("Batman", 1)]
+    assert index.suggest("zzzz") == []
+
+
+def test_removed_names_are_not_suggested():
+    index = UsernameIndex()
+    index.rebuild(["Batman", "Robin"])
+    index.remove("batman")
+
+    assert index.get("BATMAN") is None
+    assert index.suggest("batmn") == []
+    assert all("batman" not in names for names in index.postings.values())
+
+
+def test_failed_assign_suggests_registered_names(system):
+    result = system.assign_to_individual("batmn", "215")
+
+    assert result.startswith("Error:") and "did you mean **batman**?" in result
+    assert system.get_215_attendance("batman") == 0
+
+
+def test_unregistered_names_drop_out_of_suggestions(system):
+    system.unregister_user(2)
+
+    assert "did you mean" not in system.assign_to_individual("batmn", "215")
+
+
+def test_autocorrect_assigns_a_clear_best_match(system):
+    system.set_autocorrect(True)
+
+    result = system.assign_to_individual("batmn", "215")
+
+    assert "auto-corrected from 'batmn'" in result
+    assert system.get_215_attendance("batman") == 1
+
+
+def test_autocorrect_skips_ties(system):
+    system.register_user(3, "batmen")
+    system.set_autocorrect(True)
+
+    assert system.assign_to_individual("batmon", "215").startswith("Error:")
@@ -0,0 +1,69 @@
+import asyncio
+
+import records
+from engine import CommandEngine
+from history import PAGE_SIZE, history_page, parse_cursor
+
+from conftest import Context
+
+
+def fill(system, count):
+    with system.transaction("fill"):
+        for i in range(count):
+            system.assign_to_individual("anarch", "215" if i % 2 else "210")
+
+
+def record(system):
+    return system._record("anarch")
+
+
+def test_pages_run_newest_first(system):
+    fill(system, 40)
+    page = history_page(record(system), page=1)
+
+    assert page.total == 40
+    assert [position for position, _ in page.entries] == list(range(39, 39 - PAGE_SIZE, -1))
+    assert history_page(record(system), page=3).entries[-1][0] == 0
+
+
+def test_cursor_survives_appends(system):
+    fill(system, 40)
+    first = history_page(record(system), page=1)
+    fill(system, 5)
+
+    following = history_page(record(system), cursor=parse_cursor(first.next_cursor))
+    assert following.entries[0][0] == first.entries[-1][0] - 1
+
+
+def test_cursor_from_before_an_undo_is_rejected(system):
+    fill(system, 40)
+    cursor = parse_cursor(history_page(record(system), page=1).next_cursor)
+    system.undo_transaction(system.last_transaction.txid)
+    fill(system, 40)
+
+    try:
+        history_page(record(system), cursor=cursor)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("stale cursor accepted")
+
+
+def test_item_filter(system):
+    fill(system, 40)
+    page = history_page(record(system), item="215", page=1)
+
+    assert page.total == 20
+    assert all(entry['item'] == "215" for _, entry in page.entries)
+
+
+def test_generations_do_not_restart_with_the_process():
+    # Seeded from the clock, so a new process never reuses the low numbers of the previous one
+    assert records.UserRecord("x").generation > 10 ** 15
+
+
+def test_out_of_range_page_is_rejected(system):
+    fill(system, 20)
+    ctx = Context()
+    asyncio.run(CommandEngine(system, data_file=None).show_history(ctx, "anarch", "99"))
+    assert ctx.replies == ["❌ anarch only has 2 pages of history"]
@@ -0,0 +1,41 @@
+from idempotency import IdempotencyCache, message_key
+from journal import Journal
+from point_system import PointAssignmentSystem
+
+
+def test_keyed_transactions_outlive_the_undo_window():
+    journal = Journal("point_journal.jsonl", max_undo=3)
+    point_system = PointAssignmentSystem(journal=journal)
+    point_system.register_user(1, "anarch")
+    for i in range(10):
+        with point_system.transaction(f"215 anarch #{i}") as tx:
+            tx.key = f"message{i}"
+            point_system.assign_to_individual("anarch", "215")
+    journal.compact()
+
+    reloaded = Journal("point_journal.jsonl", max_undo=3)
+    reloaded.load()
+    assert len(reloaded.transactions) == 3
+    assert list(reloaded.keyed) == [f"message{i}" for i in range(10)]
+
+
+def test_redelivered_message_is_recognised():
+    cache = IdempotencyCache(max_entries=2, ttl=60)
+    key = message_key(1, "215 anarch, batman")
+    assert cache.get(key) is None
+    cache.add(key, "t1", applied_at=1000)
+
+    assert cache.get(key, now=1030) == "t1"
+    # An edited message is a different key
+    assert cache.get(message_key(1, "215 anarch"), now=1030) is None
+    # Expired after the ttl
+    assert cache.get(key, now=1061) is None
+
+
+def test_cache_evicts_least_recently_used():
+    cache = IdempotencyCache(max_entries=2, ttl=60)
+    cache.add("a", "t1", applied_at=1000)
+    cache.add("b", "t2", applied_at=1000)
+    cache.get("a", now=1001)
+    cache.add("c", "t3", applied_at=1000)
+    assert list(cache.entries) == ["a", "c"]
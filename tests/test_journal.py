@@ -0,0 +1,39 @@
+from conftest import new_system, state
+
+
+def make_changes(point_system):
+    point_system.assign_to_individual("anarch", "215")
+    point_system.assign_to_individual("batman", "215")
+    point_system.add_points("anarch", 40)
+    point_system.subtract_points("batman", 10)
+    point_system.set_points("batman", 700)
+    point_system.set_lifetime("anarch", 3000)
+    point_system.add_215_attends("batman", 2)
+    point_system.set_item_value("newboss", 75)
+    point_system.assign_to_individual("anarch", "newboss")
+    point_system.undo_transaction(point_system.journal.recent(3)[2].txid)
+    point_system.unregister_user(2)
+    point_system.set_autocorrect(True)
+
+
+def test_journal_replay_matches_live_state(system):
+    system.save_data("point_data.json")
+    make_changes(system)
+
+    # The saved file predates every change, so all of them come from the journal
+    replayed = new_system()
+    replayed.load_data("point_data.json")
+    loaded, count = replayed.load_journal()
+
+    assert count > 0
+    assert state(replayed) == state(system)
+
+
+def test_load_skips_transactions_already_in_the_data_file(system):
+    make_changes(system)
+    system.save_data("point_data.json")
+
+    reloaded = new_system()
+    reloaded.load_data("point_data.json")
+    assert reloaded.load_journal()[1] == 0
+    assert state(reloaded) == state(system)
@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from engine import CommandEngine
+from locking import FileLock, LockTimeout
+
+from conftest import Context, new_system, state
+
+
+def test_other_process_changes_are_applied_first(system):
+    system.save_data("point_data.json")
+    other = new_system()
+    other.load_data("point_data.json")
+    other.load_journal()
+    system.set_points("anarch", 100)
+
+    # The other process hasn't synced yet; its change still lands on top of the set
+    other.add_points("anarch", 50)
+    assert other.get_individual_total("anarch") == 150
+
+    system.sync_journal()
+    assert state(system) == state(other)
+    assert [tx.seq for tx in system.journal.recent()] == [tx.seq for tx in other.journal.recent()]
+
+
+def test_lock_timeout_changes_nothing(system):
+    before = state(system)
+    holder = FileLock("point_journal.jsonl.lock")
+    holder.acquire()
+    try:
+        system.journal.lock.timeout = 0.1
+        with pytest.raises(LockTimeout):
+            system.add_points("anarch", 50)
+    finally:
+        holder.release()
+
+    assert state(system) == before
+    system.add_points("anarch", 50)
+    assert system.get_individual_total("anarch") == 50
+
+
+def test_async_acquire_keeps_the_event_loop_running():
+    lock = FileLock("point_journal.jsonl.lock")
+    holder = FileLock("point_journal.jsonl.lock")
+    holder.acquire()
+
+    async def scenario():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        task = asyncio.get_running_loop().create_task(ticker())
+        with pytest.raises(LockTimeout):
+            await lock.acquire_async(timeout=0.2)
+        asyncio.get_running_loop().call_later(0.1, holder.release)
+        await lock.acquire_async(timeout=2)
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(scenario()) >= 10
+    assert lock.depth == 1 and lock.fd is not None
+    lock.release()
+    assert lock.fd is None
+
+
+def test_quick_assign_waits_for_the_lock_without_blocking(system):
+    engine = CommandEngine(system, data_file=None, lock_timeout=0.1)
+    holder = FileLock("point_journal.jsonl.lock")
+    holder.acquire()
+    try:
+        with pytest.raises(LockTimeout):
+            asyncio.run(engine.handle_message(Context(), "215 anarch"))
+    finally:
+        holder.release()
+    assert system.get_215_attendance("anarch") == 0
+
+    assert asyncio.run(engine.handle_message(Context(), "215 anarch"))
+    assert system.get_215_attendance("anarch") == 1
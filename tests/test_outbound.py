@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+from outbound import OutboundDispatcher, RateBucket
+
+
+class Channel:
+    def __init__(self, channel_id=1):
+        self.id = channel_id
+        self.sent = []
+
+    async def send(self, content=None, embed=None, file=None):
+        self.sent.append((content, embed, file))
+        return len(self.sent)
+
+
+def test_rate_bucket_waits_for_the_window():
+    bucket = RateBucket(2, 5.0)
+    bucket.acquire(0.0)
+    bucket.acquire(1.0)
+
+    assert bucket.delay(2.0) == 3.0
+    assert bucket.delay(5.0) == 0.0
+
+
+def test_adjacent_replies_are_merged():
+    channel = Channel()
+
+    async def main():
+        dispatcher = OutboundDispatcher()
+        futures = [dispatcher.send(channel, f"reply {i}") for i in range(5)]
+        await dispatcher.flush()
+        return dispatcher, [future.result() for future in futures]
+
+    dispatcher, results = asyncio.run(main())
+
+    assert channel.sent == [("reply 0\nreply 1\nreply 2\nreply 3\nreply 4", None, None)]
+    assert results == [1] * 5
+    assert dispatcher.stats()['sends'] == 1 and dispatcher.stats()['sent'] == 5
+
+
+def test_embeds_and_long_replies_are_not_merged():
+    channel = Channel()
+
+    async def main():
+        dispatcher = OutboundDispatcher(max_length=10)
+        dispatcher.send(channel, "first")
+        dispatcher.send(channel, "a")
+        dispatcher.send(channel, embed="embed")
+        dispatcher.send(channel, "b")
+        dispatcher.send(channel, "c" * 10)
+        await dispatcher.flush()
+
+    asyncio.run(main())
+
+    assert channel.sent == [("first\na", None, None), (None, "embed", None),
+                            ("b", None, None), ("c" * 10, None, None)]
+
+
+def test_channel_rate_limit_is_respected():
+    channel = Channel()
+
+    async def main():
+        dispatcher = OutboundDispatcher(channel_rate=2, channel_period=0.2)
+        dispatcher.send(channel, embed=1)
+        dispatcher.send(channel, embed=2)
+        dispatcher.send(channel, embed=3)
+        started = time.monotonic()
+        await dispatcher.flush()
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(main())
+
+    assert len(channel.sent) == 3
+    assert elapsed >= 0.15
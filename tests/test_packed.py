@@ -0,0 +1,91 @@
+import json
+import os
+
+import packed
+from point_system import PointAssignmentSystem
+from storage import read_data_file, write_data_file
+
+from conftest import state
+
+REPO_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "point_data.json")
+
+
+def test_repository_data_round_trips():
+    data = read_data_file(REPO_DATA)
+    assert packed.decode(packed.encode(data)) == data
+
+
+def test_packed_file_round_trips(system):
+    system.assign_to_individual("anarch", "215")
+    system.add_points("batman", 25)
+    system.set_lifetime("batman", 900)
+    system.unregister_user(2)
+    # As saved to JSON: Discord ids become string keys
+    data = json.loads(json.dumps(system.to_dict()))
+
+    write_data_file(data, "point_data.dkp")
+
+    with open("point_data.dkp", 'rb') as f:
+        assert packed.is_packed(f.read(4))
+    assert read_data_file("point_data.dkp") == data
+
+
+def test_packed_and_json_load_the_same_state(system):
+    system.assign_to_individual("anarch", "215")
+    system.set_points("batman", 500)
+    system.save_data("point_data.json")
+    system.save_data("point_data.dkp")
+
+    from_json = type(system)()
+    from_json.load_data("point_data.json")
+    from_packed = type(system)()
+    from_packed.load_data("point_data.dkp")
+    assert state(from_packed) == state(from_json) == state(system)
+
+
+def test_irregular_history_entries_round_trip():
+    data = {
+        'point_values': {'215': 50},
+        'individual_scores': {
+            'anarch': [{'item': '215', 'points': 50},
+                       {'item': 'Admin set to 10', 'points': 10, 'lifetime': 7, 'attends_215': 1},
+                       {'item': 'odd', 'points': 1.5, 'note': 'extra field'}],
+            'empty': [],
+        },
+        'user_registrations': {'123456789012345678': 'anarch'},
+        'lifetime_points': {'anarch': 57},
+        'attendance_215': {'anarch': 1},
+        'last_updated': '2025-07-20T03:47:34',
+    }
+    assert packed.decode(packed.encode(data)) == data
+
+
+LEGACY_DUMP = os.path.join(os.path.dirname(REPO_DATA), "point_backup_20250720_034734.json")
+
+
+def test_legacy_json_is_migrated_on_packing():
+    # A dump from before 215 attendance, value tables and the journal (format version 0)
+    with open(LEGACY_DUMP) as f:
+        legacy = json.load(f)
+    assert 'attendance_215' not in legacy
+
+    decoded = packed.decode(packed.encode(legacy))
+
+    assert decoded == packed.upgrade(legacy, 0)
+    assert decoded['attendance_215'] == {}
+
+
+def test_migrated_legacy_dump_loads_the_same_state():
+    with open(LEGACY_DUMP) as f:
+        legacy = json.load(f)
+    from_json = PointAssignmentSystem()
+    from_json.from_dict(legacy)
+    from_packed = PointAssignmentSystem()
+    from_packed.from_dict(packed.decode(packed.encode(legacy)))
+
+    assert state(from_packed) == state(from_json)
+
+
+def test_current_data_is_unchanged_by_the_migration(system):
+    data = json.loads(json.dumps(system.to_dict()))
+    assert packed.upgrade(data, 0) == data
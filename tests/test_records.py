@@ -0,0 +1,61 @@
+import json
+
+from records import UserRecord
+
+from conftest import new_system, state
+
+
+def test_record_keeps_its_total_up_to_date():
+    record = UserRecord("Anarch")
+    record.append({'item': '215', 'points': 50})
+    record.append({'item': 'dragon', 'points': 100})
+    record.append({'item': '215', 'points': 50})
+
+    assert record.score() == 200
+    assert record.positions('215') == [0, 2]
+
+    # The latest matching entry goes
+    record.remove({'item': '215', 'points': 50}, created=False)
+    assert record.score() == 150
+    assert record.positions('215') == [0]
+    assert record.positions('dragon') == [1]
+
+
+def test_removing_the_created_history_leaves_no_score():
+    record = UserRecord("Anarch")
+    record.append({'item': '215', 'points': 50})
+    record.remove({'item': '215', 'points': 50}, created=True)
+
+    assert record.history is None and record.score() is None
+    assert record.is_empty()
+
+
+def test_lookups_ignore_case_and_keep_the_saved_spelling(system):
+    system.force_assign("Robin", "215")
+
+    assert system.get_individual_total("ROBIN") == 50
+    assert system.get_215_attendance("robin") == 1
+    assert list(system.individual_scores) == ["Robin"]
+    assert system.attendance_215 == {"Robin": 1}
+
+
+def test_emptied_records_are_discarded(system):
+    system.unregister_user(2)
+
+    assert "batman" not in system.users
+    assert system.user_registrations == {1: "anarch"}
+
+
+def test_saved_data_round_trips(system):
+    system.assign_to_individual("anarch", "215")
+    system.set_lifetime("batman", 900)
+    system.save_data("point_data.json")
+
+    loaded = new_system()
+    loaded.load_data("point_data.json")
+
+    assert state(loaded) == state(system)
+    with open("point_data.json") as f:
+        saved = json.load(f)
+    assert saved['individual_scores'].keys() == {"anarch", "batman"}
+    assert saved['lifetime_points'] == {"anarch": 50, "batman": 900}
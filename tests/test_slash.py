@@ -0,0 +1,85 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from engine import CommandEngine, LOCK_BUSY
+from jobs import JobManager
+from locking import FileLock
+
+from conftest import Context
+
+
+def assign(system, item, usernames):
+    ctx = Context()
+    asyncio.run(CommandEngine(system, data_file=None).assign(ctx, item, usernames))
+    return ctx.replies
+
+
+def test_assign(system):
+    assert "assigned to anarch" in assign(system, "215", "anarch, batman")[0]
+    assert system.get_215_attendance("batman") == 1
+
+
+def test_assign_reports_unknown_items_and_missing_usernames(system):
+    assert "has no point value" in assign(system, "nope", "anarch")[0]
+    assert "at least one username" in assign(system, "215", " , ")[0]
+    assert system.get_215_attendance("anarch") == 0
+
+
+def test_slash_commands_answer_when_the_lock_is_busy(system, monkeypatch):
+    discord = pytest.importorskip("discord")
+    from discord.ext import commands
+    import slash
+
+    bot = commands.Bot(command_prefix='!', intents=discord.Intents.default())
+    engine = CommandEngine(system, data_file=None, lock_timeout=0.05)
+    slash.register_slash_commands(bot, engine, JobManager())
+    replies = []
+
+    class FakeSlashContext(Context):
+        def __init__(self, bot, interaction):
+            super().__init__()
+            self.replies = replies
+
+    monkeypatch.setattr(slash, 'SlashContext', FakeSlashContext)
+    holder = FileLock("point_journal.jsonl.lock")
+    holder.acquire()
+    try:
+        callback = bot.tree.get_command('assign').callback
+        asyncio.run(callback(None, "215", "anarch"))
+    finally:
+        holder.release()
+
+    assert replies == [LOCK_BUSY]
+    assert system.get_215_attendance("anarch") == 0
+
+
+def test_jobs_are_limited_per_scope():
+    async def scenario():
+        jobs = JobManager(per_guild=1)
+        started = asyncio.Event()
+
+        async def body():
+            started.set()
+            await asyncio.sleep(10)
+
+        first = jobs.start(('dm', 1), "Verify", 1, body)
+        assert jobs.start(('dm', 1), "Verify", 1, body) is None
+        other = jobs.start(('dm', 2), "Verify", 2, body)
+        assert other is not None
+        await started.wait()
+        assert [job.job_id for job in jobs.cancel(('dm', 1))] == [first.job_id]
+        jobs.cancel(('dm', 2))
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+
+
+def test_job_scope_keys_dms_by_user():
+    pytest.importorskip("discord")
+    from slash import job_scope
+
+    assert job_scope(SimpleNamespace(guild_id=5, user=SimpleNamespace(id=1))) == 5
+    assert job_scope(SimpleNamespace(guild_id=None, user=SimpleNamespace(id=1))) == ('dm', 1)
+    assert job_scope(SimpleNamespace(guild_id=None, user=SimpleNamespace(id=2))) != ('dm', 1)
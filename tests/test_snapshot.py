@@ -0,0 +1,50 @@
+def test_snapshot_is_unaffected_by_later_writes(system):
+    system.assign_to_individual("anarch", "215")
+    snapshot = system.snapshot
+    board = snapshot.get_all_scores()
+
+    system.add_points("anarch", 40)
+    system.unregister_user(2)
+
+    assert snapshot.get_individual_total("anarch") == 50
+    assert snapshot.registrations[2] == "batman"
+    assert snapshot.get_all_scores() is board
+    assert system.snapshot.get_individual_total("anarch") == 90
+    assert 2 not in system.snapshot.registrations
+
+
+def test_snapshot_matches_the_live_state(system):
+    system.assign_to_individual("anarch", "215")
+    system.add_points("batman", 70)
+    system.set_lifetime("batman", 900)
+
+    snapshot = system.snapshot
+    for name in ("anarch", "batman", "nobody"):
+        assert snapshot.get_individual_total(name) == system.get_individual_total(name)
+        assert snapshot.get_lifetime_points(name) == system.get_lifetime_points(name)
+        assert snapshot.get_215_attendance(name) == system.get_215_attendance(name)
+    assert snapshot.get_all_scores() == system.get_all_scores()
+
+
+def test_unchanged_parts_are_shared_between_snapshots(system):
+    system.assign_to_individual("anarch", "215")
+    before = system.snapshot
+    leaderboard = before.get_all_scores()
+
+    # A value change touches no users
+    system.set_item_value("dragon", 100)
+
+    assert system.snapshot.version == before.version + 1
+    assert system.snapshot.users is before.users
+    assert system.snapshot.distribution is before.distribution
+    assert system.snapshot.get_all_scores() is leaderboard
+    assert system.snapshot.value_table.values["dragon"] == 100
+    assert "dragon" not in before.value_table
+
+
+def test_failed_commands_publish_nothing(system):
+    before = system.snapshot
+
+    system.assign_to_individual("nobody", "215")
+
+    assert system.snapshot is before
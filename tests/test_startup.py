@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+
+from startup import StartupTimer
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_report_lists_phases_by_start_time():
+    timer = StartupTimer(started=100.0)
+    timer.record("state load", 100.5, 101.0)
+    timer.record("imports", 100.0, 100.25)
+
+    lines = timer.report().splitlines()
+
+    assert lines[1].split()[0] == "imports" and "250.0ms" in lines[1]
+    assert lines[2].startswith("   state load") and "(from +0.50s)" in lines[2]
+
+
+def test_phase_records_its_duration():
+    timer = StartupTimer()
+    with timer.phase("index build"):
+        pass
+
+    [(name, offset, duration)] = timer.phases
+    assert name == "index build" and offset >= 0 and duration >= 0
+
+
+def test_command_engine_loads_without_the_heavy_modules():
+    code = ("import sys, engine, point_system; "
+            "print(sorted(m for m in ('render', 'verify', 'PIL', 'cProfile') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO, capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "[]"
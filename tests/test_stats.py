@@ -0,0 +1,73 @@
+import random
+
+from stats import ScoreHistogram
+
+
+def test_single_player_is_clamped_to_their_score():
+    histogram = ScoreHistogram()
+    histogram.add(1010)
+
+    assert histogram.percentile(50) == 1010
+    assert histogram.percentile(90) == 1010
+    assert histogram.percentile_of(1010) == 0
+
+
+def test_percentiles_stay_within_the_observed_range():
+    histogram = ScoreHistogram()
+    histogram.rebuild([0, 20, 1010, 1040])
+
+    assert histogram.percentile(0) == 0
+    assert histogram.percentile(100) == 1040
+    assert histogram.percentile_of(0) == 0
+    assert histogram.percentile_of(1041) == 100
+    assert 0 <= histogram.percentile(25) <= 49
+
+
+def test_estimates_are_close_to_exact_percentiles():
+    rng = random.Random(1)
+    scores = [rng.randint(-200, 3000) for _ in range(2000)]
+    histogram = ScoreHistogram()
+    histogram.rebuild(scores)
+    ordered = sorted(scores)
+
+    assert abs(histogram.percentile(50) - ordered[1000]) <= histogram.width
+    assert abs(histogram.percentile_of(ordered[500]) - 25) <= 3
+
+
+def test_extremes_follow_moves_and_removals():
+    rng = random.Random(2)
+    histogram = ScoreHistogram()
+    scores = [rng.randint(0, 500) for _ in range(50)]
+    histogram.rebuild(scores)
+    for _ in range(2000):
+        i = rng.randrange(len(scores))
+        new = scores[i] + rng.randint(-60, 60)
+        histogram.move(scores[i], new)
+        scores[i] = new
+        assert (histogram.low, histogram.high) == (min(scores), max(scores))
+        assert histogram.count == len(scores) and histogram.total == sum(scores)
+    # Stale heap entries are pruned rather than piling up
+    assert len(histogram._lows) <= 2 * len(histogram.scores) + 16
+
+    for score in scores:
+        histogram.remove(score)
+    assert (histogram.low, histogram.high, histogram.count) == (None, None, 0)
+
+
+def test_leader_gaining_points_does_not_rescan():
+    histogram = ScoreHistogram()
+    histogram.rebuild(range(100))
+    histogram.move(99, 149)
+    assert histogram.high == 149
+    assert -histogram._highs[0] == 149
+
+
+def test_copy_keeps_the_estimates():
+    histogram = ScoreHistogram()
+    histogram.rebuild([5, 70, 300])
+    frozen = histogram.copy()
+    histogram.move(300, 900)
+
+    assert frozen.high == 300
+    assert frozen.percentile(100) == 300
+    assert frozen.format("x", 70) == frozen.copy().format("x", 70)
@@ -0,0 +1,136 @@
+from journal import Transaction
+
+from conftest import state
+
+
+def test_undo_reverts_a_quick_assign(system):
+    before = state(system)
+    system.assign_to_individual("anarch", "215")
+    tx = system.last_transaction
+
+    assert isinstance(system.undo_transaction(tx.txid), Transaction)
+    assert state(system) == before
+    assert system.journal.get(tx.txid).undone
+
+
+def test_undo_append_keeps_later_appends(system):
+    system.assign_to_individual("anarch", "215")
+    first = system.last_transaction
+    system.add_points("anarch", 30)
+
+    assert isinstance(system.undo_transaction(first.txid), Transaction)
+    assert system.get_individual_total("anarch") == 30
+    assert system.get_215_attendance("anarch") == 0
+
+
+def test_undo_set_points_after_later_changes_is_refused(system):
+    system.add_points("anarch", 100)
+    system.set_points("anarch", 1000)
+    set_tx = system.last_transaction
+    system.assign_to_individual("anarch", "215")
+    before = state(system)
+
+    result = system.undo_transaction(set_tx.txid)
+
+    assert isinstance(result, str) and "changed after it" in result
+    assert state(system) == before
+    assert not system.journal.get(set_tx.txid).undone
+
+
+def test_undo_set_points_without_later_changes(system):
+    system.add_points("anarch", 100)
+    before = state(system)
+    system.set_points("anarch", 1000)
+
+    assert isinstance(system.undo_transaction(system.last_transaction.txid), Transaction)
+    assert state(system) == before
+
+
+def test_undo_set_counter_after_later_changes_is_refused(system):
+    system.set_lifetime("anarch", 5000)
+    set_tx = system.last_transaction
+    system.add_points("anarch", 50)
+
+    assert isinstance(system.undo_transaction(set_tx.txid), str)
+    assert system.get_lifetime_points("anarch") == 5050
+
+
+def test_undo_unregister_after_the_name_was_taken_is_refused(system):
+    system.unregister_user(1)
+    unregister_tx = system.last_transaction
+    system.register_user(3, "anarch")
+    before = state(system)
+
+    result = system.undo_transaction(unregister_tx.txid)
+
+    assert isinstance(result, str) and "registered to another user" in result
+    assert state(system) == before
+    assert system.get_username_for_discord_user(3) == "anarch"
+    assert system.get_username_for_discord_user(1) is None
+
+
+def test_undo_register_after_reregistering_is_refused(system):
+    system.register_user(4, "robin")
+    register_tx = system.last_transaction
+    system.register_user(4, "nightwing")
+
+    assert isinstance(system.undo_transaction(register_tx.txid), str)
+    assert system.get_username_for_discord_user(4) == "nightwing"
+
+
+def test_refused_undo_leaves_partial_reverts_undone(system):
+    # delete_username sets the registration, history and counters in one transaction
+    system.assign_to_individual("batman", "215")
+    system.delete_username("batman")
+    delete_tx = system.last_transaction
+    system.register_user(5, "batman")
+    before = state(system)
+
+    assert isinstance(system.undo_transaction(delete_tx.txid), str)
+    assert state(system) == before
+
+
+def test_undo_increment_after_counters_were_reset_is_refused(system):
+    system.assign_to_individual("anarch", "215")
+    assign_tx = system.last_transaction
+    system.set_215_attends("anarch", 0)
+    system.set_lifetime("anarch", 0)
+
+    result = system.undo_transaction(assign_tx.txid)
+
+    assert isinstance(result, str) and "changed after it" in result
+    assert system.get_215_attendance("anarch") == 0
+    assert system.get_lifetime_points("anarch") == 0
+
+
+def test_undo_removes_the_latest_matching_entry(system):
+    system.assign_to_individual("anarch", "215")
+    system.add_points("anarch", 10)
+    system.assign_to_individual("anarch", "215")
+    system.add_points("anarch", 20)
+
+    system.undo_transaction(system.journal.recent(2)[1].txid)
+    items = [entry['item'] for entry in system.individual_scores['anarch']]
+    assert items == ['215', 'Admin +10', 'Admin +20']
+
+
+def test_undo_autocorrect_toggle(system):
+    system.set_autocorrect(True)
+    tx = system.last_transaction
+
+    assert system.autocorrect
+    assert isinstance(system.undo_transaction(tx.txid), Transaction)
+    assert not system.autocorrect
+
+
+def test_undo_autocorrect_after_it_was_toggled_again_is_refused(system):
+    system.set_autocorrect(True)
+    on_tx = system.last_transaction
+    system.set_autocorrect(False)
+    system.set_autocorrect(True)
+    system.set_autocorrect(False)
+
+    result = system.undo_transaction(on_tx.txid)
+
+    assert isinstance(result, str) and "autocorrect setting changed" in result
+    assert not system.autocorrect
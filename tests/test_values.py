@@ -0,0 +1,58 @@
+from values import ValueTable
+
+from conftest import new_system
+
+
+def test_tables_are_immutable_versions():
+    table = ValueTable(1, {"dragon": 100})
+    repriced = table.with_value("dragon", 150)
+    retired = repriced.without_item("dragon")
+
+    assert table.values["dragon"] == 100 and table.version == 1
+    assert repriced.values["dragon"] == 150 and repriced.version == 2
+    assert "dragon" not in retired and retired.retired == {"dragon"}
+    assert "dragon" not in repriced.with_value("dragon", 1).retired
+
+
+def test_reprice_keeps_history(system):
+    system.set_item_value("dragon", 100)
+    system.assign_to_individual("anarch", "dragon")
+    old_version = system.value_table.version
+
+    system.set_item_value("dragon", 150)
+    system.assign_to_individual("anarch", "dragon")
+
+    history = system.individual_scores["anarch"]
+    assert [(entry['points'], entry['v']) for entry in history] == [(100, old_version), (150, old_version + 1)]
+    assert system.get_individual_total("anarch") == 250
+
+
+def test_pinned_table_is_unaffected_by_later_changes(system):
+    system.set_item_value("dragon", 100)
+    pinned = system.value_table
+
+    system.retire_item("dragon")
+
+    assert pinned.values["dragon"] == 100
+    assert "dragon" not in system.point_values
+    assert system.assign_to_individual("anarch", "dragon").startswith("Error:")
+
+
+def test_value_changes_replay_and_undo(system):
+    system.save_data("point_data.json")
+    before = system.value_table.state()
+    system.set_item_value("dragon", 100)
+    set_tx = system.last_transaction
+    system.retire_item("dragon")
+    retire_tx = system.last_transaction
+
+    replayed = new_system()
+    replayed.load_data("point_data.json")
+    replayed.load_journal()
+    assert replayed.value_table.state() == system.value_table.state()
+
+    system.undo_transaction(retire_tx.txid)
+    system.undo_transaction(set_tx.txid)
+    # Undo publishes the earlier contents as a newer version
+    assert system.value_table.state() == before
+    assert system.value_table.version == 5
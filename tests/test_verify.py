@@ -0,0 +1,75 @@
+import asyncio
+
+from engine import CommandEngine
+from point_system import PointAssignmentSystem
+from verify import repair_state, verify_state
+
+from conftest import Context
+
+
+def drifted_system():
+    """anarch has two 215s in their history but counters from only one"""
+    point_system = PointAssignmentSystem()
+    point_system.from_dict({
+        'individual_scores': {'anarch': [{'item': '215', 'points': 50}, {'item': '215', 'points': 50}],
+                              'batman': [{'item': '215', 'points': 50}]},
+        'user_registrations': {'1': 'anarch', '2': 'batman'},
+        'lifetime_points': {'anarch': 50, 'batman': 50},
+        'attendance_215': {'anarch': 1, 'batman': 1},
+    })
+    return point_system
+
+
+def test_verify_reports_drift():
+    report = verify_state(drifted_system().to_dict())
+    assert {(d['user'], d['field']) for d in report['discrepancies']} == {
+        ('anarch', 'lifetime_points'), ('anarch', 'attendance_215')}
+
+
+def test_repair_recomputes_counters():
+    point_system = drifted_system()
+    data = point_system.to_dict()
+    point_system.apply_repair(repair_state(data, verify_state(data), 'recompute'))
+
+    assert point_system.get_lifetime_points("anarch") == 100
+    assert point_system.get_215_attendance("anarch") == 2
+    assert not verify_state(point_system.to_dict())['discrepancies']
+
+
+class ConcurrentContext(Context):
+    """Quick-assigns while the engine replays history in its worker thread"""
+
+    def __init__(self, engine):
+        super().__init__()
+        self.engine = engine
+
+    async def progress(self, text):
+        await self.engine.handle_message(Context(2, False), "215 anarch, batman")
+
+
+def run_verify(mode):
+    point_system = drifted_system()
+    engine = CommandEngine(point_system, data_file=None)
+    ctx = ConcurrentContext(engine)
+    asyncio.run(engine.verify(ctx, mode))
+    return point_system, ctx
+
+
+def test_verify_repair_keeps_changes_made_during_the_replay():
+    point_system, ctx = run_verify('repair')
+
+    assert point_system.get_lifetime_points("anarch") == 150
+    assert point_system.get_215_attendance("anarch") == 3
+    # batman was consistent all along and must not be reported or touched
+    assert point_system.get_lifetime_points("batman") == 100
+    assert "batman" not in ctx.replies[-1]
+    assert not verify_state(point_system.to_dict())['discrepancies']
+
+
+def test_verify_adopt_keeps_changes_made_during_the_replay():
+    point_system, ctx = run_verify('adopt')
+
+    history = point_system.individual_scores['anarch']
+    assert [entry['item'] for entry in history] == ['215', '215', '215', 'Admin verify checkpoint']
+    assert point_system.get_lifetime_points("anarch") == 100
+    assert not verify_state(point_system.to_dict())['discrepancies']
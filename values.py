@@ -0,0 +1,54 @@
+"""Versioned point value tables.
+
+A ValueTable is an immutable snapshot of item -> points. Changing a value
+never edits a table: it publishes a new one with the next version number,
+and PointAssignmentSystem swaps its `value_table` reference in one
+assignment. Anything that pinned the old table (a quick-assign in
+progress, a cached render) keeps seeing a consistent view, and history
+entries record the version they were priced with, so a reprice never
+rewrites history.
+"""
+from types import MappingProxyType
+
+
+class ValueTable:
+    __slots__ = ('version', 'values', 'retired')
+
+    def __init__(self, version, values, retired=()):
+        self.version = version
+        self.values = MappingProxyType(dict(values))
+        # Items that used to have a value; kept so old history entries still make sense
+        self.retired = frozenset(retired)
+
+    def __contains__(self, item):
+        return item in self.values
+
+    def state(self):
+        """Contents without the version, as recorded in the journal"""
+        return {'values': dict(self.values), 'retired': sorted(self.retired)}
+
+    def with_value(self, item, points):
+        """A new table with an item added or revalued"""
+        values = dict(self.values)
+        values[item] = points
+        return ValueTable(self.version + 1, values, self.retired - {item})
+
+    def without_item(self, item):
+        """A new table with an item retired"""
+        values = dict(self.values)
+        values.pop(item, None)
+        return ValueTable(self.version + 1, values, self.retired | {item})
+
+    def format_by_points(self):
+        """Lines of '• N points: item, item' grouped by value"""
+        points_by_value = {}
+        for item, points in self.values.items():
+            if points not in points_by_value:
+                points_by_value[points] = []
+            points_by_value[points].append(item)
+
+        result = ""
+        for points in sorted(points_by_value.keys()):
+            items = ", ".join(points_by_value[points])
+            result += f"• {points} points: {items}\n"
+        return result
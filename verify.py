@@ -0,0 +1,264 @@
+"""State consistency verifier.
+
+`lifetime_points` and `attendance_215` are derived from `individual_scores`
+but are stored (and edited by admin commands) separately. This module replays
+each user's history and compares the result with the stored counters.
+
+Replay rules follow the write paths in main.py:
+  • every positive entry adds to lifetime points, except 'Admin -N'
+    adjustments and 'Admin set to N' resets
+  • every '215' entry adds one 215 attend
+  • an entry carrying a 'lifetime' or 'attends_215' checkpoint sets that
+    counter to the recorded value (admin counter edits write these)
+
+Repairs from the command line go through PointAssignmentSystem.apply_repair
+under the journal lock, like `!verify repair`, so they are journaled (and
+undoable) and the running bot picks them up instead of having them
+overwritten by its next save.
+
+Usage: python verify.py [point_data.json] [--repair | --adopt] [--journal point_journal.jsonl] [--workers N]
+"""
+import sys
+
+from storage import read_data_file
+
+# Seconds to wait for the bot to release the journal lock before repairing
+LOCK_WAIT = 30
+
+# Below this many users a process pool costs more than it saves
+PARALLEL_THRESHOLD = 2000
+CHUNK_SIZE = 500
+
+
+def counts_toward_lifetime(entry):
+    """Check whether a history entry adds to lifetime points"""
+    item = str(entry.get('item', ''))
+    if item.startswith('Admin -') or item.startswith('Admin set to'):
+        return False
+    return entry.get('points', 0) > 0
+
+
+def replay_history(history):
+    """Replay one user's history, returns (current_total, lifetime, attends_215)"""
+    total = 0
+    lifetime = 0
+    attends = 0
+    for entry in history:
+        points = entry.get('points', 0)
+        total += points
+        if counts_toward_lifetime(entry):
+            lifetime += points
+        if str(entry.get('item')) == '215':
+            attends += 1
+        # Checkpoints written by admin counter edits override the replay so far
+        if 'lifetime' in entry:
+            lifetime = entry['lifetime']
+        if 'attends_215' in entry:
+            attends = entry['attends_215']
+    return total, lifetime, attends
+
+
+def _find_key(mapping, username):
+    """Find the key for a username in a dict (case-insensitive)"""
+    if username in mapping:
+        return username
+    username_lower = username.lower()
+    for key in mapping:
+        if key.lower() == username_lower:
+            return key
+    return None
+
+
+def _verify_chunk(users):
+    """Verify a chunk of (username, history, stored_lifetime, stored_attends) tuples"""
+    discrepancies = []
+    for username, history, stored_lifetime, stored_attends in users:
+        _, lifetime, attends = replay_history(history)
+        if (stored_lifetime or 0) != lifetime:
+            discrepancies.append({'user': username, 'field': 'lifetime_points',
+                                  'stored': stored_lifetime, 'replayed': lifetime})
+        if (stored_attends or 0) != attends:
+            discrepancies.append({'user': username, 'field': 'attendance_215',
+                                  'stored': stored_attends, 'replayed': attends})
+    return discrepancies
+
+
+def verify_state(data, workers=None):
+    """Replay every user's history and report counters that do not match
+
+    Returns a report dict with the number of users checked, the list of
+    discrepancies and the orphaned counter keys (counters with no history).
+    Large datasets are split across a process pool.
+    """
+    scores = data.get('individual_scores', {})
+    lifetime_points = data.get('lifetime_points', {})
+    attendance_215 = data.get('attendance_215', {})
+
+    # Match counter keys to history keys once, case-insensitively
+    lifetime_by_lower = {key.lower(): key for key in lifetime_points}
+    attends_by_lower = {key.lower(): key for key in attendance_215}
+
+    users = []
+    for username, history in scores.items():
+        lifetime_key = lifetime_by_lower.pop(username.lower(), None)
+        attends_key = attends_by_lower.pop(username.lower(), None)
+        users.append((username, history,
+                      lifetime_points.get(lifetime_key),
+                      attendance_215.get(attends_key)))
+
+    if len(users) >= PARALLEL_THRESHOLD and workers != 1:
+        from concurrent.futures import ProcessPoolExecutor
+        chunks = [users[i:i + CHUNK_SIZE] for i in range(0, len(users), CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            discrepancies = [d for chunk in pool.map(_verify_chunk, chunks) for d in chunk]
+    else:
+        discrepancies = _verify_chunk(users)
+
+    # Counters that belong to nobody in the history can never be replayed
+    orphans = []
+    for key in lifetime_by_lower.values():
+        if lifetime_points[key]:
+            orphans.append({'user': key, 'field': 'lifetime_points', 'stored': lifetime_points[key]})
+    for key in attends_by_lower.values():
+        if attendance_215[key]:
+            orphans.append({'user': key, 'field': 'attendance_215', 'stored': attendance_215[key]})
+
+    return {
+        'users_checked': len(users),
+        'discrepancies': discrepancies,
+        'orphans': orphans,
+    }
+
+
+def repair_state(data, report, mode='recompute'):
+    """Return a repaired copy of the data for a verify report
+
+    mode='recompute' trusts the history: counters are set to the replayed
+    values and orphaned counters are dropped.
+    mode='adopt' trusts the counters: a zero-point checkpoint entry recording
+    the stored values is appended to the history so future replays agree.
+    """
+    if mode not in ('recompute', 'adopt'):
+        raise ValueError(f"Unknown repair mode '{mode}'")
+
+    repaired = dict(data)
+    scores = {key: list(history) for key, history in data.get('individual_scores', {}).items()}
+    lifetime_points = dict(data.get('lifetime_points', {}))
+    attendance_215 = dict(data.get('attendance_215', {}))
+    counters = {'lifetime_points': lifetime_points, 'attendance_215': attendance_215}
+
+    if mode == 'recompute':
+        for discrepancy in report['discrepancies']:
+            counter = counters[discrepancy['field']]
+            key = _find_key(counter, discrepancy['user']) or discrepancy['user']
+            counter[key] = discrepancy['replayed']
+        for orphan in report['orphans']:
+            counters[orphan['field']].pop(orphan['user'], None)
+    else:
+        users = {d['user'] for d in report['discrepancies']} | {o['user'] for o in report['orphans']}
+        for username in sorted(users):
+            score_key = _find_key(scores, username) or username
+            lifetime_key = _find_key(lifetime_points, username)
+            attends_key = _find_key(attendance_215, username)
+            scores.setdefault(score_key, []).append({
+                'item': 'Admin verify checkpoint',
+                'points': 0,
+                'lifetime': lifetime_points.get(lifetime_key, 0),
+                'attends_215': attendance_215.get(attends_key, 0),
+            })
+
+    repaired['individual_scores'] = scores
+    repaired['lifetime_points'] = lifetime_points
+    repaired['attendance_215'] = attendance_215
+    return repaired
+
+
+def format_report(report, limit=20):
+    """Format a verify report for Discord or the console"""
+    discrepancies = report['discrepancies']
+    orphans = report['orphans']
+    if not discrepancies and not orphans:
+        return f"✅ Verified {report['users_checked']} users - all counters match their history"
+
+    result = f"⚠️ Verified {report['users_checked']} users - " \
+             f"{len(discrepancies)} discrepancies, {len(orphans)} orphaned counters\n"
+    for d in discrepancies[:limit]:
+        result += f"• **{d['user']}** {d['field']}: stored {d['stored']}, history says {d['replayed']}\n"
+    for o in orphans[:max(0, limit - len(discrepancies))]:
+        result += f"• **{o['user']}** {o['field']}: {o['stored']} with no point history\n"
+    hidden = len(discrepancies) + len(orphans) - limit
+    if hidden > 0:
+        result += f"...and {hidden} more\n"
+    return result
+
+
+def repair_file(filename, journal_file, mode, workers=None):
+    """Verify and repair a data file as one journaled transaction, returns (report, transaction)
+
+    Returns (None, None) when the file doesn't exist.
+    """
+    # Imported here so worker processes don't load the point system
+    from journal import Journal
+    from point_system import PointAssignmentSystem
+
+    point_system = PointAssignmentSystem(journal=Journal(journal_file, lock_timeout=LOCK_WAIT))
+    if not point_system.load_data(filename):
+        return None, None
+    point_system.load_journal()
+    data = point_system.to_dict()
+    report = verify_state(data, workers=workers)
+
+    with point_system.journal.locked():
+        if point_system.sync_journal():
+            # The bot changed something while we were checking
+            data = point_system.to_dict()
+            report = verify_state(data, workers=workers)
+        if not report['discrepancies'] and not report['orphans']:
+            return report, None
+        point_system.apply_repair(repair_state(data, report, mode))
+        point_system.save_data(filename)
+    return report, point_system.last_transaction
+
+
+def main(argv):
+    filename = "point_data.json"
+    journal_file = "point_journal.jsonl"
+    mode = None
+    workers = None
+    args = list(argv)
+    while args:
+        arg = args.pop(0)
+        if arg == '--repair':
+            mode = 'recompute'
+        elif arg == '--adopt':
+            mode = 'adopt'
+        elif arg == '--journal':
+            journal_file = args.pop(0)
+        elif arg == '--workers':
+            workers = int(args.pop(0))
+        else:
+            filename = arg
+
+    if mode:
+        from locking import LockTimeout
+        try:
+            report, tx = repair_file(filename, journal_file, mode, workers=workers)
+        except LockTimeout as e:
+            print(f"❌ {e}; try again when the bot is idle")
+            return 1
+    else:
+        data = read_data_file(filename)
+        report = verify_state(data, workers=workers) if data is not None else None
+        tx = None
+    if report is None:
+        print(f"❌ {filename} not found")
+        return 1
+
+    print(format_report(report, limit=1000))
+    if tx is not None:
+        print(f"🔧 Repaired {filename} ({mode}) as {tx.txid}")
+    return 0 if not report['discrepancies'] and not report['orphans'] else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))